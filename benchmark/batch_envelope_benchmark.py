@@ -0,0 +1,72 @@
+"""
+Measures the round-trip saving of sending commands in batch envelopes.
+
+``EpoClient.run_batch`` is run against the mock ePO "remote" service with a
+fixed per-request latency (simulating the broker round-trip), once with
+batch envelope support enabled and once with it disabled (so that each
+command is sent in its own request).
+
+Usage::
+
+    python benchmark/batch_envelope_benchmark.py [--commands N]
+        [--batch-size N] [--latency SECONDS] [--runs N]
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+import argparse
+import time
+
+from common import *  # pylint: disable=wildcard-import,unused-wildcard-import
+# The library is importable once common has set up the path
+# pylint: disable=wrong-import-order
+from dxlepoclient import EpoClient
+
+
+def run(supports_batch, commands, batch_size, latency, runs):
+    """
+    Returns the best time (in seconds) to run ``commands`` system find
+    commands.
+    """
+    epo_client = EpoClient(
+        create_mock_epo_server_client(100, use_commands_service=False,
+                                      supports_batch=supports_batch,
+                                      latency=latency),
+        EPO_UNIQUE_ID)
+    batch = [("system.find", {"searchText": "system-{0}".format(index)})
+             for index in range(commands)]
+    best = None
+    for _ in range(runs):
+        start = time.time()
+        results = epo_client.run_batch(batch, batch_size=batch_size)
+        elapsed = time.time() - start
+        assert all(result.succeeded for result in results)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--commands", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.005,
+                        help="mock per-request latency in seconds")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print("{0} commands, batch size {1}, {2:.1f} ms per request".format(
+        args.commands, args.batch_size, args.latency * 1000))
+    individual = run(False, args.commands, args.batch_size, args.latency,
+                     args.runs)
+    enveloped = run(True, args.commands, args.batch_size, args.latency,
+                    args.runs)
+    print("{0:>12} {1:>10} {2:>14}".format("mode", "seconds", "commands/sec"))
+    for mode, elapsed in [("individual", individual),
+                          ("envelope", enveloped)]:
+        print("{0:>12} {1:>10.3f} {2:>14.1f}".format(
+            mode, elapsed, args.commands / elapsed))
+    print("speedup: {0:.1f}x".format(individual / enveloped))
+
+
+if __name__ == "__main__":
+    main()
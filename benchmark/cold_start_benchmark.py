@@ -0,0 +1,117 @@
+"""
+Measures the cold start cost of the ePO DXL client library.
+
+Each measurement is taken in a fresh interpreter:
+
+* ``import``: the time to ``import dxlepoclient``
+* ``first command``: the time from interpreter start-up to the result of the
+  first ``run_command`` call against an in-process stand-in for the DXL
+  fabric (importing the library and the DXL client, creating the clients and
+  discovering the ePO service included)
+
+The benchmark also verifies that importing the package (and using
+``get_version()`` and the constants classes) does not load the DXL client
+libraries. A non-zero exit code is returned if that check fails or if the
+median import time exceeds ``--max-import-ms`` (:const:`MAX_IMPORT_MS` by
+default), so the benchmark can be used to catch regressions. It is run as
+part of ``python setup.py ci``.
+
+Usage::
+
+    python benchmark/cold_start_benchmark.py [--runs N] [--max-import-ms MS]
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The budget for the median time (in milliseconds) to import the package
+MAX_IMPORT_MS = 10.0
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.time()
+import dxlepoclient
+elapsed = time.time() - start
+dxlepoclient.get_version()
+dxlepoclient.OutputFormat.JSON
+dxlepoclient.Priority.BULK
+print(json.dumps({
+    "elapsed": elapsed,
+    "dxl_loaded": any(name.split(".")[0] in ("dxlclient", "dxlbootstrap")
+                      for name in sys.modules)
+}))
+"""
+
+FIRST_COMMAND_SCRIPT = """
+import json, time
+start = time.time()
+from dxlepoclient import EpoClient
+from tests.mock_dxlclient import MockDxlClient
+from tests.mock_eposerver import MockEpoServer
+with MockDxlClient() as dxl_client:
+    dxl_client.connect()
+    with MockEpoServer(dxl_client):
+        EpoClient(dxl_client).run_command("system.find", {"searchText": ""})
+print(json.dumps({"elapsed": time.time() - start}))
+"""
+
+
+def measure(script, runs):
+    """
+    Runs ``script`` in ``runs`` fresh interpreters and returns the parsed
+    output of each run.
+    """
+    results = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, "-c", script],
+                                         cwd=ROOT_DIR)
+        results.append(json.loads(output.decode("utf-8").strip()))
+    return results
+
+
+def summarize(name, results):
+    """
+    Prints the min/median/max of the elapsed times (in milliseconds) and
+    returns the median.
+    """
+    times = sorted(result["elapsed"] * 1000 for result in results)
+    median = times[len(times) // 2]
+    print("{0:<14} {1:>9.1f} {2:>9.1f} {3:>9.1f}".format(
+        name, times[0], median, times[-1]))
+    return median
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-import-ms", type=float, default=MAX_IMPORT_MS)
+    args = parser.parse_args()
+
+    import_results = measure(IMPORT_SCRIPT, args.runs)
+    first_command_results = measure(FIRST_COMMAND_SCRIPT, args.runs)
+
+    print("{0:<14} {1:>9} {2:>9} {3:>9}".format("(ms)", "min", "median",
+                                                "max"))
+    import_median = summarize("import", import_results)
+    summarize("first command", first_command_results)
+
+    failed = False
+    if any(result["dxl_loaded"] for result in import_results):
+        print("FAIL: importing dxlepoclient loaded the DXL client libraries")
+        failed = True
+    if import_median > args.max_import_ms:
+        print("FAIL: median import time exceeds {0} ms".format(
+            args.max_import_ms))
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
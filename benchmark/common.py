@@ -0,0 +1,86 @@
+"""
+Common definitions for the ePO DXL client benchmarks.
+
+By default, the benchmarks run against an in-process stand-in for the DXL
+fabric (see ``tests/mock_dxlclient.py``) with a mock ePO service registered,
+so that they can be run without a broker or an ePO server.
+"""
+
+from __future__ import absolute_import
+import os
+import sys
+
+# Allow the library and the test mocks to be imported when the benchmarks are
+# run from a source tree
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# pylint: disable=wrong-import-position
+from dxlbootstrap.util import MessageUtils
+from dxlclient.callbacks import RequestCallback
+from dxlclient.message import Response
+from dxlclient.service import ServiceRegistrationInfo
+from tests.mock_dxlclient import MockDxlClient
+from tests.mock_eposerver import MockEpoServer
+from tests.mock_requesthandlers import SyntheticInventory
+from tests.test_value_constants import LOCAL_TEST_SERVER_NAME
+
+# The unique identifier of the mock ePO server
+EPO_UNIQUE_ID = LOCAL_TEST_SERVER_NAME + "0"
+
+
+def create_records(count, record_size=None):
+    """
+    Creates ``count`` synthetic system records (see
+    ``tests.mock_requesthandlers.SyntheticInventory``).
+    """
+    return SyntheticInventory(count, record_size=record_size).systems
+
+
+class SystemFindCallback(RequestCallback):
+    """
+    Mock ePO "commands" service callback which responds to every request with
+    a pre-encoded payload.
+    """
+
+    def __init__(self, dxl_client, payload):
+        super(SystemFindCallback, self).__init__()
+        self._dxl_client = dxl_client
+        self._payload = payload
+
+    def on_request(self, request):
+        response = Response(request)
+        response.payload = self._payload
+        self._dxl_client.send_response(response)
+
+
+def create_mock_dxl_client(record_count):
+    """
+    Creates an in-process DXL client with a mock ePO "commands" service
+    registered which returns ``record_count`` system records for every
+    command.
+    """
+    dxl_client = MockDxlClient()
+    dxl_client.connect()
+    service = ServiceRegistrationInfo(dxl_client,
+                                      "/mcafee/service/epo/commands")
+    service.metadata = {"epoGuid": EPO_UNIQUE_ID}
+    service.add_topic(
+        "/mcafee/service/epo/command/" + EPO_UNIQUE_ID + "/remote/#",
+        SystemFindCallback(dxl_client, MessageUtils.dict_to_json(
+            create_records(record_count)).encode("utf-8")))
+    dxl_client.register_service_sync(service, 10)
+    return dxl_client
+
+
+def create_mock_epo_server_client(system_count, **kwargs):
+    """
+    Creates an in-process DXL client with a mock ePO server registered which
+    serves ``system_count`` synthetic systems. Additional keyword arguments
+    (``seed``, ``record_size``, ``latency``, ``error_rate``) are passed to
+    ``tests.mock_eposerver.MockEpoServer``.
+    """
+    dxl_client = MockDxlClient()
+    dxl_client.connect()
+    MockEpoServer(dxl_client, system_count=system_count, **kwargs).__enter__()
+    return dxl_client
@@ -0,0 +1,370 @@
+"""
+Drives ``EpoClient.run_command`` from multiple threads at a target rate and
+records the latency distribution, errors and process memory (RSS) over time.
+
+The harness runs against the in-process mock ePO service by default, or
+against a real fabric when a DXL client configuration file is specified. A
+JSON report is written at the end of the run. Passing the report from a
+previous run (for example, from the previous release) with ``--compare``
+prints the change in throughput, latency and memory growth.
+
+Latencies are measured from the time at which each request was scheduled
+to be sent (not when it was actually sent), so a stalled client shows up
+as increased latency rather than as a reduced request rate.
+
+Usage::
+
+    python benchmark/load_harness.py [--threads N] [--rate N]
+        [--duration SECONDS] [--records N] [--report FILE]
+        [--compare FILE] [--config FILE]
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+import argparse
+import collections
+import functools
+import json
+import math
+import os
+import platform
+import sys
+import threading
+import time
+
+from common import *  # pylint: disable=wildcard-import,unused-wildcard-import
+# The library is importable once common has set up the path
+# pylint: disable=wrong-import-order
+import dxlepoclient
+from dxlepoclient import EpoClient
+
+# The number of histogram buckets per power of two (about 9% resolution)
+SUB_BUCKETS = 8
+
+# The percentiles included in the report
+PERCENTILES = [50, 90, 99, 99.9]
+
+
+class LatencyHistogram(object):
+    """
+    Log-linear histogram of latencies (recorded in seconds and bucketed in
+    microseconds).
+    """
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def bucket(value):
+        return int(math.log(max(value * 1e6, 1), 2) * SUB_BUCKETS)
+
+    @staticmethod
+    def bucket_upper_bound(bucket):
+        return 2 ** (float(bucket + 1) / SUB_BUCKETS) / 1e6
+
+    def record(self, value):
+        self.counts[self.bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percentile):
+        if not self.count:
+            return None
+        threshold = self.count * percentile / 100.0
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= threshold:
+                return min(self.bucket_upper_bound(bucket), self.max)
+        return self.max
+
+    def summary(self):
+        ret = {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "max": self.max if self.count else None
+        }
+        for percentile in PERCENTILES:
+            ret["p{0:g}".format(percentile)] = self.percentile(percentile)
+        return ret
+
+
+def read_rss():
+    """
+    Returns the resident set size of the current process (in bytes). On
+    platforms without ``/proc``, the peak RSS is returned instead.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (IOError, OSError, ValueError):
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+class SendSchedule(object):
+    """
+    The times at which requests are scheduled to be sent: evenly spaced at
+    ``rate`` requests per second, or as soon as possible if ``rate`` is not
+    set.
+    """
+
+    def __init__(self, rate):
+        self._rate = rate
+        self._lock = threading.Lock()
+        self._next_index = 0
+        self.start = None
+        self.end = None
+
+    def begin(self, duration):
+        """
+        Starts a schedule which runs for ``duration`` seconds from now.
+        """
+        self.start = time.time()
+        self.end = self.start + duration
+
+    def next_send_time(self):
+        """
+        Returns the time at which the next request is to be sent.
+        """
+        with self._lock:
+            index = self._next_index
+            self._next_index += 1
+        if not self._rate:
+            return time.time()
+        return self.start + index / float(self._rate)
+
+
+class LoadGenerator(object):
+    """
+    Sends requests from a set of threads according to a shared schedule.
+    """
+
+    def __init__(self, epo_client, command, params, threads, rate):
+        self._send = functools.partial(epo_client.run_command, command,
+                                       params)
+        self._threads = threads
+        self._schedule = SendSchedule(rate)
+        self._lock = threading.Lock()
+        self._histogram = LatencyHistogram()
+        self._interval_histogram = LatencyHistogram()
+        self.errors = collections.Counter()
+
+    def _record(self, latency, error):
+        with self._lock:
+            self._histogram.record(latency)
+            self._interval_histogram.record(latency)
+            if error:
+                self.errors[error[:200]] += 1
+
+    def _run_thread(self):
+        while True:
+            scheduled = self._schedule.next_send_time()
+            if scheduled >= self._schedule.end:
+                return
+            delay = scheduled - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            error = None
+            try:
+                self._send()
+            except Exception as ex:  # pylint: disable=broad-except
+                error = str(ex)
+            self._record(time.time() - scheduled, error)
+
+    def take_interval(self):
+        """
+        Returns the histogram for the requests that have completed since the
+        previous call.
+        """
+        with self._lock:
+            histogram = self._interval_histogram
+            self._interval_histogram = LatencyHistogram()
+        return histogram
+
+    def run(self, duration, sample_interval):
+        """
+        Runs the load for ``duration`` seconds and returns the overall
+        histogram and a list of samples taken every ``sample_interval``
+        seconds.
+        """
+        schedule = self._schedule
+        schedule.begin(duration)
+        threads = [threading.Thread(target=self._run_thread)
+                   for _ in range(self._threads)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        samples = []
+        completed = 0
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(min(sample_interval,
+                           max(schedule.end - time.time(), 0) + 0.1))
+            histogram = self.take_interval()
+            completed += histogram.count
+            summary = histogram.summary()
+            samples.append({
+                "elapsed": round(time.time() - schedule.start, 3),
+                "rss": read_rss(),
+                "completed": completed,
+                "throughput": histogram.count / float(sample_interval),
+                "p50": summary["p50"],
+                "p99": summary["p99"]
+            })
+        for thread in threads:
+            thread.join()
+        return self._histogram, time.time() - schedule.start, samples
+
+
+def create_epo_client(args):
+    if args.config:
+        from dxlclient.client import DxlClient
+        from dxlclient.client_config import DxlClientConfig
+        dxl_client = DxlClient(
+            DxlClientConfig.create_dxl_config_from_file(args.config))
+        dxl_client.connect()
+        return EpoClient(dxl_client, args.epo_unique_id)
+    return EpoClient(
+        create_mock_epo_server_client(args.records,
+                                      record_size=args.record_size,
+                                      latency=args.latency,
+                                      error_rate=args.error_rate),
+        EPO_UNIQUE_ID)
+
+
+def build_report(args, histogram, elapsed, samples, errors):
+    rss_values = [sample["rss"] for sample in samples]
+    # Memory growth is measured from the first sample so that the allocations
+    # made while warming up are excluded
+    return {
+        "version": dxlepoclient.get_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "threads": args.threads,
+            "rate": args.rate,
+            "duration": args.duration,
+            "command": args.command,
+            "records": None if args.config else args.records,
+            "record_size": None if args.config else args.record_size,
+            "latency": None if args.config else args.latency,
+            "error_rate": None if args.config else args.error_rate,
+            "target": args.config or "mock"
+        },
+        "elapsed": elapsed,
+        "requests": histogram.count,
+        "errors": sum(errors.values()),
+        "error_messages": dict(errors.most_common(10)),
+        "throughput": histogram.count / elapsed if elapsed else 0.0,
+        "latency": histogram.summary(),
+        "histogram": dict(
+            ("{0:.6f}".format(LatencyHistogram.bucket_upper_bound(bucket)),
+             count) for bucket, count in sorted(histogram.counts.items())),
+        "rss": {
+            "start": rss_values[0] if rss_values else None,
+            "end": rss_values[-1] if rss_values else None,
+            "max": max(rss_values) if rss_values else None,
+            "growth": rss_values[-1] - rss_values[0] if rss_values else None
+        },
+        "samples": samples
+    }
+
+
+def millis(value):
+    return "-" if value is None else "{0:.2f} ms".format(value * 1000)
+
+
+def print_report(report):
+    print("{0} requests in {1:.1f} s ({2:.1f}/s), {3} errors".format(
+        report["requests"], report["elapsed"], report["throughput"],
+        report["errors"]))
+    latency = report["latency"]
+    print("latency: mean {0}, ".format(millis(latency["mean"])) + ", ".join(
+        "p{0:g} {1}".format(percentile,
+                            millis(latency["p{0:g}".format(percentile)]))
+        for percentile in PERCENTILES) + ", max " + millis(latency["max"]))
+    rss = report["rss"]
+    if rss["start"] is not None:
+        print("rss: start {0:.1f} MB, end {1:.1f} MB, max {2:.1f} MB, "
+              "growth {3:+.1f} MB".format(
+                  rss["start"] / 1e6, rss["end"] / 1e6, rss["max"] / 1e6,
+                  rss["growth"] / 1e6))
+    for message, count in report["error_messages"].items():
+        print("error ({0}): {1}".format(count, message))
+
+
+def print_comparison(report, baseline):
+    def change(new, old):
+        if new is None or old is None or not old:
+            return "-"
+        return "{0:+.1f}%".format((new - old) * 100.0 / old)
+
+    print("compared to {0} (version {1}):".format(
+        baseline.get("settings", {}).get("target"), baseline.get("version")))
+    print("  throughput: {0}".format(
+        change(report["throughput"], baseline["throughput"])))
+    for percentile in PERCENTILES:
+        key = "p{0:g}".format(percentile)
+        print("  {0}: {1}".format(key, change(report["latency"][key],
+                                              baseline["latency"][key])))
+    print("  rss growth: {0:+.1f} MB (baseline {1:+.1f} MB)".format(
+        (report["rss"]["growth"] or 0) / 1e6,
+        (baseline["rss"]["growth"] or 0) / 1e6))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=200,
+                        help="target requests/second (0 for unlimited)")
+    parser.add_argument("--duration", type=float, default=30,
+                        help="duration of the run in seconds")
+    parser.add_argument("--sample-interval", type=float, default=1)
+    parser.add_argument("--command", default="system.find")
+    parser.add_argument("--records", type=int, default=100,
+                        help="systems in the mock System Tree")
+    parser.add_argument("--record-size", type=int,
+                        help="approximate size in bytes of each mock system "
+                             "record")
+    parser.add_argument("--latency", type=float, default=0,
+                        help="mock ePO response latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0,
+                        help="fraction of mock ePO requests that fail")
+    parser.add_argument("--report", help="the JSON report file to write")
+    parser.add_argument("--compare", help="a previous JSON report to "
+                                          "compare against")
+    parser.add_argument("--config", help="DXL client configuration file (a "
+                                         "mock fabric is used by default)")
+    parser.add_argument("--epo-unique-id")
+    args = parser.parse_args()
+
+    epo_client = create_epo_client(args)
+    generator = LoadGenerator(epo_client, args.command, {}, args.threads,
+                              args.rate)
+    histogram, elapsed, samples = generator.run(args.duration,
+                                                args.sample_interval)
+    report = build_report(args, histogram, elapsed, samples,
+                          generator.errors)
+    print_report(report)
+    if args.report:
+        with open(args.report, "w") as report_file:
+            json.dump(report, report_file, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            print_comparison(report, json.load(baseline_file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures how command throughput scales with the number of worker processes
+used by the ``ProcessCommandExecutor``.
+
+Each command returns a large ``system.find`` result which is decoded and
+parsed in the worker processes. The results are returned to the parent in
+parsed form.
+
+Usage::
+
+    python benchmark/process_executor_benchmark.py [--commands N]
+        [--records N] [--max-processes N]
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+import argparse
+import functools
+import multiprocessing
+import time
+
+from common import *  # pylint: disable=wildcard-import,unused-wildcard-import
+# The library is importable once common has set up the path
+# pylint: disable=wrong-import-order
+from dxlepoclient.executor import ProcessCommandExecutor, ResultMode
+
+
+def run(processes, commands, records, result_mode):
+    """
+    Runs ``commands`` system find commands with the specified number of
+    worker processes and returns the throughput (commands/second).
+    """
+    with ProcessCommandExecutor(
+            epo_unique_id=EPO_UNIQUE_ID, processes=processes,
+            result_mode=result_mode,
+            dxl_client_factory=functools.partial(create_mock_dxl_client,
+                                                 records)) as executor:
+        # Warm up each of the workers
+        list(executor.map_commands([("system.find", {})] * processes))
+
+        start = time.time()
+        for result in executor.map_commands(
+                [("system.find", {"searchText": ""})] * commands):
+            assert len(result) == records or result_mode == ResultMode.RAW
+        return commands / (time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--max-processes", type=int,
+                        default=multiprocessing.cpu_count())
+    parser.add_argument("--result-mode", default=ResultMode.PARSED,
+                        choices=[ResultMode.PARSED, ResultMode.RAW])
+    args = parser.parse_args()
+
+    print("{0} commands, {1} records per result, {2} results".format(
+        args.commands, args.records, args.result_mode))
+    print("{0:>9} {1:>14} {2:>8}".format("processes", "commands/sec",
+                                         "speedup"))
+    baseline = None
+    processes = 1
+    while processes <= args.max_processes:
+        throughput = run(processes, args.commands, args.records,
+                         args.result_mode)
+        baseline = baseline or throughput
+        print("{0:>9} {1:>14.1f} {2:>7.2f}x".format(
+            processes, throughput, throughput / baseline))
+        processes *= 2
+
+
+if __name__ == "__main__":
+    main()
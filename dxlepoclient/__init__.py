@@ -3,9 +3,107 @@
 # Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
 ################################################################################
 from __future__ import absolute_import
+import importlib
+import sys
+import types
 
 from ._version import __version__
-from .client import EpoClient, OutputFormat
+
+# The public attributes of the package, keyed by name, with the submodule that
+# each is imported from. They are imported on first access so that importing
+# this package (to check the version, etc.) does not load the DXL client
+# libraries (``dxlclient``, ``dxlbootstrap``) or the modules (``sqlite3``,
+# ``mmap``, ``xml.etree``, etc.) that only some of the features use.
+_LAZY_ATTRIBUTES = {
+    "AdaptiveConcurrency": "concurrency",
+    "BatchCommand": "batch",
+    "BatchExecutor": "batch",
+    "BatchResult": "batch",
+    "CacheBackend": "cache",
+    "CallRecorder": "diagnostics",
+    "Condition": "query",
+    "Deadline": "deadline",
+    "DxlClientPool": "pool",
+    "EpoClient": "client",
+    "ExportFormat": "export",
+    "ExportResult": "export",
+    "LazyResult": "lazy",
+    "OutputFormat": "parsers",
+    "Priority": "scheduler",
+    "ProcessCommandExecutor": "executor",
+    "QueryBuilder": "query",
+    "QueryWatcher": "watch",
+    "RateLimitPolicy": "ratelimit",
+    "RateLimiter": "ratelimit",
+    "RecordMerger": "merge",
+    "RequestScheduler": "scheduler",
+    "ResultMode": "executor",
+    "Route": "discovery",
+    "ServerProber": "probe",
+    "ServiceRegistryMonitor": "discovery",
+    "SharedMemoryCache": "cache",
+    "Span": "tracing",
+    "SpilledPayload": "spill",
+    "SqliteCache": "cache",
+    "Tracer": "tracing",
+    "merge_records": "merge"
+}
+
+# The lazy attributes are imported statically (but never at runtime) so that
+# static analysis tools such as pylint can resolve them. ``typing`` is not
+# available on Python 2, so the flag is a plain module constant.
+_TYPE_CHECKING = False
+if _TYPE_CHECKING:
+    from .batch import BatchCommand, BatchExecutor, BatchResult
+    from .cache import CacheBackend, SharedMemoryCache, SqliteCache
+    from .client import EpoClient
+    from .concurrency import AdaptiveConcurrency
+    from .deadline import Deadline
+    from .diagnostics import CallRecorder
+    from .discovery import Route, ServiceRegistryMonitor
+    from .executor import ProcessCommandExecutor, ResultMode
+    from .export import ExportFormat, ExportResult
+    from .lazy import LazyResult
+    from .merge import RecordMerger, merge_records
+    from .parsers import OutputFormat
+    from .pool import DxlClientPool
+    from .probe import ServerProber
+    from .query import Condition, QueryBuilder
+    from .ratelimit import RateLimitPolicy, RateLimiter
+    from .scheduler import Priority, RequestScheduler
+    from .spill import SpilledPayload
+    from .tracing import Span, Tracer
+    from .watch import QueryWatcher
+
+
+class _LazyModule(types.ModuleType):
+    """
+    The package module, which imports the attributes in ``_LAZY_ATTRIBUTES``
+    on first access.
+
+    Module-level ``__getattr__`` is not supported prior to Python 3.7, so the
+    package module is replaced in ``sys.modules`` with an instance of this
+    class instead.
+    """
+
+    def __init__(self, module):
+        super(_LazyModule, self).__init__(module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+        # On Python 2, the globals of a module (which the functions defined
+        # in it still use) are cleared when the module is garbage collected
+        self._module = module
+
+    def __getattr__(self, name):
+        if name not in _LAZY_ATTRIBUTES:
+            raise AttributeError("module {0!r} has no attribute {1!r}".format(
+                self.__name__, name))
+        value = getattr(importlib.import_module(
+            "." + _LAZY_ATTRIBUTES[name], self.__name__), name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_LAZY_ATTRIBUTES))
 
 
 def get_version():
@@ -15,3 +113,6 @@ def get_version():
     :return: The version of the McAfee ePolicy Orchestrator (ePO) Client Library
     """
     return __version__
+
+
+sys.modules[__name__] = _LazyModule(sys.modules[__name__])
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+"""
+Runs ePO remote commands from an NDJSON command file.
+
+Each line of the input contains a command specification (see
+:func:`dxlepoclient.batch.BatchCommand.from_dict`). Each line of the output
+contains the corresponding result (see
+:func:`dxlepoclient.batch.BatchResult.to_dict`). A throughput and latency
+summary is written to standard error once all of the commands have completed.
+
+.. code-block:: shell
+
+    python -m dxlepoclient -c dxlclient.config -i commands.ndjson \\
+        -o results.ndjson --max-in-flight 16 --rate 50
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+import argparse
+import io
+import json
+import logging
+import sys
+
+from .batch import BatchCommand, BatchExecutor
+from .concurrency import AdaptiveConcurrency
+from .deadline import Deadline
+
+# Configure local logger
+logger = logging.getLogger(__name__)
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m dxlepoclient",
+        description="Runs ePO remote commands from an NDJSON command file.")
+    parser.add_argument("-c", "--config", required=True,
+                        help="the DXL client configuration file")
+    parser.add_argument("-e", "--epo-unique-id",
+                        help="the unique identifier of the ePO server")
+    parser.add_argument("-i", "--input", default="-",
+                        help="the NDJSON command file ('-' for standard "
+                             "input, the default)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="the NDJSON result file ('-' for standard "
+                             "output, the default)")
+    parser.add_argument("-n", "--max-in-flight", type=int, default=8,
+                        help="the maximum number of outstanding commands "
+                             "(default: 8)")
+    parser.add_argument("-a", "--adaptive", action="store_true",
+                        help="adjust the number of outstanding commands "
+                             "(up to --max-in-flight) according to command "
+                             "latency and failures")
+    parser.add_argument("-r", "--rate", type=float,
+                        help="the maximum number of commands to start per "
+                             "second (default: unlimited)")
+    parser.add_argument("-d", "--deadline", type=float,
+                        help="the time budget (in seconds) for the whole run; "
+                             "commands not sent in time are dropped")
+    parser.add_argument("--unordered", action="store_true",
+                        help="write results as they complete instead of in "
+                             "the order of the commands")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="enable debug logging")
+    return parser.parse_args(argv)
+
+
+def read_commands(lines):
+    """
+    Parses NDJSON command specifications. Blank lines are skipped.
+
+    :param lines: An iterable of lines
+    :return: An iterator of :class:`dxlepoclient.batch.BatchCommand` objects
+    """
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield BatchCommand.from_dict(json.loads(line))
+        except Exception as ex:
+            raise Exception(
+                "Invalid command on line {0}: {1}".format(line_number, ex))
+
+
+def run_batch(epo_client, input_file, output_file, max_in_flight=8,
+              rate=None, ordered=True, deadline=None, adaptive=False):
+    """
+    Runs the commands from an NDJSON command file and writes the results to
+    an NDJSON result file.
+
+    :param epo_client: The :class:`dxlepoclient.client.EpoClient` to invoke
+        the commands through
+    :param input_file: The text file to read the commands from
+    :param output_file: The text file to write the results to
+    :param max_in_flight: (optional) The maximum number of outstanding
+        commands
+    :param rate: (optional) The maximum number of commands to start per
+        second
+    :param ordered: (optional) Whether results are written in the order of
+        the commands (``True``) or as they complete (``False``)
+    :param deadline: (optional) A :class:`dxlepoclient.deadline.Deadline`
+        for the whole run
+    :param adaptive: (optional) Whether the number of outstanding commands
+        is adjusted (up to ``max_in_flight``) by an
+        :class:`dxlepoclient.concurrency.AdaptiveConcurrency` controller
+    :return: The run summary (see
+        :attr:`dxlepoclient.batch.BatchExecutor.summary`)
+    """
+    concurrency = AdaptiveConcurrency(initial=1, maximum=max_in_flight) \
+        if adaptive else None
+    executor = BatchExecutor(epo_client, max_in_flight=max_in_flight,
+                             rate=rate, ordered=ordered,
+                             concurrency=concurrency)
+    for result in executor.run(read_commands(input_file), deadline):
+        output_file.write(u"{0}\n".format(json.dumps(result.to_dict())))
+    output_file.flush()
+    return executor.summary
+
+
+def format_summary(summary):
+    """
+    Formats a run summary for display.
+
+    :param summary: The run summary (``dict``)
+    :return: The formatted summary
+    """
+    def millis(value):
+        return "-" if value is None else "{0:.1f} ms".format(value * 1000)
+
+    ret = (
+        "{commands} commands ({succeeded} succeeded, {failed} failed) in "
+        "{elapsed:.2f} s, {commands_per_second:.1f} commands/s\n"
+        "latency: mean {mean}, p50 {p50}, p95 {p95}, p99 {p99}, "
+        "max {max}").format(
+            mean=millis(summary["latency_mean"]),
+            p50=millis(summary["latency_p50"]),
+            p95=millis(summary["latency_p95"]),
+            p99=millis(summary["latency_p99"]),
+            max=millis(summary["latency_max"]),
+            **summary)
+    if "concurrency_limit" in summary:
+        ret += "\nconcurrency limit: {0}".format(summary["concurrency_limit"])
+    return ret
+
+
+def _open_text(path, mode):
+    if path == "-":
+        return None
+    return io.open(path, mode, encoding="utf-8")
+
+
+def main(argv=None):
+    """
+    Entry point for ``python -m dxlepoclient``.
+
+    :param argv: (optional) The command line arguments
+    :return: The exit status (``0`` if all commands succeeded, ``1`` if any
+        command failed, or ``2`` if the run could not be completed)
+    """
+    args = _parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format="%(asctime)s %(name)s - %(levelname)s - %(message)s")
+
+    # The DXL libraries are only imported once the arguments are valid
+    from dxlclient.client import DxlClient
+    from dxlclient.client_config import DxlClientConfig
+    from .client import EpoClient
+
+    input_file = _open_text(args.input, "r")
+    output_file = _open_text(args.output, "w")
+    try:
+        config = DxlClientConfig.create_dxl_config_from_file(args.config)
+        with DxlClient(config) as dxl_client:
+            dxl_client.connect()
+            epo_client = EpoClient(dxl_client, args.epo_unique_id)
+            summary = run_batch(epo_client, input_file or sys.stdin,
+                                output_file or sys.stdout,
+                                max_in_flight=args.max_in_flight,
+                                rate=args.rate, ordered=not args.unordered,
+                                deadline=Deadline(args.deadline)
+                                if args.deadline else None,
+                                adaptive=args.adaptive)
+    except Exception as ex:  # pylint: disable=broad-except
+        logger.debug("Run failed", exc_info=True)
+        print("Error: {0}".format(ex), file=sys.stderr)
+        return 2
+    finally:
+        for opened in [input_file, output_file]:
+            if opened:
+                opened.close()
+
+    print(format_summary(summary), file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
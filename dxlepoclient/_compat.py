@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import sys
+import time
+
+PY2 = sys.version_info[0] < 3
+
+string_types = (basestring,) if PY2 else (str,)  # pylint: disable=invalid-name,undefined-variable
+integer_types = (int, long) if PY2 else (int,)  # pylint: disable=invalid-name,undefined-variable
+
+# Clock used for measuring elapsed time (``time.monotonic`` is not available
+# on Python 2)
+monotonic = getattr(time, "monotonic", time.time)  # pylint: disable=invalid-name
+
+try:
+    import queue  # pylint: disable=unused-import
+except ImportError:  # pragma: no cover
+    import Queue as queue  # pylint: disable=import-error,unused-import
+
+try:
+    import collections.abc as _abc
+except ImportError:  # pragma: no cover
+    import collections as _abc
+
+Sequence = _abc.Sequence  # pylint: disable=invalid-name
@@ -0,0 +1,570 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import functools
+import json
+import logging
+import threading
+
+from ._compat import monotonic, queue
+from .parsers import OutputFormat
+from .ratelimit import RateLimiter
+from .scheduler import Priority
+
+# Configure local logger
+logger = logging.getLogger(__name__)
+
+
+class BatchCommand(object):
+    """
+    A remote command to invoke as part of a batch (see
+    :class:`BatchExecutor`).
+    """
+
+    def __init__(self, command_name, params=None,
+                 output_format=OutputFormat.JSON, command_id=None):
+        """
+        Constructor parameters:
+
+        :param command_name: The name of the remote command to invoke
+        :param params: (optional) A dictionary (``dict``) containing the
+            parameters for the command
+        :param output_format: (optional) The output format for ePO to use
+            when returning the response
+        :param command_id: (optional) A caller-supplied identifier which is
+            copied to the :class:`BatchResult`
+        """
+        if not command_name:
+            raise Exception("A command name must be specified")
+        OutputFormat.validate(output_format)
+        self.command_name = command_name
+        self.params = params or {}
+        self.output_format = output_format
+        self.command_id = command_id
+
+    @staticmethod
+    def from_dict(spec):
+        """
+        Creates a command from a ``dict`` specification, as read from a line
+        of an NDJSON command file:
+
+        .. code-block:: json
+
+            {"id": "find-1", "command": "system.find",
+             "params": {"searchText": "mySystem"}, "output": "json"}
+
+        Only ``command`` is required.
+
+        :param spec: The command specification (``dict``)
+        :return: The :class:`BatchCommand`
+        """
+        if not isinstance(spec, dict):
+            raise Exception("Invalid command specification: {0}".format(spec))
+        return BatchCommand(spec.get("command"), spec.get("params"),
+                            spec.get("output", OutputFormat.JSON),
+                            spec.get("id"))
+
+
+class BatchResult(object):
+    """
+    The result of a remote command that was invoked as part of a batch.
+    """
+
+    def __init__(self, index, command, result=None, error=None, elapsed=0.0):
+        self._index = index
+        self._command = command
+        self._result = result
+        self._error = error
+        self._elapsed = elapsed
+
+    @property
+    def index(self):
+        """
+        The position of the command in the batch (starting at ``0``)
+        """
+        return self._index
+
+    @property
+    def command(self):
+        """
+        The :class:`BatchCommand` that was invoked
+        """
+        return self._command
+
+    @property
+    def result(self):
+        """
+        The result of the remote command (parsed for
+        :const:`OutputFormat.JSON`), or ``None`` if the command failed
+        """
+        return self._result
+
+    @property
+    def error(self):
+        """
+        The error message if the command failed, otherwise ``None``
+        """
+        return self._error
+
+    @property
+    def succeeded(self):
+        """
+        Whether the command succeeded
+        """
+        return self._error is None
+
+    @property
+    def elapsed(self):
+        """
+        The time (in seconds) it took to invoke the command
+        """
+        return self._elapsed
+
+    def to_dict(self):
+        """
+        Returns a ``dict`` representation of the result (as written to an
+        NDJSON result file).
+
+        :return: The result (``dict``)
+        """
+        ret = {
+            "index": self._index,
+            "command": self._command.command_name,
+            "ok": self.succeeded,
+            "elapsed": self._elapsed
+        }
+        if self._command.command_id is not None:
+            ret["id"] = self._command.command_id
+        if self.succeeded:
+            ret["result"] = self._result
+        else:
+            ret["error"] = self._error
+        return ret
+
+
+def _percentile(sorted_values, fraction):
+    """
+    Returns the nearest-rank percentile of a sorted list of values.
+    """
+    if not sorted_values:
+        return None
+    index = int(round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def _invoke_command(index, command, invoke):
+    """
+    Invokes a command of a batch.
+
+    :param index: The position of the command in the batch
+    :param command: The :class:`BatchCommand`
+    :param invoke: A callable which invokes the command and returns the
+        result of the remote command
+    :return: The :class:`BatchResult`
+    """
+    start = monotonic()
+    try:
+        res = invoke()
+        if command.output_format == OutputFormat.JSON:
+            res = json.loads(res)
+        return BatchResult(index, command, result=res,
+                           elapsed=monotonic() - start)
+    except Exception as ex:  # pylint: disable=broad-except
+        return BatchResult(index, command, error=str(ex),
+                           elapsed=monotonic() - start)
+
+
+class _BatchEnvelopeRunner(object):
+    """
+    Invokes the commands of batches, sending them in batch envelopes (a
+    single request containing a list of commands, answered by a single
+    response containing a result or error for each command) where the ePO
+    DXL service supports them, and one at a time otherwise (see
+    :func:`dxlepoclient.client.EpoClient.run_batch`).
+    """
+
+    # The key in a batch envelope request that contains the list of
+    # commands, and the key in the response that contains the list of
+    # results
+    COMMANDS_KEY = "commands"
+    RESULTS_KEY = "results"
+
+    # The error that services which do not support batch envelopes respond
+    # with, since they treat an envelope as a request without a command name
+    UNSUPPORTED_ERROR = "A command name was not specified"
+
+    def __init__(self, send_envelope, run_command):
+        """
+        Constructor parameters:
+
+        :param send_envelope: A callable which sends a batch envelope request
+            (``send_envelope(payload_dict, command_names, priority,
+            deadline)``). It returns ``None`` if batch envelopes cannot be
+            sent, or a tuple of the decoded response payload and the error
+            message (one of which is ``None``).
+        :param run_command: A callable which invokes a single command (with
+            the parameters of
+            :func:`dxlepoclient.client.EpoClient.run_command`)
+        """
+        self._send_envelope = send_envelope
+        self._run_command = run_command
+        # Whether the ePO DXL service accepts batch envelopes (``None`` until
+        # the first envelope is sent)
+        self.supported = None
+
+    def run(self, commands, priority, deadline, batch_size):
+        """
+        Invokes the commands, sending up to ``batch_size`` commands in each
+        batch envelope.
+
+        :return: A ``list`` containing a :class:`BatchResult` for each
+            command (in the order of the commands)
+        """
+        if batch_size < 1:
+            raise Exception("Batch size must be greater than 0")
+        commands = [command if isinstance(command, BatchCommand)
+                    else BatchCommand(*command) for command in commands]
+        results = []
+        for start in range(0, len(commands), batch_size):
+            chunk = commands[start:start + batch_size]
+            chunk_results = None
+            if self.supported is not False:
+                chunk_results = self._run_envelope(start, chunk, priority,
+                                                   deadline)
+            if chunk_results is None:
+                chunk_results = [
+                    _invoke_command(
+                        start + offset, command, functools.partial(
+                            self._run_command, command.command_name,
+                            command.params, command.output_format, priority,
+                            deadline))
+                    for offset, command in enumerate(chunk)]
+            results.extend(chunk_results)
+        return results
+
+    def _send(self, commands, priority, deadline):
+        """
+        Sends the commands in a batch envelope.
+
+        :return: The entry for each command in the response, or ``None`` if
+            the commands could not be sent in a batch envelope
+        """
+        payload_dict = {self.COMMANDS_KEY: [
+            {"command": command.command_name,
+             "output": command.output_format,
+             "params": command.params} for command in commands]}
+        sent = self._send_envelope(
+            payload_dict, [command.command_name for command in commands],
+            priority, deadline)
+        if sent is None:
+            return None
+        payload, error = sent
+        entries = None
+        if error is None:
+            try:
+                entries = json.loads(payload).get(self.RESULTS_KEY)
+            except (AttributeError, ValueError):
+                pass
+        if not isinstance(entries, list) or len(entries) != len(commands) or \
+                not all(isinstance(entry, dict) for entry in entries):
+            # Other errors (an unauthorized user, a failure in ePO, etc.) do
+            # not show whether envelopes are supported, so support is
+            # determined again by the next envelope
+            if self.supported or error is None or \
+                    self.UNSUPPORTED_ERROR not in error:
+                raise Exception(error or "Invalid batch envelope response")
+            logger.debug("Batch envelopes are not supported by the ePO DXL "
+                         "service")
+            self.supported = False
+            return None
+        self.supported = True
+        return entries
+
+    def _run_envelope(self, first_index, commands, priority, deadline):
+        """
+        Invokes the commands of a batch in a single batch envelope.
+
+        :return: A ``list`` of :class:`BatchResult` objects, or ``None`` if
+            the commands could not be sent in a batch envelope
+        """
+        start = monotonic()
+        try:
+            entries = self._send(commands, priority, deadline)
+        except Exception as ex:  # pylint: disable=broad-except
+            entries = [{"ok": False, "error": str(ex)}] * len(commands)
+        if entries is None:
+            return None
+        elapsed = monotonic() - start
+        return [self._entry_result(first_index + offset, command, entry,
+                                   elapsed)
+                for offset, (command, entry) in enumerate(zip(commands,
+                                                              entries))]
+
+    @staticmethod
+    def _entry_result(index, command, entry, elapsed):
+        """
+        Builds the result of a command from its entry in a batch envelope
+        response.
+        """
+        if not entry.get("ok"):
+            return BatchResult(index, command,
+                               error=entry.get("error") or "Error",
+                               elapsed=elapsed)
+        try:
+            result = entry.get("result")
+            if command.output_format == OutputFormat.JSON:
+                result = json.loads(result)
+            return BatchResult(index, command, result=result, elapsed=elapsed)
+        except Exception as ex:  # pylint: disable=broad-except
+            return BatchResult(index, command, error=str(ex), elapsed=elapsed)
+
+
+# Marks the end of the work queue
+_END = object()
+
+
+class BatchExecutor(object):
+    """
+    Invokes a large number of ePO remote commands concurrently through an
+    :class:`dxlepoclient.client.EpoClient`.
+
+    Up to ``max_in_flight`` commands are outstanding at once, optionally
+    limited to ``rate`` commands per second. Commands are read from the
+    supplied iterable as capacity becomes available, so arbitrarily large
+    batches can be run without being held in memory. Results are yielded in
+    the order of the commands or as they complete. At most
+    :const:`RESULT_WINDOW_FACTOR` times ``max_in_flight`` commands are read
+    ahead of the results that have been yielded, so a slow command at the
+    head of an ordered batch (or a slow consumer) stops the reading of
+    further commands rather than letting their results accumulate.
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            executor = BatchExecutor(epo_client, max_in_flight=16, rate=50)
+            for result in executor.run(
+                    BatchCommand("system.find", {"searchText": text})
+                    for text in search_texts):
+                print(result.to_dict())
+            print(executor.summary)
+    """
+
+    # The number of commands (as a multiple of the in-flight limit) that can
+    # be read ahead of the results that have been yielded
+    RESULT_WINDOW_FACTOR = 4
+
+    def __init__(self, epo_client, max_in_flight=8, rate=None, ordered=True,
+                 priority=Priority.BULK, concurrency=None):
+        """
+        Constructor parameters:
+
+        :param epo_client: The :class:`dxlepoclient.client.EpoClient` to
+            invoke the commands through
+        :param max_in_flight: (optional) The maximum number of commands that
+            are outstanding at once
+        :param rate: (optional) The maximum number of commands to start per
+            second
+        :param ordered: (optional) Whether results are yielded in the order
+            of the commands (``True``) or as they complete (``False``)
+        :param priority: (optional) The priority of the commands (see
+            :class:`dxlepoclient.scheduler.Priority`)
+        :param concurrency: (optional) A
+            :class:`dxlepoclient.concurrency.AdaptiveConcurrency` which
+            adjusts the number of outstanding commands according to their
+            latency and failures. If specified, ``max_in_flight`` is
+            ignored and up to the controller's maximum commands are
+            outstanding at once.
+        """
+        if concurrency:
+            max_in_flight = concurrency.maximum
+        if max_in_flight < 1:
+            raise Exception("Maximum in-flight commands must be greater than 0")
+        Priority.validate(priority)
+        self._epo_client = epo_client
+        self._max_in_flight = max_in_flight
+        self._rate_limiter = RateLimiter(rate) if rate else None
+        self._ordered = ordered
+        self._priority = priority
+        self._concurrency = concurrency
+        # The statistics of the most recent run
+        self._stats = {"latencies": [], "failed": 0, "elapsed": 0.0}
+
+    @property
+    def summary(self):
+        """
+        A ``dict`` containing throughput and latency statistics for the most
+        recent run:
+
+        * ``commands``: The number of commands that were invoked
+        * ``succeeded``: The number of commands that succeeded
+        * ``failed``: The number of commands that failed
+        * ``elapsed``: The duration (in seconds) of the run
+        * ``commands_per_second``: The command throughput
+        * ``latency_mean``, ``latency_p50``, ``latency_p95``,
+          ``latency_p99``, ``latency_max``: Command latency statistics (in
+          seconds)
+        * ``concurrency_limit``: The current limit of the ``concurrency``
+          controller (only if one was specified)
+        """
+        latencies = sorted(self._stats["latencies"])
+        count = len(latencies)
+        failed = self._stats["failed"]
+        elapsed = self._stats["elapsed"]
+        summary = {
+            "commands": count,
+            "succeeded": count - failed,
+            "failed": failed,
+            "elapsed": elapsed,
+            "commands_per_second": count / elapsed if elapsed else 0.0,
+            "latency_mean": sum(latencies) / count if count else None,
+            "latency_p50": _percentile(latencies, 0.5),
+            "latency_p95": _percentile(latencies, 0.95),
+            "latency_p99": _percentile(latencies, 0.99),
+            "latency_max": latencies[-1] if latencies else None
+        }
+        if self._concurrency:
+            summary["concurrency_limit"] = self._concurrency.limit
+        return summary
+
+    def _invoke(self, command, deadline):
+        # Commands that are still queued when the deadline passes are
+        # dropped without being sent
+        if deadline:
+            deadline.check()
+        # The rate limit is applied before a concurrency slot is taken, so
+        # that neither the wait for tokens nor a rejection is attributed to
+        # ePO by the concurrency controller
+        if self._rate_limiter:
+            self._rate_limiter.acquire(
+                timeout=deadline.remaining if deadline else None)
+        token = self._concurrency.acquire(deadline) \
+            if self._concurrency else None
+        try:
+            res = self._epo_client.run_command(
+                command.command_name, command.params, command.output_format,
+                self._priority, deadline)
+        except Exception:
+            if token is not None:
+                # Failures caused by the deadline do not indicate that ePO
+                # is overloaded
+                self._concurrency.release(
+                    token, failed=not (deadline and (deadline.cancelled or
+                                                     deadline.expired)))
+            raise
+        if token is not None:
+            self._concurrency.release(token)
+        return res
+
+    def _work(self, work_queue, result_queue, deadline):
+        while True:
+            item = work_queue.get()
+            if item is _END:
+                return
+            index, command = item
+            result_queue.put(_invoke_command(
+                index, command,
+                functools.partial(self._invoke, command, deadline)))
+
+    def _feed(self, commands, work_queue, result_queue, stop_event, deadline,
+              window):
+        count = 0
+        error = None
+        try:
+            for command in commands:
+                # Wait until the result of an earlier command is yielded
+                window.acquire()
+                if stop_event.is_set() or \
+                        (deadline and (deadline.cancelled or deadline.expired)):
+                    break
+                if isinstance(command, tuple):
+                    command = BatchCommand(*command)
+                work_queue.put((count, command))
+                count += 1
+        except Exception as ex:  # pylint: disable=broad-except
+            error = ex
+        finally:
+            for _ in range(self._max_in_flight):
+                work_queue.put(_END)
+            result_queue.put((_END, count, error))
+
+    def _start_threads(self, commands, result_queue, stop_event, deadline,
+                       window):
+        """
+        Starts the worker threads and the thread which feeds them commands.
+        """
+        # Holding the work queue to the in-flight limit means that commands
+        # are only read from the iterable as workers become available
+        work_queue = queue.Queue(self._max_in_flight)
+        threads = [threading.Thread(target=self._work,
+                                    args=(work_queue, result_queue, deadline))
+                   for _ in range(self._max_in_flight)]
+        threads.append(threading.Thread(
+            target=self._feed,
+            args=(commands, work_queue, result_queue, stop_event, deadline,
+                  window)))
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+    def run(self, commands, deadline=None):
+        """
+        Invokes the commands and yields their results.
+
+        :param commands: An iterable of :class:`BatchCommand` objects (or
+            ``(command_name, params)`` tuples)
+        :param deadline: (optional) A :class:`dxlepoclient.deadline.Deadline`
+            for the whole batch. Each command's wait for its response is
+            capped by the remaining time. Once the deadline expires (or is
+            cancelled), outstanding commands fail, commands that have been
+            read but not sent fail without being sent, and no further
+            commands are read from ``commands``.
+        :raise Exception: If reading a command from ``commands`` fails
+            (raised once the commands read before the failure have
+            completed).
+        :return: An iterator of :class:`BatchResult` objects
+        """
+        self._stats = {"latencies": [], "failed": 0, "elapsed": 0.0}
+        start = monotonic()
+        result_queue = queue.Queue()
+        stop_event = threading.Event()
+        window_size = self.RESULT_WINDOW_FACTOR * self._max_in_flight
+        window = threading.Semaphore(window_size)
+        self._start_threads(commands, result_queue, stop_event, deadline,
+                            window)
+
+        total = None
+        feed_error = None
+        received = 0
+        pending = {}
+        next_index = 0
+        try:
+            while total is None or received < total:
+                item = result_queue.get()
+                if isinstance(item, tuple):
+                    _, total, feed_error = item
+                    continue
+                received += 1
+                self._stats["latencies"].append(item.elapsed)
+                if not item.succeeded:
+                    self._stats["failed"] += 1
+                if not self._ordered:
+                    yield item
+                    window.release()
+                    continue
+                pending[item.index] = item
+                while next_index in pending:
+                    yield pending.pop(next_index)
+                    window.release()
+                    next_index += 1
+        finally:
+            stop_event.set()
+            # Unblock the feeder if the run ended early
+            for _ in range(window_size):
+                window.release()
+            self._stats["elapsed"] = monotonic() - start
+        if feed_error:
+            raise feed_error
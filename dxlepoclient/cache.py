@@ -0,0 +1,519 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import contextlib
+import hashlib
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # pylint: disable=invalid-name
+
+# The default time (in seconds) that a cached value remains valid
+DEFAULT_TTL = 60
+
+# Identifies a shared memory cache file (and the version of its layout)
+_MAGIC = b"DXLEPOC1"
+
+# File header: magic, number of slots, slot size
+_FILE_HEADER = struct.Struct("<8sII")
+
+# Slot header: key digest, expiry time (seconds since the epoch), value length
+_SLOT_HEADER = struct.Struct("<16sdI")
+
+# The number of consecutive slots searched for a key
+_PROBE_LENGTH = 8
+
+
+def _to_bytes(value):
+    return value.encode("utf-8") if not isinstance(value, bytes) else value
+
+
+class CacheBackend(object):
+    """
+    Base class for the caches used by :class:`dxlepoclient.client.EpoClient`
+    to store ePO service discovery results and command responses (see the
+    ``cache`` parameter of the client).
+
+    Keys are strings and values are ``bytes``. Each value expires after a
+    time-to-live (TTL); expired values are never returned.
+    """
+
+    def __init__(self, default_ttl=DEFAULT_TTL):
+        """
+        Constructor parameters:
+
+        :param default_ttl: (optional) The time (in seconds) that a value
+            remains valid when :func:`set` is called without a ``ttl``
+        """
+        if default_ttl <= 0:
+            raise Exception("Default TTL must be greater than 0")
+        self._default_ttl = default_ttl
+
+    @property
+    def default_ttl(self):
+        """
+        The time (in seconds) that a value remains valid when :func:`set` is
+        called without a ``ttl``
+        """
+        return self._default_ttl
+
+    def get(self, key):
+        """
+        Returns the value for a key.
+
+        :param key: The key (``str``)
+        :return: The value (``bytes``), or ``None`` if the key is not cached
+            or its value has expired
+        """
+        raise NotImplementedError()
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores the value for a key, replacing any existing value.
+
+        :param key: The key (``str``)
+        :param value: The value (``bytes``, or a ``str`` which is stored
+            UTF-8 encoded)
+        :param ttl: (optional) The time (in seconds) that the value remains
+            valid. Defaults to :attr:`default_ttl`.
+        :return: ``True`` if the value was stored, ``False`` if it could not
+            be (for example, because it is too large)
+        """
+        raise NotImplementedError()
+
+    def delete(self, key):
+        """
+        Removes the value for a key (if it is cached).
+
+        :param key: The key (``str``)
+        """
+        raise NotImplementedError()
+
+    def clear(self):
+        """
+        Removes all values from the cache.
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        Releases the resources held by the cache. The cached values are
+        not removed.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _CacheFile(object):
+    """
+    An open shared memory cache file and its memory map.
+    """
+
+    def __init__(self, path, slots, slot_size):
+        size = _FILE_HEADER.size + slots * slot_size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_size == 0:
+                    # Slots are zero (empty) in a newly created file
+                    os.ftruncate(fd, size)
+                    os.write(fd, _FILE_HEADER.pack(_MAGIC, slots, slot_size))
+                os.lseek(fd, 0, os.SEEK_SET)
+                header = _FILE_HEADER.unpack(
+                    os.read(fd, _FILE_HEADER.size).ljust(_FILE_HEADER.size,
+                                                         b"\0"))
+                if header != (_MAGIC, slots, slot_size):
+                    raise Exception(
+                        "Cache file has a different layout: " + path)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self.mmap = mmap.mmap(fd, size)
+        except Exception:
+            os.close(fd)
+            raise
+        self.fd = fd
+        # The process which opened the file
+        self.pid = os.getpid()
+
+    def close(self):
+        self.mmap.close()
+        os.close(self.fd)
+
+
+class SharedMemoryCache(CacheBackend):
+    """
+    A cache which is shared by all of the processes (and threads) that open
+    the same file, such as the pre-forked worker processes of a web server.
+    A value stored by one process is returned to every other process until
+    it expires, so ePO service discovery and cached command responses are
+    fetched once rather than once per process.
+
+    The cache is a fixed-size hash table in a memory-mapped file. The file
+    is divided into ``slots`` slots of ``slot_size`` bytes, each holding
+    one value (values that do not fit in a slot are not cached). When the
+    slots that a key can be stored in are full, the value which expires
+    soonest is evicted. Updates are made under an exclusive ``flock`` on the
+    file and reads under a shared one, so a value is never seen partially
+    written. The file is created when the cache is first opened; placing it
+    on a memory-backed file system (for example, ``/dev/shm``) avoids disk
+    writes.
+
+    A process which inherits an open cache through ``fork`` reopens the file
+    on first use, since a file lock does not exclude processes that share
+    the same open file.
+
+    This cache requires the ``fcntl`` module (it is not available on
+    Windows).
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            # Created before the worker processes are forked
+            cache = SharedMemoryCache("/dev/shm/dxlepoclient.cache")
+
+            # In each worker process
+            epo_client = EpoClient(dxl_client, cache=cache)
+            result = epo_client.run_command("system.find",
+                                            {"searchText": "mySystem"},
+                                            cache_ttl=30)
+    """
+
+    def __init__(self, path, slots=1024, slot_size=65536,
+                 default_ttl=DEFAULT_TTL):
+        """
+        Constructor parameters:
+
+        :param path: The path of the cache file
+        :param slots: (optional) The number of values that the cache can hold
+        :param slot_size: (optional) The size (in bytes) of each slot. The
+            largest value that can be cached is ``slot_size - 28`` bytes.
+        :param default_ttl: (optional) The time (in seconds) that a value
+            remains valid when :func:`set` is called without a ``ttl``
+        :raise Exception: If the file exists but was created with a
+            different number of slots or slot size.
+        """
+        super(SharedMemoryCache, self).__init__(default_ttl)
+        if fcntl is None:
+            raise Exception(
+                "SharedMemoryCache is not supported on this platform")
+        if slots < 1:
+            raise Exception("Slots must be greater than 0")
+        if slot_size <= _SLOT_HEADER.size:
+            raise Exception("Slot size must be greater than {0}".format(
+                _SLOT_HEADER.size))
+        self._path = path
+        self._slots = slots
+        self._slot_size = slot_size
+        self._lock = threading.Lock()
+        self._file = None
+        with self._lock:
+            self._open()
+
+    @property
+    def path(self):
+        """
+        The path of the cache file
+        """
+        return self._path
+
+    def _open(self):
+        self._close()
+        self._file = _CacheFile(self._path, self._slots, self._slot_size)
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @contextlib.contextmanager
+    def _locked(self, operation):
+        """
+        Holds the thread lock and a file lock while the memory map is used.
+        """
+        with self._lock:
+            if self._file is None:
+                raise Exception("Cache is closed")
+            if self._file.pid != os.getpid():
+                self._open()
+            fcntl.flock(self._file.fd, operation)
+            try:
+                yield self._file.mmap
+            finally:
+                fcntl.flock(self._file.fd, fcntl.LOCK_UN)
+
+    def _offsets(self, digest):
+        """
+        Returns the offsets of the slots in which a key can be stored.
+        """
+        start = struct.unpack("<Q", digest[:8])[0] % self._slots
+        return [_FILE_HEADER.size +
+                ((start + probe) % self._slots) * self._slot_size
+                for probe in range(min(_PROBE_LENGTH, self._slots))]
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.sha256(_to_bytes(key)).digest()[:16]
+
+    def get(self, key):
+        digest = self._digest(key)
+        with self._locked(fcntl.LOCK_SH) as shared:
+            for offset in self._offsets(digest):
+                slot_digest, expires, length = \
+                    _SLOT_HEADER.unpack_from(shared, offset)
+                if slot_digest == digest:
+                    if expires <= time.time():
+                        return None
+                    start = offset + _SLOT_HEADER.size
+                    return shared[start:start + length]
+        return None
+
+    def set(self, key, value, ttl=None):
+        value = _to_bytes(value)
+        if len(value) > self._slot_size - _SLOT_HEADER.size:
+            return False
+        digest = self._digest(key)
+        now = time.time()
+        with self._locked(fcntl.LOCK_EX) as shared:
+            target = None
+            target_expires = None
+            for offset in self._offsets(digest):
+                slot_digest, expires, _ = \
+                    _SLOT_HEADER.unpack_from(shared, offset)
+                if slot_digest == digest:
+                    target = offset
+                    break
+                # Prefer a free (or expired) slot, otherwise the slot whose
+                # value expires soonest
+                if expires <= now:
+                    expires = 0
+                if target is None or expires < target_expires:
+                    target = offset
+                    target_expires = expires
+            start = target + _SLOT_HEADER.size
+            shared[start:start + len(value)] = value
+            _SLOT_HEADER.pack_into(shared, target, digest,
+                                   now + (ttl or self._default_ttl),
+                                   len(value))
+        return True
+
+    def delete(self, key):
+        digest = self._digest(key)
+        with self._locked(fcntl.LOCK_EX) as shared:
+            for offset in self._offsets(digest):
+                if _SLOT_HEADER.unpack_from(shared, offset)[0] == digest:
+                    _SLOT_HEADER.pack_into(shared, offset, b"", 0, 0)
+                    return
+
+    def clear(self):
+        with self._locked(fcntl.LOCK_EX) as shared:
+            for slot in range(self._slots):
+                _SLOT_HEADER.pack_into(
+                    shared, _FILE_HEADER.size + slot * self._slot_size,
+                    b"", 0, 0)
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+class SqliteCache(CacheBackend):
+    """
+    A persistent cache stored in an SQLite database, so that cached values
+    survive process restarts (for example, ``core.help`` and inventory
+    responses are available as soon as a service is redeployed, instead of
+    being fetched from ePO again).
+
+    Each value is written in a transaction, so a value is never seen
+    partially written, even if the process is killed, and the database can
+    be shared by multiple processes. When the total size of the cached
+    values exceeds ``max_size``, expired values are removed, followed by the
+    least recently used values.
+
+    Values are read without taking the database write lock, so readers in
+    all processes run concurrently. The time that a value was last used is
+    only updated once it is more than ``access_resolution`` seconds old, so
+    most reads do not write to the database.
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            cache = SqliteCache("/var/cache/myservice")
+            epo_client = EpoClient(dxl_client, cache=cache)
+            print(epo_client.help(cache_ttl=24 * 60 * 60))
+    """
+
+    # The name of the database file in the cache directory
+    FILE_NAME = "dxlepoclient-cache.sqlite"
+
+    def __init__(self, directory, max_size=64 * 1024 * 1024,
+                 default_ttl=DEFAULT_TTL, access_resolution=60):
+        """
+        Constructor parameters:
+
+        :param directory: The directory to store the database file in. The
+            directory is created if it does not exist.
+        :param max_size: (optional) The maximum total size (in bytes) of the
+            cached values
+        :param default_ttl: (optional) The time (in seconds) that a value
+            remains valid when :func:`set` is called without a ``ttl``
+        :param access_resolution: (optional) The resolution (in seconds) of
+            the last use times that least recently used values are evicted
+            by
+        """
+        super(SqliteCache, self).__init__(default_ttl)
+        if max_size < 1:
+            raise Exception("Maximum size must be greater than 0")
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._path = os.path.join(directory, self.FILE_NAME)
+        self._max_size = max_size
+        self._access_resolution = access_resolution
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        with self._lock:
+            self._open()
+
+    @property
+    def path(self):
+        """
+        The path of the database file
+        """
+        return self._path
+
+    def _open(self):
+        self._close()
+        # Transactions are started explicitly
+        connection = sqlite3.connect(self._path, timeout=30,
+                                     isolation_level=None,
+                                     check_same_thread=False)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "expires REAL NOT NULL, accessed REAL NOT NULL, "
+                "size INTEGER NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed "
+                               "ON entries (accessed)")
+        except Exception:
+            connection.close()
+            raise
+        self._connection = connection
+        self._pid = os.getpid()
+
+    def _close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    @contextlib.contextmanager
+    def _transaction(self, write=True):
+        """
+        Holds the thread lock and a transaction while the database is used.
+        A write transaction takes the database write lock when it starts; a
+        read transaction does not block (and is not blocked by) writers.
+        """
+        with self._lock:
+            # SQLite connections cannot be used across a fork
+            if self._pid != os.getpid():
+                self._open()
+            elif self._connection is None:
+                raise Exception("Cache is closed")
+            connection = self._connection
+            connection.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                yield connection
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def get(self, key):
+        now = time.time()
+        with self._transaction(write=False) as connection:
+            row = connection.execute(
+                "SELECT value, expires, accessed FROM entries WHERE key = ?",
+                (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires, accessed = row
+        # The value may have been replaced since it was read, so the writes
+        # only apply to the value that was read
+        if expires <= now:
+            with self._transaction() as connection:
+                connection.execute(
+                    "DELETE FROM entries WHERE key = ? AND expires <= ?",
+                    (key, now))
+            return None
+        if now - accessed >= self._access_resolution:
+            with self._transaction() as connection:
+                connection.execute(
+                    "UPDATE entries SET accessed = ? "
+                    "WHERE key = ? AND accessed < ?", (now, key, now))
+        return bytes(value)
+
+    def set(self, key, value, ttl=None):
+        value = _to_bytes(value)
+        if len(value) > self._max_size:
+            return False
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, value, expires, accessed, size) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), now + (ttl or self._default_ttl),
+                 now, len(value)))
+            self._evict(connection, now)
+        return True
+
+    def _evict(self, connection, now):
+        """
+        Removes expired and then least recently used values until the total
+        size is within the maximum size.
+        """
+        total = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self._max_size:
+            return
+        connection.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+        total = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        keys = []
+        for key, size in connection.execute(
+                "SELECT key, size FROM entries ORDER BY accessed"):
+            if total <= self._max_size:
+                break
+            keys.append((key,))
+            total -= size
+        connection.executemany("DELETE FROM entries WHERE key = ?", keys)
+
+    def delete(self, key):
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM entries")
+
+    def close(self):
+        with self._lock:
+            self._close()
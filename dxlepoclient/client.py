@@ -4,51 +4,26 @@
 ################################################################################
 
 from __future__ import absolute_import
+import json
 import logging
 import os
-from dxlclient import Request, Message
+from dxlclient import Request, Message, Response
 from dxlbootstrap.client import Client
 from dxlbootstrap.util import MessageUtils
+from .batch import _BatchEnvelopeRunner
+from .deadline import deadline_request
+from .parsers import OutputFormat, project_json_array
+from .export import ExportFormat, DEFAULT_BUFFER_SIZE, export_records
+from .lazy import LazyResult
+from .ratelimit import _acquire_rate_limit
+from .scheduler import Priority
+from .spill import iter_response_records
+from .tracing import SpanAttribute, SpanName, get_tracer
 
 # Configure local logger
 logger = logging.getLogger(__name__)
 
 
-class OutputFormat(object):
-    """
-    Constants that are used to indicate the `output format` for ePO to use when responding to a
-    remote command invocation.
-
-        +---------+-------------------------------------------------------+
-        | Type    | Description                                           |
-        +=========+=======================================================+
-        | JSON    | JSON format                                           |
-        +---------+-------------------------------------------------------+
-        | XML     | XML format                                            |
-        +---------+-------------------------------------------------------+
-        | VERBOSE | Text-based format (verbose)                           |
-        +---------+-------------------------------------------------------+
-        | TERSE   | Text-based format (terse)                             |
-        +---------+-------------------------------------------------------+
-    """
-    JSON = "json"
-    XML = "xml"
-    VERBOSE = "verbose"
-    TERSE = "terse"
-
-    @staticmethod
-    def validate(output_format):
-        """
-        Validates that the specified format is valid (json, xml, etc.). If the format is not valid
-        an exception is thrown.
-
-        :param output_format: The output format
-        """
-        if output_format not in [OutputFormat.JSON, OutputFormat.XML,
-                                 OutputFormat.VERBOSE, OutputFormat.TERSE]:
-            raise Exception("Invalid output format: {0}".format(output_format))
-
-
 class EpoClient(Client):
     """
     This client provides a high level wrapper for invoking ePO remote commands
@@ -88,7 +63,16 @@ class EpoClient(Client):
     _DXL_EPO_COMMANDS_REQUEST_FORMAT = \
         "/mcafee/service/epo/command/{0}/remote/{1}"
 
-    def __init__(self, dxl_client, epo_unique_id=None):
+    # The command name reported for batch envelope requests (for tracing and
+    # diagnostics)
+    _BATCH_COMMAND_NAME = "(batch)"
+
+    # The default maximum number of commands in a batch envelope
+    DEFAULT_BATCH_SIZE = 20
+
+    def __init__(self, dxl_client, epo_unique_id=None, scheduler=None,
+                 service_monitor=None, cache=None, diagnostics=None,
+                 spill_threshold=None, spill_dir=None):
         """
 
         **ePO Unique Identifier**
@@ -113,14 +97,51 @@ class EpoClient(Client):
         Constructor parameters:
 
         :param dxl_client: The DXL client to use for communication with the ePO
-            DXL service
+            DXL service. A :class:`dxlepoclient.pool.DxlClientPool` can be
+            specified to spread requests across multiple DXL clients.
         :param epo_unique_id: (optional) The unique identifier used to specify
             the ePO server that this client will communicate with.
+        :param scheduler: (optional) The
+            :class:`dxlepoclient.scheduler.RequestScheduler` to dispatch
+            requests through, according to the ``priority`` passed to
+            :func:`run_command` (and the other command methods). A scheduler
+            can be shared by multiple clients.
+        :param service_monitor: (optional) A started
+            :class:`dxlepoclient.discovery.ServiceRegistryMonitor` whose live
+            map of services is used for service discovery (instead of
+            querying the DXL service registry when the client is created).
+            The client switches between the ePO "commands" and "remote"
+            services as they are registered and unregistered.
+        :param cache: (optional) The
+            :class:`dxlepoclient.cache.CacheBackend` to cache service
+            discovery results (for the cache's default TTL) and command
+            responses (when a ``cache_ttl`` is passed to :func:`run_command`
+            or :func:`iter_records`) in. A
+            :class:`dxlepoclient.cache.SharedMemoryCache` can be shared by
+            the clients in multiple processes, and a
+            :class:`dxlepoclient.cache.SqliteCache` persists cached
+            responses across restarts.
+        :param diagnostics: (optional) The
+            :class:`dxlepoclient.diagnostics.CallRecorder` to keep the
+            details of the most recent and the slowest remote command
+            invocations in.
+        :param spill_threshold: (optional) The payload size (in bytes)
+            above which responses that are parsed by :func:`iter_records`
+            (or :func:`export`) are spilled to a temporary file and parsed
+            from a memory map of the file (see
+            :class:`dxlepoclient.spill.SpilledPayload`).
+        :param spill_dir: (optional) The directory for spilled responses.
+            Defaults to the system temporary directory.
         :raise Exception: If a value is provided for `epo_unique_id` but
             no matching service is registered with the DXL fabric.
         """
         super(EpoClient, self).__init__(dxl_client)
-        self._dxl_client = dxl_client
+        self._scheduler = scheduler
+        self._cache = cache
+        self._diagnostics = diagnostics
+        # The payload size above which responses are spilled, and the
+        # directory to spill them to
+        self._spill_settings = (spill_threshold, spill_dir)
 
         # Need to be connected to the DXL fabric before making any service
         # registry queries
@@ -133,20 +154,36 @@ class EpoClient(Client):
         # (False) is used to make command requests
         self._use_epo_commands_service = True
 
-        if epo_unique_id:
-            logger.debug("Validating the ePO service identifier...")
-            self._use_epo_commands_service = \
-                self._is_epo_unique_id_for_commands_service(
-                    epo_unique_id, self._dxl_client, self._response_timeout)
+        self._batch_envelopes = _BatchEnvelopeRunner(
+            self._send_batch_envelope, self.run_command)
+
+        if service_monitor:
+            logger.debug("Using the service monitor for ePO service discovery...")
+            epo_ids = service_monitor.epo_unique_ids
+            if epo_unique_id and epo_unique_id not in epo_ids:
+                raise Exception("No ePO DXL services are registered with " +
+                                "the DXL fabric for id: " + epo_unique_id)
         else:
-            logger.debug("Attempting to find ePO service identifier...")
-            self._use_epo_commands_service, epo_ids = \
-                self._lookup_epo_unique_identifiers(self._dxl_client,
-                                                    self._response_timeout)
+            with get_tracer().start_span(
+                    SpanName.DISCOVERY,
+                    {SpanAttribute.EPO_UNIQUE_ID: epo_unique_id}):
+                if epo_unique_id:
+                    logger.debug("Validating the ePO service identifier...")
+                    self._use_epo_commands_service = \
+                        self._is_epo_unique_id_for_commands_service(
+                            epo_unique_id, self._dxl_client,
+                            self._response_timeout, cache)
+                else:
+                    logger.debug("Attempting to find ePO service identifier...")
+                    self._use_epo_commands_service, epo_ids = \
+                        self._lookup_epo_unique_identifiers(
+                            self._dxl_client, self._response_timeout, cache)
+
+        if not epo_unique_id:
             epo_ids_len = len(epo_ids)
-            if epo_ids_len is 1:
+            if epo_ids_len == 1:
                 epo_unique_id = next(iter(epo_ids))
-            elif epo_ids_len is 0:
+            elif epo_ids_len == 0:
                 raise Exception(
                     "No ePO DXL services are registered with the DXL fabric")
             else:
@@ -157,8 +194,31 @@ class EpoClient(Client):
 
         self._epo_unique_id = epo_unique_id
 
+        if service_monitor:
+            self._update_route(epo_unique_id,
+                               service_monitor.get_route(epo_unique_id))
+            service_monitor._add_client(self)  # pylint: disable=protected-access
+
+    def _update_route(self, epo_unique_id, route):
+        """
+        Invoked by a :class:`dxlepoclient.discovery.ServiceRegistryMonitor`
+        when the preferred route for an ePO server changes.
+
+        :param epo_unique_id: The unique identifier of the ePO server
+        :param route: The new route (``"commands"`` or ``"remote"``) or
+            ``None`` if no service is registered for the ePO server
+        """
+        if epo_unique_id != self._epo_unique_id:
+            return
+        if route is None:
+            logger.warning(
+                "No ePO DXL services are registered for id: %s", epo_unique_id)
+            return
+        self._use_epo_commands_service = route == "commands"
+
     def run_command(self, command_name, params=None,
-                    output_format=OutputFormat.JSON):
+                    output_format=OutputFormat.JSON, priority=Priority.NORMAL,
+                    deadline=None, fields=None, cache_ttl=None, lazy=False):
         """
         Invokes an ePO remote command on the ePO server this client is communicating with.
 
@@ -207,12 +267,330 @@ class EpoClient(Client):
             exception is raised if the command is to be sent to an ePO-hosted
             `DXL Commands` service and an `output format` of anything other
             than :const:`OutputFormat.JSON` is specified.
+        :param priority: (optional) The priority of the request. The list of
+            `priorities` can be found in the
+            :class:`dxlepoclient.scheduler.Priority` constants class. The
+            priority is only used if the client was created with a
+            :class:`dxlepoclient.scheduler.RequestScheduler`.
+        :param deadline: (optional) A :class:`dxlepoclient.deadline.Deadline`
+            which bounds the time spent waiting to send the request and for
+            its response. The request is not sent if the deadline has
+            expired or has been cancelled.
+        :raise Exception: If the deadline expires or is cancelled before the
+            response is received.
+        :param fields: (optional) A ``list`` of the fields to keep in each
+            record of the result. If specified, the result is returned as a
+            ``list`` of records (``dict``) rather than as a string, and the
+            other fields are dropped as the response is decoded. A result
+            that is not a JSON array is returned unchanged. Only supported
+            for :const:`OutputFormat.JSON`.
+        :param cache_ttl: (optional) If the client was created with a
+            ``cache``, the time (in seconds) to cache the response for. A
+            cached response for the same command, parameters and output
+            format is returned without sending a request. Responses are
+            only cached if this is specified, since commands may change
+            state on the ePO server.
+        :param lazy: (optional) If ``True``, a
+            :class:`dxlepoclient.lazy.LazyResult` is returned instead of a
+            string. Its records are only decoded when they are accessed,
+            which is cheaper when only the number of records or the first
+            few records are used. Only supported for
+            :const:`OutputFormat.JSON`.
         :return: The result of the remote command execution
         """
+        if lazy and output_format != OutputFormat.JSON:
+            raise Exception(
+                "Lazy results are only supported for output format: " +
+                OutputFormat.JSON)
+        if fields is not None and output_format != OutputFormat.JSON:
+            raise Exception(
+                "Fields can only be specified for output format: " +
+                OutputFormat.JSON)
+        res = self._send_command(command_name, params, output_format,
+                                 priority, deadline, cache_ttl)
+        if lazy:
+            self._check_response(res)
+            return LazyResult(res.payload, fields)
+        if fields is not None:
+            self._check_response(res)
+            records = project_json_array(res.payload, fields)
+            if records is not None:
+                return records
+        return self._decode_response(res)
+
+    def iter_records(self, command_name, params=None,
+                     output_format=OutputFormat.JSON,
+                     priority=Priority.NORMAL, deadline=None, fields=None,
+                     cache_ttl=None):
+        """
+        Invokes an ePO remote command on the ePO server this client is
+        communicating with and returns a generator which yields the records
+        contained in the result one at a time.
+
+        Unlike :func:`run_command`, the response payload is parsed
+        incrementally. The complete result is never materialized as a
+        decoded string or as a ``list`` of records, which keeps memory use
+        flat for very large results.
+
+        Records have the same shape for each `output format` (see
+        :mod:`dxlepoclient.parsers`). Values in records parsed from
+        :const:`OutputFormat.XML`, :const:`OutputFormat.VERBOSE` and
+        :const:`OutputFormat.TERSE` responses are strings.
+
+        **Example Usage**
+
+            .. code-block:: python
+
+                # Iterate over the results of the system find command
+                for system in epo_client.iter_records(
+                        "system.find", {"searchText": "mySystem"}):
+                    print(system["EPOComputerProperties.ComputerName"])
+
+        :param command_name: The name of the remote command to invoke
+        :param params: (optional) A dictionary (``dict``) containing the
+            parameters for the command
+        :param output_format: (optional) The output format for ePO to use when
+            returning the response (see :func:`run_command`)
+        :param priority: (optional) The priority of the request (see
+            :func:`run_command`)
+        :param deadline: (optional) A :class:`dxlepoclient.deadline.Deadline`
+            for the request (see :func:`run_command`)
+        :param fields: (optional) A ``list`` of the fields to keep in each
+            record. The other fields are dropped while each record is
+            decoded (before a ``dict`` is built for it), so decoding cost
+            and memory use scale with the number of fields that are kept.
+        :param cache_ttl: (optional) The time (in seconds) to cache the
+            response for (see :func:`run_command`)
+        :raise Exception: If an unsupported `output format` is specified or
+            if an error response is received from the ePO DXL service.
+        :return: A generator which yields each of the records in the result
+            of the remote command execution. If the result is a JSON array,
+            each element of the array is yielded. Otherwise, the result is
+            yielded as a single record.
+        """
+        res = self._send_command(command_name, params, output_format,
+                                 priority, deadline, cache_ttl)
+        self._check_response(res)
+        return iter_response_records(res, output_format, fields,
+                                     *self._spill_settings)
+
+    def export(self, command_name, params, path,
+               fmt=ExportFormat.NDJSON, fields=None,
+               buffer_size=DEFAULT_BUFFER_SIZE, priority=Priority.NORMAL,
+               output_format=OutputFormat.JSON, deadline=None):
+        """
+        Invokes an ePO remote command on the ePO server this client is
+        communicating with and streams the records contained in the result
+        to a file.
+
+        Records are parsed from the response payload and written to the file
+        one at a time through a fixed-size write buffer (see
+        :func:`iter_records`), so memory use does not grow with the size of
+        the result.
+
+        **Example Usage**
+
+            .. code-block:: python
+
+                # Export the results of the system find command
+                result = epo_client.export(
+                    "system.find", {"searchText": ""}, "systems.csv",
+                    fmt=ExportFormat.CSV,
+                    fields=["EPOComputerProperties.ComputerName",
+                            "EPOLeafNode.AgentGUID"])
+                print(result.rows_written, result.rows_per_second)
+
+        :param command_name: The name of the remote command to invoke
+        :param params: A dictionary (``dict``) containing the parameters for
+            the command (or ``None``)
+        :param path: The path of the file to write
+        :param fmt: (optional) The format of the file. The list of
+            `export formats` can be found in the
+            :class:`dxlepoclient.export.ExportFormat` constants class.
+        :param fields: (optional) A ``list`` of field names to write for each
+            record. If not specified, all fields are written. The other
+            fields are dropped as the response is decoded.
+        :param buffer_size: (optional) The size (in bytes) of the write buffer
+        :param priority: (optional) The priority of the request (see
+            :func:`run_command`)
+        :param output_format: (optional) The output format for ePO to use when
+            returning the response (see :func:`iter_records`)
+        :param deadline: (optional) A :class:`dxlepoclient.deadline.Deadline`
+            for the request (see :func:`run_command`)
+        :raise Exception: If an unsupported `export format` is specified or
+            if an error response is received from the ePO DXL service.
+        :return: A :class:`dxlepoclient.export.ExportResult` containing the
+            number of rows written and the throughput of the export
+        """
+        ExportFormat.validate(fmt)
+        return export_records(self.iter_records(command_name, params,
+                                                output_format, priority,
+                                                deadline, fields),
+                              path, export_format=fmt, fields=fields,
+                              buffer_size=buffer_size)
+
+    def run_batch(self, commands, priority=Priority.NORMAL, deadline=None,
+                  batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Invokes a list of ePO remote commands on the ePO server this client
+        is communicating with, sending up to ``batch_size`` commands in each
+        DXL request.
+
+        When the ePO DXL "remote" service is in use, the commands are sent
+        in batch envelopes (one request and one response for each batch),
+        which saves a broker round-trip per command. If the service does not
+        support envelopes (or the "commands" service is in use), the
+        commands are invoked one at a time.
+
+        **Example Usage**
+
+            .. code-block:: python
+
+                results = epo_client.run_batch(
+                    [BatchCommand("system.find", {"searchText": name})
+                     for name in system_names])
+                for result in results:
+                    print(result.command.params, result.result or result.error)
+
+        :param commands: A ``list`` of
+            :class:`dxlepoclient.batch.BatchCommand` objects (or
+            ``(command_name, params)`` tuples)
+        :param priority: (optional) The priority of the requests (see
+            :func:`run_command`)
+        :param deadline: (optional) A :class:`dxlepoclient.deadline.Deadline`
+            for the requests (see :func:`run_command`)
+        :param batch_size: (optional) The maximum number of commands in a
+            batch envelope
+        :return: A ``list`` containing a
+            :class:`dxlepoclient.batch.BatchResult` for each command (in the
+            order of the commands). Results are parsed for
+            :const:`OutputFormat.JSON`. A command that fails (including
+            when its request fails) has an ``error`` rather than raising an
+            exception.
+        """
+        return self._batch_envelopes.run(commands, priority, deadline,
+                                         batch_size)
+
+    def _send_batch_envelope(self, payload_dict, command_names, priority,
+                             deadline):
+        """
+        Sends a batch envelope request to the ePO DXL "remote" service (see
+        :func:`run_batch`).
+
+        :return: ``None`` if the ePO DXL "commands" service is in use (it
+            does not accept batch envelopes), otherwise a tuple of the
+            decoded response payload (or ``None``) and the error message of
+            an error response (or ``None``)
+        """
+        if self._use_epo_commands_service:
+            return None
+        with self._start_command_span(self._BATCH_COMMAND_NAME,
+                                      command_names, None) as span:
+            span.set_attribute(SpanAttribute.ROUTE, "remote")
+            res = self._dispatch(
+                priority, deadline, self._invoke_epo_service,
+                self._DXL_EPO_REMOTE_REQUEST_FORMAT.format(
+                    self._epo_unique_id), payload_dict, deadline, span,
+                len(command_names))
+        try:
+            return self._decode_response(res), None
+        except Exception as ex:  # pylint: disable=broad-except
+            return None, str(ex)
+
+    def _dispatch(self, priority, deadline, invoke, *args):
+        """
+        Calls ``invoke`` with the specified arguments in a slot of the
+        request scheduler (if the client was created with one).
+
+        :return: The return value of ``invoke``
+        """
+        if not self._scheduler:
+            return invoke(*args)
+        with self._scheduler.slot(priority, deadline):
+            return invoke(*args)
+
+    def _send_command(self, command_name, params, output_format,
+                      priority=Priority.NORMAL, deadline=None, cache_ttl=None):
+        """
+        Sends a request to invoke an ePO remote command to the appropriate
+        ePO DXL service.
+
+        :param command_name: The name of the remote command to invoke
+        :param params: A dictionary (``dict``) containing the parameters for
+            the command (or ``None``)
+        :param output_format: The output format for ePO to use when returning
+            the response
+        :param priority: (optional) The priority of the request
+        :param deadline: (optional) The deadline for the request
+        :param cache_ttl: (optional) The time (in seconds) to cache the
+            response for
+        :return: A DXL Response object containing the result of the remote
+            command execution
+        """
         OutputFormat.validate(output_format)
+        Priority.validate(priority)
         if params is None:
             params = {}
 
+        with self._start_command_span(command_name, params,
+                                      output_format) as span:
+            cache_key = None
+            if self._cache and cache_ttl:
+                cache_key = "command:{0}:{1}:{2}:{3}".format(
+                    self._epo_unique_id, command_name, output_format,
+                    json.dumps(params, sort_keys=True))
+                payload = self._cache.get(cache_key)
+                if payload is not None:
+                    span.set_attribute(SpanAttribute.ROUTE, "cache")
+                    span.set_attribute(SpanAttribute.RESPONSE_SIZE,
+                                       len(payload))
+                    res = Response(None)
+                    res.payload = payload
+                    return res
+
+            res = self._dispatch(priority, deadline, self._invoke_command,
+                                 command_name, params, output_format,
+                                 deadline, span)
+
+            if cache_key and res.message_type != Message.MESSAGE_TYPE_ERROR:
+                self._cache.set(cache_key, res.payload, cache_ttl)
+            return res
+
+    def _start_command_span(self, command_name, params, output_format):
+        """
+        Starts the tracing span for a command invocation (recorded by the
+        diagnostics recorder, if one is set).
+
+        :param command_name: The name of the remote command
+        :param params: The parameters for the command
+        :param output_format: The output format for the command
+        :return: The :class:`dxlepoclient.tracing.Span`
+        """
+        span = get_tracer().start_span(SpanName.COMMAND, {
+            SpanAttribute.EPO_UNIQUE_ID: self._epo_unique_id,
+            SpanAttribute.COMMAND: command_name,
+            SpanAttribute.OUTPUT_FORMAT: output_format})
+        if self._diagnostics:
+            span = self._diagnostics._wrap_span(  # pylint: disable=protected-access
+                span, self._epo_unique_id, command_name, params, output_format)
+        return span
+
+    def _invoke_command(self, command_name, params, output_format,
+                        deadline=None, span=None):
+        """
+        Invokes an ePO remote command through the ePO DXL "commands" or
+        "remote" service.
+
+        :param command_name: The name of the remote command to invoke
+        :param params: A dictionary (``dict``) containing the parameters for
+            the command
+        :param output_format: The output format for ePO to use when returning
+            the response
+        :param deadline: (optional) The deadline for the request
+        :param span: (optional) The tracing span for the command
+        :return: A DXL Response object containing the result of the remote
+            command execution
+        """
         # Try the request through the `commands` service first. If that fails
         # due to the service not being found, try the request again through
         # the `remote` service. Update the `_use_epo_commands_service`
@@ -222,16 +600,12 @@ class EpoClient(Client):
         # since the `commands` service only supports JSON.
         if self._use_epo_commands_service and \
                 output_format == OutputFormat.JSON:
-            res = self._invoke_epo_commands_service(
-                command_name, output_format, params)
-        else:
-            res = self._invoke_epo_remote_service(
-                command_name, output_format, params
-            )
+            return self._invoke_epo_commands_service(
+                command_name, output_format, params, deadline, span)
+        return self._invoke_epo_remote_service(
+            command_name, output_format, params, deadline, span)
 
-        return self._decode_response(res)
-
-    def help(self, output_format=OutputFormat.VERBOSE):
+    def help(self, output_format=OutputFormat.VERBOSE, cache_ttl=None):
         # pylint: disable=line-too-long
         """
         Returns the list of remote commands that are supported by the ePO server this client is
@@ -272,19 +646,23 @@ class EpoClient(Client):
             `DXL Commands` service and an `output format` of anything other
             than :const:`OutputFormat.VERBOSE` or :const:`OutputFormat.JSON`
             is specified.
+        :param cache_ttl: (optional) The time (in seconds) to cache the
+            response for (see :func:`run_command`)
         :return: The result of the remote command execution
         """
         res = self.run_command(
             "core.help",
             output_format=OutputFormat.JSON \
-                if output_format == OutputFormat.VERBOSE else output_format)
+                if output_format == OutputFormat.VERBOSE else output_format,
+            cache_ttl=cache_ttl)
         if output_format == OutputFormat.VERBOSE:
             res_list = MessageUtils.json_to_dict(res)
             res = os.linesep.join(res_list)
         return res
 
     def _invoke_epo_commands_service(self, command_name,
-                                     output_format, params):
+                                     output_format, params, deadline=None,
+                                     span=None):
         """
         Invokes the ePO DXL "commands" service for the purposes of executing a
         remote command.
@@ -294,9 +672,13 @@ class EpoClient(Client):
             the response
         :param params: A dictionary (``dict``) containing the parameters for
             the command
+        :param deadline: (optional) The deadline for the request
+        :param span: (optional) The tracing span for the command
         :return: A DXL Response object containing the result of the remote
             command execution
         """
+        if span:
+            span.set_attribute(SpanAttribute.ROUTE, "commands")
         if output_format != OutputFormat.JSON:
             raise Exception(
                 "Invalid output format: " + output_format +
@@ -308,10 +690,13 @@ class EpoClient(Client):
                 self._epo_unique_id,
                 command_name.replace(".", "/")
             ),
-            params
+            params,
+            deadline,
+            span
         )
 
-    def _invoke_epo_remote_service(self, command_name, output_format, params):
+    def _invoke_epo_remote_service(self, command_name, output_format, params,
+                                   deadline=None, span=None):
         """
         Invokes the ePO DXL "remote" service for the purposes of executing a
         remote command.
@@ -321,19 +706,26 @@ class EpoClient(Client):
             the response
         :param params: A dictionary (``dict``) containing the parameters for
             the command
+        :param deadline: (optional) The deadline for the request
+        :param span: (optional) The tracing span for the command
         :return: A DXL Response object containing the result of the remote
             command execution
         """
+        if span:
+            span.set_attribute(SpanAttribute.ROUTE, "remote")
         return self._invoke_epo_service(
             self._DXL_EPO_REMOTE_REQUEST_FORMAT.format(self._epo_unique_id),
             {
                 "command": command_name,
                 "output": output_format,
                 "params": params
-            }
+            },
+            deadline,
+            span
         )
 
-    def _invoke_epo_service(self, request_topic, payload_dict):
+    def _invoke_epo_service(self, request_topic, payload_dict, deadline=None,
+                            span=None, commands=1):
         """
         Invokes the ePO DXL service for the purposes of executing a remote
         command.
@@ -341,17 +733,38 @@ class EpoClient(Client):
         :param request_topic: DXL request topic to use for the request
         :param payload_dict: The dictionary (``dict``) to use as the payload
           of the DXL request
+        :param deadline: (optional) The deadline for the request
+        :param span: (optional) The tracing span for the command
+        :param commands: (optional) The number of commands in the request
+            (one rate limit token is acquired for each)
         :return: A DXL Response object containing the result of the remote
             command execution
+        :raise Exception: If the request is rejected by the rate limit for
+            the ePO server (see :func:`dxlepoclient.ratelimit.set_rate_limit`)
+            or if the deadline expires or is cancelled.
         """
-        return self._sync_request(
-            self._dxl_client,
-            Request(request_topic),
-            self.response_timeout,
-            payload_dict)
+        _acquire_rate_limit(self._epo_unique_id, deadline, commands)
+
+        request = Request(request_topic)
+        if span:
+            span.set_attribute(SpanAttribute.MESSAGE_ID, request.message_id)
+
+        res = self._sync_request(self._dxl_client, request,
+                                 self.response_timeout, payload_dict, deadline)
+
+        if span:
+            span.set_attribute(SpanAttribute.REQUEST_SIZE,
+                               len(request.payload))
+            span.set_attribute(SpanAttribute.RESPONSE_SIZE,
+                               len(res.payload or b""))
+            if res.message_type == Message.MESSAGE_TYPE_ERROR:
+                span.set_attribute(SpanAttribute.ERROR_CODE, res.error_code)
+                span.record_error(Exception(res.error_message))
+        return res
 
     @staticmethod
-    def _sync_request(dxl_client, request, response_timeout, payload_dict):
+    def _sync_request(dxl_client, request, response_timeout, payload_dict,
+                      deadline=None):
         """
         Performs a synchronous DXL request and returns the payload
 
@@ -359,6 +772,8 @@ class EpoClient(Client):
         :param request: The DXL request to send
         :param response_timeout: The maximum amount of time to wait for a response
         :param payload_dict: The dictionary (``dict``) to use as the payload of the DXL request
+        :param deadline: (optional) The deadline for the request (see
+            :func:`dxlepoclient.deadline.deadline_request`)
         :return: The result of the remote command execution (resulting payload)
         """
         # Set the payload
@@ -370,8 +785,23 @@ class EpoClient(Client):
                                                pretty_print=True))
 
         # Send the request and wait for a response (synchronous)
+        if deadline:
+            return deadline_request(dxl_client, request, response_timeout,
+                                    deadline)
         return dxl_client.sync_request(request, timeout=response_timeout)
 
+    @staticmethod
+    def _check_response(res):
+        """
+        Raises an exception if the DXL Response object is an ErrorResponse.
+
+        :param res: The DXL Response object to check.
+        :raise Exception: If ``res`` is an ErrorResponse.
+        """
+        if res.message_type == Message.MESSAGE_TYPE_ERROR:
+            raise Exception("Error: " + res.error_message + " (" + str(
+                res.error_code) + ")")
+
     @staticmethod
     def _decode_response(res):
         """
@@ -381,9 +811,7 @@ class EpoClient(Client):
         :return: The decoded payload.
         :raise Exception: If ``res`` is an ErrorResponse.
         """
-        if res.message_type == Message.MESSAGE_TYPE_ERROR:
-            raise Exception("Error: " + res.error_message + " (" + str(
-                res.error_code) + ")")
+        EpoClient._check_response(res)
 
         # Return a dictionary corresponding to the response payload
         ret_val = MessageUtils.decode_payload(res)
@@ -393,7 +821,8 @@ class EpoClient(Client):
         return ret_val
 
     @staticmethod
-    def _query_service_registry(dxl_client, response_timeout, service_type):
+    def _query_service_registry(dxl_client, response_timeout, service_type,
+                                cache=None):
         """
         Queries the broker service registry for services.
 
@@ -401,21 +830,34 @@ class EpoClient(Client):
         :param response_timeout: The maximum amount of time to wait for a
             response.
         :param service_type: The service type to return data for.
+        :param cache: (optional) The cache to return the previous response
+            from (if it has not expired) or to store the response in.
         :return: A ``list`` containing info for each registered service whose
             ``service_type`` matches the ``service_type`` parameter passed
             into this method.
         """
-        res = EpoClient._decode_response(
-            EpoClient._sync_request(
-                dxl_client,
-                Request("/mcafee/service/dxl/svcregistry/query"),
-                response_timeout,
-                {"serviceType": service_type}))
+        with get_tracer().start_span(SpanName.REGISTRY_QUERY, {
+                SpanAttribute.SERVICE_TYPE: service_type}) as span:
+            cache_key = "svcregistry:" + service_type
+            res = cache.get(cache_key) if cache else None
+            span.set_attribute(SpanAttribute.CACHE_HIT, res is not None)
+            if res is None:
+                res = EpoClient._decode_response(
+                    EpoClient._sync_request(
+                        dxl_client,
+                        Request("/mcafee/service/dxl/svcregistry/query"),
+                        response_timeout,
+                        {"serviceType": service_type}))
+                if cache:
+                    cache.set(cache_key, res)
+            else:
+                res = res.decode("utf-8")
         res_dict = MessageUtils.json_to_dict(res)
         return res_dict["services"].values() if "services" in res_dict else []
 
     @staticmethod
-    def _lookup_epo_commands_service_unique_ids(dxl_client, response_timeout):
+    def _lookup_epo_commands_service_unique_ids(dxl_client, response_timeout,
+                                                cache=None):
         """
         Returns a ``set`` containing the unique identifiers for the ePO servers
         that are currently exposed to the DXL fabric via an ePO "commands"
@@ -425,12 +867,13 @@ class EpoClient(Client):
         :param dxl_client: The DXL client with which to perform the request.
         :param response_timeout: The maximum amount of time to wait for a
             response.
+        :param cache: (optional) The cache for service registry responses.
         :return: A ``set`` containing the unique identifiers for the ePO
             servers that are currently exposed to the DXL fabric.
         """
         services = EpoClient._query_service_registry(
             dxl_client, response_timeout,
-            EpoClient._DXL_EPO_COMMANDS_SERVICE_TYPE)
+            EpoClient._DXL_EPO_COMMANDS_SERVICE_TYPE, cache)
         ret_ids = set()
         for service in services:
             if "metaData" in service:
@@ -440,7 +883,8 @@ class EpoClient(Client):
         return ret_ids
 
     @staticmethod
-    def _lookup_epo_remote_service_unique_ids(dxl_client, response_timeout):
+    def _lookup_epo_remote_service_unique_ids(dxl_client, response_timeout,
+                                              cache=None):
         """
         Returns a ``set`` containing the unique identifiers for the ePO servers
         that are currently exposed to the DXL fabric via an ePO "remote"
@@ -450,12 +894,13 @@ class EpoClient(Client):
         :param dxl_client: The DXL client with which to perform the request.
         :param response_timeout: The maximum amount of time to wait for a
             response.
+        :param cache: (optional) The cache for service registry responses.
         :return: A ``set`` containing the unique identifiers for the ePO
             servers that are currently exposed to the DXL fabric.
         """
         services = EpoClient._query_service_registry(
             dxl_client, response_timeout,
-            EpoClient.DXL_SERVICE_TYPE)
+            EpoClient.DXL_SERVICE_TYPE, cache)
         ret_ids = set()
         for service in services:
             if "requestChannels" in service:
@@ -471,7 +916,7 @@ class EpoClient(Client):
     @staticmethod
     def _is_epo_unique_id_for_commands_service(
             epo_unique_id, dxl_client,
-            response_timeout=Client._DEFAULT_RESPONSE_TIMEOUT):
+            response_timeout=Client._DEFAULT_RESPONSE_TIMEOUT, cache=None):
         """
         Determines if the supplied ``epoUniqueId`` maps to a ePO DXL
         "commands" or a "remote" service.
@@ -482,6 +927,7 @@ class EpoClient(Client):
             DXL service
         :param response_timeout: (optional) The maximum amount of time to wait
             for a response
+        :param cache: (optional) The cache for service registry responses
         :return: ``True`` if the unique identifier matches a "commands"
             service, ``False`` if the unique identifier matches a "remote"
             service.
@@ -491,10 +937,10 @@ class EpoClient(Client):
         id_for_commands_service = False
         if epo_unique_id not in \
                 EpoClient._lookup_epo_remote_service_unique_ids(
-                        dxl_client, response_timeout):
+                        dxl_client, response_timeout, cache):
             if epo_unique_id in \
                     EpoClient._lookup_epo_commands_service_unique_ids(
-                            dxl_client, response_timeout):
+                            dxl_client, response_timeout, cache):
                 id_for_commands_service = True
             else:
                 raise Exception("No ePO DXL services are registered with " +
@@ -502,7 +948,8 @@ class EpoClient(Client):
         return id_for_commands_service
 
     @staticmethod
-    def _lookup_epo_unique_identifiers(dxl_client, response_timeout):
+    def _lookup_epo_unique_identifiers(dxl_client, response_timeout,
+                                       cache=None):
         """
         Returns a ``tuple`` where the first item is a ``bool`` representing
         whether the returned ids are for "commands" services (``True``) or
@@ -513,6 +960,7 @@ class EpoClient(Client):
         :param dxl_client: The DXL client with which to perform the request
         :param response_timeout: (optional) The maximum amount of time to wait
             for a response
+        :param cache: (optional) The cache for service registry responses
         :return: A ``tuple`` where the first item is a ``bool`` representing
             whether a "commands" service (``True``) or "remote" service
             (``False``) should be used. If at least one "remote" service is
@@ -522,24 +970,30 @@ class EpoClient(Client):
         """
         epo_remote_service_ids = \
             EpoClient._lookup_epo_remote_service_unique_ids(dxl_client,
-                                                            response_timeout)
+                                                            response_timeout,
+                                                            cache)
         epo_command_service_ids = \
             EpoClient._lookup_epo_commands_service_unique_ids(dxl_client,
-                                                              response_timeout)
+                                                              response_timeout,
+                                                              cache)
         return not epo_remote_service_ids, \
             epo_command_service_ids.union(epo_remote_service_ids)
 
     @staticmethod
     def lookup_epo_unique_identifiers(
-            dxl_client, response_timeout=Client._DEFAULT_RESPONSE_TIMEOUT):
+            dxl_client, response_timeout=Client._DEFAULT_RESPONSE_TIMEOUT,
+            cache=None):
         """
         Returns a ``set`` containing the unique identifiers for the ePO servers that are currently
         exposed to the DXL fabric
 
         :param dxl_client: The DXL client with which to perform the request
         :param response_timeout: (optional) The maximum amount of time to wait for a response
+        :param cache: (optional) A :class:`dxlepoclient.cache.CacheBackend`
+            to return the results of a previous lookup from (until they
+            expire) or to store the results in
         :return: A ``set`` containing the unique identifiers for the ePO servers that are currently
             exposed to the DXL fabric.
         """
         return EpoClient._lookup_epo_unique_identifiers(
-            dxl_client, response_timeout)[1]
+            dxl_client, response_timeout, cache)[1]
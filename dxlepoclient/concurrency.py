@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import collections
+import logging
+import threading
+
+from ._compat import monotonic
+from .deadline import _wait, _wake_on_cancel
+
+# Configure local logger
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveConcurrency(object):
+    """
+    Limits the number of requests in flight, adjusting the limit with an
+    additive-increase/multiplicative-decrease (AIMD) rule (see the
+    ``concurrency`` parameter of
+    :class:`dxlepoclient.batch.BatchExecutor`).
+
+    Each request that completes successfully within ``target_latency``
+    raises the limit by ``increase / limit``, so the limit grows by about
+    ``increase`` for each limit's worth of fast requests. A request that
+    succeeds but exceeds ``target_latency`` leaves the limit unchanged. A
+    request that fails (a response timeout or a DXL error response) cuts the
+    limit by the factor ``decrease``. Requests that were already in flight
+    when the limit was cut do not cut it again, so a burst of failures
+    caused by the same overload results in a single decrease.
+
+    Instances are thread-safe.
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            concurrency = AdaptiveConcurrency(initial=4, maximum=64,
+                                              target_latency=2.0)
+            executor = BatchExecutor(epo_client, concurrency=concurrency)
+            for result in executor.run(commands):
+                ...
+            print(concurrency.metrics)
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, target_latency=1.0,
+                 increase=1.0, decrease=0.5, history_size=1000):
+        """
+        Constructor parameters:
+
+        :param initial: (optional) The initial limit
+        :param minimum: (optional) The lowest value of the limit
+        :param maximum: (optional) The highest value of the limit
+        :param target_latency: (optional) The latency (in seconds) under
+            which successful requests raise the limit
+        :param increase: (optional) The amount by which the limit grows for
+            each limit's worth of successful requests
+        :param decrease: (optional) The factor by which the limit is
+            multiplied when a request fails (between ``0`` and ``1``)
+        :param history_size: (optional) The number of limit changes that are
+            kept in the :attr:`metrics` history
+        """
+        self._rule = _AimdRule(minimum, maximum, target_latency, increase,
+                               decrease)
+        if not minimum <= initial <= maximum:
+            raise Exception("Initial limit must be between the minimum and "
+                            "maximum")
+        self._limit = float(initial)
+        self._in_flight = 0
+        # The number of times the limit was raised and cut
+        self._counts = {"increases": 0, "decreases": 0}
+        # The time of the last decrease
+        self._last_decrease = None
+        self._history = _LimitHistory(initial, history_size)
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self):
+        """
+        The current limit on the number of requests in flight
+        """
+        return int(self._limit)
+
+    @property
+    def maximum(self):
+        """
+        The highest value of the limit
+        """
+        return self._rule.maximum
+
+    @property
+    def metrics(self):
+        """
+        A ``dict`` containing the state of the controller:
+
+        * ``limit``: The current limit
+        * ``in_flight``: The number of requests in flight
+        * ``increases``: The number of times the limit was raised
+        * ``decreases``: The number of times the limit was cut
+        * ``history``: A ``list`` of ``(elapsed, limit)`` tuples recording
+          each change to the limit, where ``elapsed`` is the time (in
+          seconds) since the controller was created
+        """
+        with self._condition:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "increases": self._counts["increases"],
+                "decreases": self._counts["decreases"],
+                "history": self._history.entries()
+            }
+
+    def acquire(self, deadline=None):
+        """
+        Waits until the number of requests in flight is below the limit.
+        Each call must be followed by a call to :func:`release`.
+
+        :param deadline: (optional) A :class:`dxlepoclient.deadline.Deadline`
+            which bounds the wait
+        :raise Exception: If the deadline expires or is cancelled before the
+            request can be sent
+        :return: A token to pass to :func:`release`
+        """
+        with _wake_on_cancel(deadline, self._condition), self._condition:
+            while self._in_flight >= int(self._limit):
+                if deadline:
+                    deadline.check()
+                _wait(self._condition, deadline)
+            self._in_flight += 1
+            return monotonic()
+
+    def release(self, token, failed=False):
+        """
+        Indicates that a request that was started via :func:`acquire` has
+        completed, and adjusts the limit.
+
+        :param token: The token returned by :func:`acquire`
+        :param failed: (optional) Whether the request failed due to a
+            response timeout or a DXL error response
+        """
+        now = monotonic()
+        with self._condition:
+            self._in_flight -= 1
+            previous = int(self._limit)
+            if failed:
+                if self._last_decrease is None or token > self._last_decrease:
+                    self._limit = self._rule.decrease(self._limit)
+                    self._last_decrease = now
+                    self._counts["decreases"] += 1
+            elif now - token <= self._rule.target_latency:
+                self._limit = self._rule.increase(self._limit)
+                if int(self._limit) > previous:
+                    self._counts["increases"] += 1
+            if int(self._limit) != previous:
+                logger.debug("Concurrency limit changed from %d to %d",
+                             previous, int(self._limit))
+                self._history.record(now, int(self._limit))
+            self._condition.notify_all()
+
+
+class _AimdRule(object):
+    """
+    The bounds and step sizes of an :class:`AdaptiveConcurrency` limit.
+    """
+
+    def __init__(self, minimum, maximum, target_latency, increase, decrease):
+        if minimum < 1:
+            raise Exception("Minimum must be greater than 0")
+        if maximum < minimum:
+            raise Exception(
+                "Maximum must be greater than or equal to the minimum")
+        if target_latency <= 0:
+            raise Exception("Target latency must be greater than 0")
+        if increase <= 0:
+            raise Exception("Increase must be greater than 0")
+        if not 0 < decrease < 1:
+            raise Exception("Decrease must be between 0 and 1")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self._increase = float(increase)
+        self._decrease = float(decrease)
+
+    def increase(self, limit):
+        """
+        Returns the limit after a request that succeeded within the target
+        latency.
+        """
+        return min(float(self.maximum), limit + self._increase / limit)
+
+    def decrease(self, limit):
+        """
+        Returns the limit after a request that failed.
+        """
+        return max(float(self.minimum), limit * self._decrease)
+
+
+class _LimitHistory(object):
+    """
+    The most recent changes to an :class:`AdaptiveConcurrency` limit.
+    """
+
+    def __init__(self, initial, size):
+        self._start = monotonic()
+        self._entries = collections.deque([(0.0, initial)], maxlen=size)
+
+    def record(self, now, limit):
+        self._entries.append((now - self._start, limit))
+
+    def entries(self):
+        """
+        Returns a ``list`` of ``(elapsed, limit)`` tuples.
+        """
+        return list(self._entries)
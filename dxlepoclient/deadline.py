@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import contextlib
+import threading
+
+from ._compat import monotonic
+
+
+class Deadline(object):
+    """
+    A time budget (and cancellation signal) shared by a group of remote
+    command invocations.
+
+    When a deadline is passed to :func:`dxlepoclient.client.EpoClient.run_command`
+    (or a batch API), the time that each DXL request waits for its response
+    is capped by the remaining budget, requests that are still queued (for
+    example, waiting for a :class:`dxlepoclient.scheduler.RequestScheduler`
+    slot) when the deadline passes are dropped instead of being sent, and
+    :func:`cancel` aborts every outstanding wait. Instances are thread-safe.
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            # Allow 10 seconds for all of the commands
+            deadline = Deadline(10)
+            for text in search_texts:
+                epo_client.run_command("system.find", {"searchText": text},
+                                       deadline=deadline)
+    """
+
+    def __init__(self, timeout=None):
+        """
+        Constructor parameters:
+
+        :param timeout: (optional) The time budget (in seconds). If not
+            specified, the deadline never expires but can still be
+            cancelled.
+        """
+        if timeout is not None and timeout < 0:
+            raise Exception("Timeout must be greater than or equal to 0")
+        self._expires = None if timeout is None else monotonic() + timeout
+        self._cancelled = False
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    @property
+    def remaining(self):
+        """
+        The remaining time budget (in seconds), or ``None`` if the deadline
+        has no time limit
+        """
+        if self._expires is None:
+            return None
+        return max(self._expires - monotonic(), 0.0)
+
+    @property
+    def expired(self):
+        """
+        Whether the time budget has been used up
+        """
+        return self._expires is not None and monotonic() >= self._expires
+
+    @property
+    def cancelled(self):
+        """
+        Whether the deadline has been cancelled
+        """
+        return self._cancelled
+
+    def cancel(self):
+        """
+        Cancels the deadline. Invocations which are waiting for a response
+        or for a scheduler slot fail immediately, and no further requests
+        are sent with the deadline.
+        """
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener()
+
+    def check(self):
+        """
+        Raises an exception if the deadline has been cancelled or has
+        expired.
+
+        :raise Exception: If the deadline has been cancelled or has expired
+        """
+        if self._cancelled:
+            raise Exception("Deadline cancelled")
+        if self.expired:
+            raise Exception("Deadline exceeded")
+
+    def cap(self, timeout):
+        """
+        Returns a timeout capped by the remaining time budget.
+
+        :param timeout: The timeout (in seconds)
+        :raise Exception: If the deadline has been cancelled or has expired
+        :return: The smaller of ``timeout`` and the remaining budget
+        """
+        self.check()
+        remaining = self.remaining
+        return timeout if remaining is None else min(timeout, remaining)
+
+    def _add_listener(self, listener):
+        """
+        Registers a callable which is invoked when the deadline is cancelled
+        (immediately if it already has been).
+        """
+        with self._lock:
+            if not self._cancelled:
+                self._listeners.append(listener)
+                return
+        listener()
+
+    def _remove_listener(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+
+@contextlib.contextmanager
+def _wake_on_cancel(deadline, condition):
+    """
+    Context manager for a wait on a condition variable which is bounded by
+    a deadline (or ``None``). The deadline is checked on entry, and the
+    waiting threads are woken if it is cancelled before the exit (so that
+    they can check it again).
+
+    :raise Exception: If the deadline has been cancelled or has expired
+    """
+    if not deadline:
+        yield
+        return
+    deadline.check()
+
+    def wake():
+        with condition:
+            condition.notify_all()
+
+    deadline._add_listener(wake)  # pylint: disable=protected-access
+    try:
+        yield
+    finally:
+        deadline._remove_listener(wake)  # pylint: disable=protected-access
+
+
+def _wait(condition, deadline):
+    """
+    Waits on a condition variable (which must be held) until it is notified
+    or the deadline (if any) expires.
+    """
+    condition.wait(deadline.remaining if deadline else None)
+
+
+class _WaitingResponseCallback(object):
+    """
+    Response callback which holds the response to an asynchronous request
+    and signals a waiting thread.
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.response = None
+
+    def on_response(self, response):
+        self.response = response
+        self.event.set()
+
+
+def _remove_async_request(dxl_client, request):
+    """
+    Removes a pending asynchronous request from a DXL client, so that the
+    client does not keep (or invoke) its response callback.
+
+    :param dxl_client: The DXL client that sent the request
+    :param request: The DXL request
+    """
+    # The DXL client does not expose a way to remove a pending request
+    request_manager = getattr(dxl_client, "_request_manager", None)
+    if request_manager is not None:
+        request_manager.unregister_async_callback(request.message_id)
+        request_manager.remove_current_request(request.message_id)
+
+
+def deadline_request(dxl_client, request, timeout, deadline):
+    """
+    Sends a DXL request and waits for the response for no longer than the
+    remaining time of the deadline. The wait ends early if the deadline is
+    cancelled. A request whose response is not received in time is removed
+    from the DXL client, so that a late response is discarded.
+
+    :param dxl_client: The DXL client (or
+        :class:`dxlepoclient.pool.DxlClientPool`) with which to send the
+        request
+    :param request: The DXL request to send
+    :param timeout: The maximum amount of time to wait for a response
+    :param deadline: The :class:`Deadline` for the request
+    :raise Exception: If the deadline expires or is cancelled, or if the
+        wait times out, before the response is received
+    :return: The DXL response
+    """
+    timeout = deadline.cap(timeout)
+    callback = _WaitingResponseCallback()
+    # pylint: disable=protected-access
+    deadline._add_listener(callback.event.set)
+    try:
+        dxl_client.async_request(request, callback)
+        callback.event.wait(timeout)
+    finally:
+        deadline._remove_listener(callback.event.set)
+    if callback.response is None:
+        cancel_async_request = getattr(dxl_client, "cancel_async_request",
+                                       None)
+        if cancel_async_request:
+            cancel_async_request(request)
+        else:
+            _remove_async_request(dxl_client, request)
+        deadline.check()
+        # The DXL libraries are only imported when a request is sent
+        from dxlclient.exceptions import WaitTimeoutException
+        raise WaitTimeoutException(
+            "Timeout waiting for response to message: " +
+            request.message_id)
+    return callback.response
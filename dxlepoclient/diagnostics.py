@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import collections
+import heapq
+import itertools
+import json
+import threading
+import time
+
+from ._compat import monotonic
+from .tracing import Span, SpanAttribute
+
+# The entry fields that are set from span attributes
+_ATTRIBUTE_FIELDS = {
+    SpanAttribute.ROUTE: "route",
+    SpanAttribute.REQUEST_SIZE: "request_size",
+    SpanAttribute.RESPONSE_SIZE: "response_size",
+    SpanAttribute.MESSAGE_ID: "message_id",
+    SpanAttribute.ERROR_CODE: "error_code"
+}
+
+# The encoder for the recorded command parameters
+_PARAMS_ENCODER = json.JSONEncoder(sort_keys=True)
+
+
+class _RecordingSpan(Span):
+    """
+    Collects the details of a command invocation for a :class:`CallRecorder`
+    and forwards them to the tracing span.
+    """
+
+    def __init__(self, recorder, span, epo_unique_id, command_name, params,
+                 output_format):
+        self._recorder = recorder
+        self._span = span
+        self._params = params
+        self._start = monotonic()
+        self.entry = {
+            "time": time.time(),
+            "epo_unique_id": epo_unique_id,
+            "command": command_name,
+            "output_format": output_format,
+            "route": None,
+            "request_size": None,
+            "response_size": None,
+            "message_id": None,
+            "error_code": None,
+            "outcome": "success",
+            "error": None
+        }
+
+    def set_attribute(self, key, value):
+        field = _ATTRIBUTE_FIELDS.get(key)
+        if field:
+            self.entry[field] = value
+        self._span.set_attribute(key, value)
+
+    def record_error(self, error):
+        self.entry["outcome"] = "error"
+        self.entry["error"] = str(error)
+        self._span.record_error(error)
+
+    def end(self):
+        self._span.end()
+        self.entry["duration"] = monotonic() - self._start
+        self._recorder._record(self.entry, self._params)  # pylint: disable=protected-access
+
+
+class CallRecorder(object):
+    """
+    Keeps the details of the most recent and the slowest remote command
+    invocations made by an :class:`dxlepoclient.client.EpoClient` (see the
+    ``diagnostics`` parameter of the client), for inspection while the
+    process is running.
+
+    Each call is recorded as a ``dict`` with the following fields:
+
+    * ``time``: When the call started (seconds since the epoch)
+    * ``epo_unique_id``, ``command``, ``output_format``: The ePO server,
+      command name and output format
+    * ``params``: The command parameters as JSON, truncated to
+      ``max_params_length`` characters
+    * ``route``: The ePO DXL service used (``commands`` or ``remote``), or
+      ``cache``
+    * ``request_size``, ``response_size``: The payload sizes (in bytes)
+    * ``message_id``: The DXL message identifier of the request
+    * ``duration``: The duration of the call (in seconds), including any
+      time spent waiting for a scheduler slot
+    * ``outcome``: ``success`` or ``error``
+    * ``error``, ``error_code``: The error message and DXL error code of a
+      failed call
+
+    Recording a call only appends to a bounded ``deque`` and a bounded heap
+    in memory. The storage used is fixed by ``capacity`` and ``slowest``.
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            recorder = CallRecorder(capacity=200, slowest=20)
+            epo_client = EpoClient(dxl_client, diagnostics=recorder)
+
+            # Later (for example, from a diagnostics endpoint)
+            for call in recorder.slowest:
+                print(call["duration"], call["command"], call["params"])
+    """
+
+    def __init__(self, capacity=100, slowest=20, max_params_length=256):
+        """
+        Constructor parameters:
+
+        :param capacity: (optional) The number of recent calls to keep
+        :param slowest: (optional) The number of slowest calls to keep
+        :param max_params_length: (optional) The maximum length of the
+            recorded parameters
+        """
+        if capacity < 1:
+            raise Exception("Capacity must be greater than 0")
+        if slowest < 0:
+            raise Exception("Slowest must be greater than or equal to 0")
+        self._recent = collections.deque(maxlen=capacity)
+        self._slowest_count = slowest
+        self._slowest = []
+        self._max_params_length = max_params_length
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def recent(self):
+        """
+        A ``list`` of the most recent calls (newest first)
+        """
+        with self._lock:
+            return [dict(entry) for entry in reversed(self._recent)]
+
+    @property
+    def slowest(self):
+        """
+        A ``list`` of the slowest calls (slowest first)
+        """
+        with self._lock:
+            return [dict(item[2]) for item in
+                    sorted(self._slowest, reverse=True)]
+
+    def snapshot(self):
+        """
+        Returns the recorded calls.
+
+        :return: A ``dict`` containing the ``recent`` and ``slowest`` calls
+        """
+        return {"recent": self.recent, "slowest": self.slowest}
+
+    def clear(self):
+        """
+        Removes the recorded calls.
+        """
+        with self._lock:
+            self._recent.clear()
+            del self._slowest[:]
+
+    def _wrap_span(self, span, epo_unique_id, command_name, params,
+                   output_format):
+        """
+        Returns a span which records the command invocation when it ends.
+        """
+        return _RecordingSpan(self, span, epo_unique_id, command_name, params,
+                              output_format)
+
+    def _truncate_params(self, params):
+        # The parameters are encoded incrementally, so that encoding stops
+        # once the maximum length is reached
+        chunks = []
+        length = 0
+        try:
+            for chunk in _PARAMS_ENCODER.iterencode(params):
+                chunks.append(chunk)
+                length += len(chunk)
+                if length > self._max_params_length:
+                    break
+            text = "".join(chunks)
+        except (TypeError, ValueError):
+            text = repr(params)
+        if len(text) > self._max_params_length:
+            text = text[:self._max_params_length] + "..."
+        return text
+
+    def _record(self, entry, params):
+        entry["params"] = self._truncate_params(params)
+        item = (entry["duration"], next(self._sequence), entry)
+        with self._lock:
+            self._recent.append(entry)
+            if len(self._slowest) < self._slowest_count:
+                heapq.heappush(self._slowest, item)
+            elif self._slowest_count and item[0] > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, item)
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import logging
+import threading
+import weakref
+
+from dxlbootstrap.util import MessageUtils
+from dxlclient.callbacks import EventCallback
+
+from .client import EpoClient
+
+# Configure local logger
+logger = logging.getLogger(__name__)
+
+
+class Route(object):
+    """
+    Constants that are used to indicate which ePO DXL service requests for an
+    ePO server are routed through.
+
+        +----------+------------------------------------------------------+
+        | Type     | Description                                          |
+        +==========+======================================================+
+        | COMMANDS | The ePO-hosted DXL "commands" service                |
+        +----------+------------------------------------------------------+
+        | REMOTE   | The standalone ePO DXL Python "remote" service       |
+        +----------+------------------------------------------------------+
+    """
+    COMMANDS = "commands"
+    REMOTE = "remote"
+
+
+class _ServiceEventCallback(EventCallback):
+    """
+    Forwards service registry events to a monitor.
+    """
+
+    def __init__(self, monitor, registered):
+        super(_ServiceEventCallback, self).__init__()
+        self._monitor = monitor
+        self._registered = registered
+
+    def on_event(self, event):
+        try:
+            service = MessageUtils.json_payload_to_dict(event)
+            # pylint: disable=protected-access
+            if self._registered:
+                self._monitor._add_service(service.get("serviceGuid"),
+                                           service)
+            else:
+                self._monitor._remove_service(service.get("serviceGuid"))
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.error("Error handling service registry event: %s", ex)
+
+
+class ServiceRegistryMonitor(object):
+    """
+    Maintains a live map of the ePO servers that are exposed to the DXL
+    fabric, and the services (routes) through which each can be reached.
+
+    The monitor performs a single query of the DXL service registry when it
+    is started and is then kept up to date by the service registry's
+    register/unregister events (no polling). :class:`EpoClient` instances
+    that are created with a monitor use it for service discovery and switch
+    routes automatically when the ePO DXL services they are using are
+    registered or unregistered (for example, when a service is restarted or
+    moved).
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            with ServiceRegistryMonitor(dxl_client) as monitor:
+                epo_client = EpoClient(dxl_client, service_monitor=monitor)
+    """
+
+    # The topic on which service registration events are delivered
+    DXL_SERVICE_REGISTER_EVENT_TOPIC = "/mcafee/event/dxl/svcregistry/register"
+
+    # The topic on which service unregistration events are delivered
+    DXL_SERVICE_UNREGISTER_EVENT_TOPIC = \
+        "/mcafee/event/dxl/svcregistry/unregister"
+
+    def __init__(self, dxl_client,
+                 response_timeout=EpoClient.DEFAULT_RESPONSE_TIMEOUT):
+        """
+        Constructor parameters:
+
+        :param dxl_client: The DXL client to use for communication with the
+            DXL service registry
+        :param response_timeout: (optional) The maximum amount of time (in
+            seconds) to wait for the initial service registry queries
+        """
+        self._dxl_client = dxl_client
+        self._response_timeout = response_timeout
+        self._lock = threading.RLock()
+        # Service identifier -> (ePO unique identifier, route)
+        self._services = {}
+        self._listeners = []
+        self._clients = weakref.WeakSet()
+        # The service registry event callbacks (while started)
+        self._callbacks = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        """
+        Subscribes to the service registry events and populates the map of
+        ePO servers from the service registry.
+        """
+        if self._callbacks:
+            return
+        if not self._dxl_client.connected:
+            self._dxl_client.connect()
+        # Subscribe before querying so that no changes are missed
+        self._callbacks = (
+            (self.DXL_SERVICE_REGISTER_EVENT_TOPIC,
+             _ServiceEventCallback(self, True)),
+            (self.DXL_SERVICE_UNREGISTER_EVENT_TOPIC,
+             _ServiceEventCallback(self, False)))
+        for topic, callback in self._callbacks:
+            self._dxl_client.add_event_callback(topic, callback)
+
+        # pylint: disable=protected-access
+        for service_type in [EpoClient._DXL_EPO_COMMANDS_SERVICE_TYPE,
+                             EpoClient.DXL_SERVICE_TYPE]:
+            for service in EpoClient._query_service_registry(
+                    self._dxl_client, self._response_timeout, service_type):
+                self._add_service(service.get("serviceGuid"), service)
+
+    def stop(self):
+        """
+        Unsubscribes from the service registry events.
+        """
+        if not self._callbacks:
+            return
+        for topic, callback in self._callbacks:
+            self._dxl_client.remove_event_callback(topic, callback)
+        self._callbacks = None
+
+    @property
+    def epo_unique_ids(self):
+        """
+        A ``set`` containing the unique identifiers for the ePO servers that
+        are currently exposed to the DXL fabric
+        """
+        with self._lock:
+            return set(epo_id for epo_id, _ in self._services.values())
+
+    @property
+    def routes(self):
+        """
+        A ``dict`` containing the preferred route (see :class:`Route`) for
+        each of the ePO servers that are currently exposed to the DXL fabric
+        (keyed by ePO unique identifier)
+        """
+        with self._lock:
+            return dict((epo_id, self.get_route(epo_id))
+                        for epo_id in self.epo_unique_ids)
+
+    def get_route(self, epo_unique_id):
+        """
+        Returns the preferred route for requests to the specified ePO server.
+        As with :class:`EpoClient` discovery, a "remote" service is preferred
+        over a "commands" service when both are available.
+
+        :param epo_unique_id: The unique identifier of the ePO server
+        :return: The route (see :class:`Route`) or ``None`` if no service is
+            currently registered for the ePO server
+        """
+        with self._lock:
+            routes = set(route for epo_id, route in self._services.values()
+                         if epo_id == epo_unique_id)
+        if Route.REMOTE in routes:
+            return Route.REMOTE
+        return Route.COMMANDS if routes else None
+
+    def add_listener(self, listener):
+        """
+        Adds a listener which is invoked when the preferred route for an ePO
+        server changes. Listeners are invoked on the DXL client's incoming
+        message thread and must not perform synchronous DXL requests.
+
+        :param listener: A callable which receives the unique identifier of
+            the ePO server and its new route (``None`` if the ePO server is
+            no longer available)
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        Removes a listener that was added via :func:`add_listener`.
+
+        :param listener: The listener to remove
+        """
+        with self._lock:
+            self._listeners.remove(listener)
+
+    def _add_client(self, epo_client):
+        """
+        Registers an ePO client to be notified of route changes.
+        """
+        self._clients.add(epo_client)
+
+    @staticmethod
+    def _get_service_entry(service):
+        """
+        Determines the ePO unique identifier and route for a registered
+        service.
+
+        :param service: The service information (``dict``)
+        :return: A ``tuple`` containing the ePO unique identifier and route,
+            or ``None`` if the service is not an ePO DXL service
+        """
+        # pylint: disable=protected-access
+        service_type = service.get("serviceType")
+        if service_type == EpoClient._DXL_EPO_COMMANDS_SERVICE_TYPE:
+            epo_id = service.get("metaData", {}).get("epoGuid")
+            if epo_id:
+                return epo_id, Route.COMMANDS
+        elif service_type == EpoClient.DXL_SERVICE_TYPE:
+            for channel in service.get("requestChannels", []):
+                if channel.startswith(
+                        EpoClient._DXL_EPO_REMOTE_REQUEST_PREFIX):
+                    return channel[len(
+                        EpoClient._DXL_EPO_REMOTE_REQUEST_PREFIX):], \
+                        Route.REMOTE
+        return None
+
+    def _add_service(self, service_id, service):
+        entry = self._get_service_entry(service)
+        if not service_id or not entry:
+            return
+        with self._lock:
+            old_route = self.get_route(entry[0])
+            self._services[service_id] = entry
+        logger.debug("ePO DXL service registered: %s (%s, %s)", service_id,
+                     entry[0], entry[1])
+        self._notify(entry[0], old_route)
+
+    def _remove_service(self, service_id):
+        with self._lock:
+            entry = self._services.get(service_id)
+            if not entry:
+                return
+            old_route = self.get_route(entry[0])
+            del self._services[service_id]
+        logger.debug("ePO DXL service unregistered: %s (%s, %s)", service_id,
+                     entry[0], entry[1])
+        self._notify(entry[0], old_route)
+
+    def _notify(self, epo_unique_id, old_route):
+        """
+        Notifies clients and listeners if the route for an ePO server has
+        changed.
+        """
+        route = self.get_route(epo_unique_id)
+        if route == old_route:
+            return
+        logger.info("Route for ePO '%s' changed: %s -> %s", epo_unique_id,
+                    old_route, route)
+        for epo_client in list(self._clients):
+            epo_client._update_route(epo_unique_id, route)  # pylint: disable=protected-access
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(epo_unique_id, route)
+            except Exception as ex:  # pylint: disable=broad-except
+                logger.error("Error invoking route listener: %s", ex)
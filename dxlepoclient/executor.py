@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import json
+import logging
+import multiprocessing
+import multiprocessing.util
+
+from .parsers import OutputFormat
+
+# Configure local logger
+logger = logging.getLogger(__name__)
+
+
+class ResultMode(object):
+    """
+    Constants that are used to indicate the form in which a
+    :class:`ProcessCommandExecutor` returns command results to the calling
+    process.
+
+        +--------+----------------------------------------------------------+
+        | Type   | Description                                              |
+        +========+==========================================================+
+        | RAW    | The undecoded response payload (``bytes``)               |
+        +--------+----------------------------------------------------------+
+        | PARSED | The parsed result (for example, a ``list`` of ``dict``   |
+        |        | records for :const:`OutputFormat.JSON` results)          |
+        +--------+----------------------------------------------------------+
+    """
+    RAW = "raw"
+    PARSED = "parsed"
+
+    @staticmethod
+    def validate(result_mode):
+        """
+        Validates that the specified result mode is valid (raw, parsed). If
+        the mode is not valid an exception is thrown.
+
+        :param result_mode: The result mode
+        """
+        if result_mode not in [ResultMode.RAW, ResultMode.PARSED]:
+            raise Exception("Invalid result mode: {0}".format(result_mode))
+
+
+# The ePO client for the current worker process
+_worker_epo_client = None  # pylint: disable=invalid-name
+
+
+def _create_dxl_client(config_file):
+    """
+    Creates a DXL client from the specified configuration file.
+
+    :param config_file: The path to the DXL client configuration file
+    :return: The DXL client
+    """
+    from dxlclient.client import DxlClient
+    from dxlclient.client_config import DxlClientConfig
+    return DxlClient(DxlClientConfig.create_dxl_config_from_file(config_file))
+
+
+def _init_worker(config_file, dxl_client_factory, epo_unique_id):
+    """
+    Initializes a worker process (creates and connects its DXL client and
+    creates its ePO client).
+    """
+    global _worker_epo_client  # pylint: disable=global-statement,invalid-name
+    from .client import EpoClient
+    dxl_client = dxl_client_factory() if dxl_client_factory \
+        else _create_dxl_client(config_file)
+    dxl_client.connect()
+    multiprocessing.util.Finalize(None, dxl_client.destroy, exitpriority=10)
+    _worker_epo_client = EpoClient(dxl_client, epo_unique_id)
+
+
+def _run_command_in_worker(task):
+    """
+    Invokes a remote command from a worker process.
+
+    :param task: A ``tuple`` containing the command name, parameters, output
+        format and result mode
+    :return: The result of the remote command execution
+    """
+    command_name, params, output_format, result_mode = task
+    # pylint: disable=protected-access
+    res = _worker_epo_client._send_command(command_name, params,
+                                           output_format)
+    _worker_epo_client._check_response(res)
+    payload = res.payload
+    if result_mode == ResultMode.RAW:
+        return payload
+    payload = payload.decode("utf-8")
+    return json.loads(payload) if output_format == OutputFormat.JSON \
+        else payload
+
+
+class ProcessCommandExecutor(object):
+    """
+    Invokes ePO remote commands from a pool of worker processes.
+
+    Each worker process holds its own DXL client and
+    :class:`dxlepoclient.client.EpoClient`, so the encoding and decoding of
+    requests and responses is spread across multiple cores instead of
+    competing for a single interpreter lock. Commands are distributed across
+    the workers and results are returned to the calling process either as
+    raw payloads or in parsed form (see :class:`ResultMode`).
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            with ProcessCommandExecutor(config_file="dxlclient.config",
+                                        processes=4) as executor:
+                for systems in executor.map_commands(
+                        ("system.find", {"searchText": text})
+                        for text in search_texts):
+                    print(len(systems))
+    """
+
+    def __init__(self, config_file=None, epo_unique_id=None, processes=None,
+                 result_mode=ResultMode.PARSED, dxl_client_factory=None):
+        """
+        Constructor parameters:
+
+        :param config_file: (optional) The path to the DXL client
+            configuration file used by each worker process to create its DXL
+            client. Either this or ``dxl_client_factory`` must be specified.
+        :param epo_unique_id: (optional) The unique identifier used to
+            specify the ePO server that the workers will communicate with
+            (see :class:`dxlepoclient.client.EpoClient`).
+        :param processes: (optional) The number of worker processes.
+            Defaults to the number of CPUs.
+        :param result_mode: (optional) The form in which results are
+            returned. The list of `result modes` can be found in the
+            :class:`ResultMode` constants class.
+        :param dxl_client_factory: (optional) A picklable callable which
+            returns a new (unconnected) DXL client. It is invoked once in
+            each worker process.
+        """
+        if not config_file and not dxl_client_factory:
+            raise Exception(
+                "A configuration file or DXL client factory must be specified")
+        ResultMode.validate(result_mode)
+        self._result_mode = result_mode
+        self._processes = processes or multiprocessing.cpu_count()
+        self._pool = multiprocessing.Pool(
+            self._processes, initializer=_init_worker,
+            initargs=(config_file, dxl_client_factory, epo_unique_id))
+        logger.debug("Started %d worker processes", self._processes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def processes(self):
+        """
+        The number of worker processes
+        """
+        return self._processes
+
+    def _task(self, command_name, params, output_format):
+        OutputFormat.validate(output_format)
+        return command_name, params or {}, output_format, self._result_mode
+
+    def run_command(self, command_name, params=None,
+                    output_format=OutputFormat.JSON):
+        """
+        Invokes an ePO remote command in one of the worker processes and
+        waits for the result.
+
+        :param command_name: The name of the remote command to invoke
+        :param params: (optional) A dictionary (``dict``) containing the
+            parameters for the command
+        :param output_format: (optional) The output format for ePO to use
+            when returning the response (see
+            :func:`dxlepoclient.client.EpoClient.run_command`)
+        :raise Exception: If an error response is received from the ePO DXL
+            service.
+        :return: The result of the remote command execution (see
+            :class:`ResultMode`)
+        """
+        return self._pool.apply(
+            _run_command_in_worker,
+            (self._task(command_name, params, output_format),))
+
+    def map_commands(self, commands, output_format=OutputFormat.JSON,
+                     chunk_size=1):
+        """
+        Invokes a series of ePO remote commands across the worker processes.
+
+        :param commands: An iterable of ``(command_name, params)`` tuples
+        :param output_format: (optional) The output format for ePO to use
+            when returning the responses
+        :param chunk_size: (optional) The number of commands that are sent
+            to a worker process at a time. Larger values reduce the
+            inter-process communication overhead for small commands.
+        :raise Exception: If an error response is received from the ePO DXL
+            service (raised when the corresponding result is reached).
+        :return: An iterator of the results of the remote command executions
+            (in the same order as ``commands``)
+        """
+        return self._pool.imap(
+            _run_command_in_worker,
+            (self._task(command_name, params, output_format)
+             for command_name, params in commands),
+            chunk_size)
+
+    def close(self):
+        """
+        Waits for outstanding commands to complete and shuts down the worker
+        processes.
+        """
+        self._pool.close()
+        self._pool.join()
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import csv
+import io
+import json
+import logging
+
+from ._compat import PY2, monotonic
+
+# Configure local logger
+logger = logging.getLogger(__name__)
+
+
+class ExportFormat(object):
+    """
+    Constants that are used to indicate the file format to use when exporting
+    the results of a remote command invocation via
+    :func:`dxlepoclient.client.EpoClient.export`.
+
+        +--------+----------------------------------------------------------+
+        | Type   | Description                                              |
+        +========+==========================================================+
+        | NDJSON | Newline-delimited JSON (one JSON record per line)        |
+        +--------+----------------------------------------------------------+
+        | CSV    | Comma-separated values (with a header row)               |
+        +--------+----------------------------------------------------------+
+    """
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+    @staticmethod
+    def validate(export_format):
+        """
+        Validates that the specified format is valid (ndjson, csv). If the
+        format is not valid an exception is thrown.
+
+        :param export_format: The export format
+        """
+        if export_format not in [ExportFormat.NDJSON, ExportFormat.CSV]:
+            raise Exception("Invalid export format: {0}".format(export_format))
+
+
+class ExportResult(object):
+    """
+    Statistics for a completed export (rows written, throughput, etc.).
+    """
+
+    def __init__(self, path, rows_written, bytes_written, elapsed):
+        self._path = path
+        self._rows_written = rows_written
+        self._bytes_written = bytes_written
+        self._elapsed = elapsed
+
+    @property
+    def path(self):
+        """
+        The path of the file that the records were written to
+        """
+        return self._path
+
+    @property
+    def rows_written(self):
+        """
+        The number of records (rows) that were written
+        """
+        return self._rows_written
+
+    @property
+    def bytes_written(self):
+        """
+        The number of bytes that were written
+        """
+        return self._bytes_written
+
+    @property
+    def elapsed(self):
+        """
+        The amount of time (in seconds) that the export took
+        """
+        return self._elapsed
+
+    @property
+    def rows_per_second(self):
+        """
+        The export throughput in records (rows) per second
+        """
+        return self._rows_written / self._elapsed if self._elapsed else 0.0
+
+    @property
+    def bytes_per_second(self):
+        """
+        The export throughput in bytes per second
+        """
+        return self._bytes_written / self._elapsed if self._elapsed else 0.0
+
+    def __repr__(self):
+        return ("ExportResult(path={0!r}, rows_written={1}, bytes_written={2}, "
+                "elapsed={3:.3f})").format(self._path, self._rows_written,
+                                           self._bytes_written, self._elapsed)
+
+
+# The default size (in bytes) of the buffer used when writing export files
+DEFAULT_BUFFER_SIZE = 256 * 1024
+
+
+def _project(record, fields):
+    """
+    Returns the values for the specified fields of a record.
+
+    :param record: The record (``dict``)
+    :param fields: The names of the fields to return
+    :return: A ``dict`` containing only the specified fields
+    """
+    return dict((field, record.get(field)) for field in fields)
+
+
+class _NdjsonEncoder(object):
+    """
+    Encodes records as newline-delimited JSON.
+    """
+
+    def __init__(self, fields):
+        self._fields = fields
+
+    def encode(self, record):
+        if self._fields is not None and isinstance(record, dict):
+            record = _project(record, self._fields)
+        return (json.dumps(record, separators=(",", ":")) + "\n").encode(
+            "utf-8")
+
+
+class _CsvEncoder(object):
+    """
+    Encodes records as CSV rows. The header row is determined by the
+    projected fields or, if no fields are specified, by the keys of the first
+    record. In that case, the keys of later records which are not in the
+    header are dropped, and logged the first time each is seen.
+    """
+
+    def __init__(self, fields):
+        self._fields = fields
+        self._header_written = False
+        # The keys in the header row, if it was built from the first record,
+        # and the keys that have been dropped from later records
+        self._header_keys = None
+        self._dropped_keys = set()
+        self._row_buffer = io.BytesIO() if PY2 else io.StringIO()
+        self._writer = csv.writer(self._row_buffer, lineterminator="\n")
+
+    @staticmethod
+    def _value(value):
+        if value is None:
+            value = ""
+        elif isinstance(value, (dict, list)):
+            value = json.dumps(value, separators=(",", ":"))
+        elif PY2 and not isinstance(value, str):
+            value = unicode(value).encode("utf-8")  # pylint: disable=undefined-variable
+        return value
+
+    def _row(self, values):
+        self._row_buffer.seek(0)
+        self._row_buffer.truncate()
+        self._writer.writerow([self._value(value) for value in values])
+        row = self._row_buffer.getvalue()
+        return row if isinstance(row, bytes) else row.encode("utf-8")
+
+    def encode(self, record):
+        if not isinstance(record, dict):
+            record = {"value": record}
+        header = b""
+        if not self._header_written:
+            if self._fields is None:
+                self._fields = list(record.keys())
+                self._header_keys = frozenset(self._fields)
+            header = self._row(self._fields)
+            self._header_written = True
+        elif self._header_keys is not None:
+            self._check_keys(record)
+        return header + self._row([record.get(field) for field in self._fields])
+
+    def _check_keys(self, record):
+        dropped = set(record).difference(self._header_keys,
+                                         self._dropped_keys)
+        if dropped:
+            self._dropped_keys.update(dropped)
+            logger.warning("Dropping fields which are not in the CSV header "
+                           "(specify the fields to export to include them): "
+                           "%s", ", ".join(sorted(dropped)))
+
+
+def export_records(records, path, export_format=ExportFormat.NDJSON,
+                   fields=None, buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Writes records to a file, one record at a time.
+
+    Records are consumed from the ``records`` iterable as they are written,
+    so memory use is bounded by the size of the write buffer (plus the
+    record currently being written) regardless of the number of records.
+
+    :param records: An iterable of records (typically a generator returned
+        by :func:`dxlepoclient.client.EpoClient.iter_records`)
+    :param path: The path of the file to write
+    :param export_format: (optional) The format of the file. The list of
+        `export formats` can be found in the :class:`ExportFormat` constants
+        class.
+    :param fields: (optional) A ``list`` of field names to write for each
+        record. If not specified, all fields are written, except for CSV
+        files, whose columns are the keys of the first record (fields of
+        later records which are not columns are dropped with a warning).
+    :param buffer_size: (optional) The size (in bytes) of the write buffer
+    :return: An :class:`ExportResult` containing the statistics for the
+        export
+    """
+    ExportFormat.validate(export_format)
+    if fields is not None:
+        fields = list(fields)
+    encoder = _NdjsonEncoder(fields) if export_format == ExportFormat.NDJSON \
+        else _CsvEncoder(fields)
+
+    rows_written = 0
+    bytes_written = 0
+    start = monotonic()
+    with io.open(path, "wb", buffering=buffer_size) as export_file:
+        for record in records:
+            data = encoder.encode(record)
+            export_file.write(data)
+            rows_written += 1
+            bytes_written += len(data)
+    result = ExportResult(path, rows_written, bytes_written,
+                          monotonic() - start)
+
+    logger.debug("Exported %d rows (%d bytes) to %s in %.3f seconds "
+                 "(%.1f rows/second)", result.rows_written,
+                 result.bytes_written, path, result.elapsed,
+                 result.rows_per_second)
+    return result
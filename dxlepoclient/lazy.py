@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import itertools
+import json
+import re
+
+from ._compat import Sequence
+from .parsers import _project_json
+
+_STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+
+# Matches a record without nested objects or arrays (such as a table row) in a
+# single step: an object, a string or another scalar value, followed by the
+# separator and whitespace before the next record (or the end of the array)
+_FLAT_RECORD_PATTERN = re.compile(
+    r'(?:\{[^"{}\[\]]*(?:' + _STRING + r'[^"{}\[\]]*)*\}|' + _STRING +
+    r'|[^\s"{}\[\],]+)[ \t\n\r]*(?:,[ \t\n\r]*|(?=\]))')
+
+_WHITESPACE_PATTERN = re.compile(r"[ \t\n\r]*")
+
+# Placeholder for a record which has not been decoded (``None`` is a valid
+# JSON value)
+_NOT_DECODED = object()
+
+
+class LazyResult(Sequence):
+    """
+    A read-only sequence of the records in a JSON response payload, which
+    decodes each record only when it is accessed (see the ``lazy`` parameter
+    of :func:`dxlepoclient.client.EpoClient.run_command`).
+
+    The payload is scanned for the offsets at which the records of the
+    top-level array start, and scanning stops as soon as the requested
+    record has been found, so reading the first few records of a large
+    result costs a fraction of decoding every record. A record without
+    nested objects or arrays (such as a table row) is skipped by a single
+    regular expression match, without building any objects. A nested record
+    is decoded as it is skipped. Records are decoded once and kept, so a
+    record that is accessed twice is the same object. If the payload is not
+    a JSON array, it is treated as a single record.
+
+    Indexing and slicing are supported as for a ``list`` (slices return a
+    ``list`` of records). A malformed payload is only detected when the
+    affected part of it is scanned or decoded, at which point a
+    ``ValueError`` is raised.
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            result = epo_client.run_command("system.find",
+                                            {"searchText": ""}, lazy=True)
+            print(len(result))
+            for system in result[:10]:
+                print(system["EPOComputerProperties.ComputerName"])
+    """
+
+    def __init__(self, payload, fields=None):
+        """
+        Constructor parameters:
+
+        :param payload: The JSON payload (a string, or ``bytes`` encoded as
+            UTF-8)
+        :param fields: (optional) The keys to keep in each record. If not
+            specified, all keys are kept.
+        """
+        if isinstance(payload, (bytes, bytearray)):
+            payload = payload.decode("utf-8")
+        self._text = payload
+        self._fields = frozenset(fields) if fields is not None else None
+        self._decoder = json.JSONDecoder(
+            object_pairs_hook=tuple if fields is not None else None)
+        self._starts = []
+        self._records = {}
+        self._scanner = self._scan()
+
+    def _scan(self):
+        """
+        Returns a generator of the offsets at which the records start.
+        """
+        text = self._text
+        position = _WHITESPACE_PATTERN.match(text).end()
+        if position == len(text):
+            raise ValueError("Empty JSON payload")
+        if text[position] != "[":
+            yield position
+            return
+        position = _WHITESPACE_PATTERN.match(text, position + 1).end()
+        if text.startswith("]", position):
+            return
+        match_flat_record = _FLAT_RECORD_PATTERN.match
+        # The records of a result have the same shape, so once a nested
+        # record has been found, the others are not matched as flat records
+        nested = False
+        index = 0
+        while True:
+            yield position
+            match = None if nested else match_flat_record(text, position)
+            if match:
+                position = match.end()
+                if text.startswith("]", position):
+                    return
+            else:
+                # Finding the end of a nested record takes as long as
+                # decoding it, so it is decoded (and kept) instead
+                nested = True
+                self._records[index], position = self._decode(position)
+                position = _WHITESPACE_PATTERN.match(text, position).end()
+                if text.startswith("]", position):
+                    return
+                if not text.startswith(",", position):
+                    raise ValueError("Expecting ',' delimiter: char {0}".format(
+                        position))
+                position = _WHITESPACE_PATTERN.match(text, position + 1).end()
+            index += 1
+
+    def _decode(self, position):
+        """
+        Decodes the record which starts at the specified offset.
+
+        :return: A tuple of the record and the offset of its end
+        """
+        record, end = self._decoder.raw_decode(self._text, position)
+        if self._fields is not None:
+            record = _project_json(record, self._fields)
+        return record, end
+
+    def _index_to(self, index):
+        """
+        Scans the payload until the start of the record at the specified
+        index has been found (or the end of the payload is reached).
+
+        :return: Whether the record exists
+        """
+        if self._scanner is not None and index >= len(self._starts):
+            self._starts.extend(itertools.islice(
+                self._scanner, index - len(self._starts) + 1))
+            if index >= len(self._starts):
+                self._scanner = None
+        return index < len(self._starts)
+
+    def _index_all(self):
+        if self._scanner is not None:
+            self._starts.extend(self._scanner)
+            self._scanner = None
+
+    def _record(self, index):
+        record = self._records.get(index, _NOT_DECODED)
+        if record is _NOT_DECODED:
+            record = self._records[index] = self._decode(self._starts[index])[0]
+        return record
+
+    def __len__(self):
+        self._index_all()
+        return len(self._starts)
+
+    def _slice_indices(self, index):
+        """
+        Returns the ``(start, stop, step)`` positions of a slice, only
+        indexing the records up to the end of the slice if it is a forward
+        slice with non-negative bounds.
+        """
+        forward = index.step is None or index.step > 0
+        bounded = index.stop is not None and index.stop >= 0 and \
+            (index.start is None or index.start >= 0)
+        if forward and bounded:
+            self._index_to(index.stop - 1)
+            return index.indices(len(self._starts))
+        return index.indices(len(self))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._record(position)
+                    for position in range(*self._slice_indices(index))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or not self._index_to(index):
+            raise IndexError("Record index out of range")
+        return self._record(index)
+
+    def __iter__(self):
+        index = 0
+        while self._index_to(index):
+            yield self._record(index)
+            index += 1
+
+    def __repr__(self):
+        return "<{0}: {1} records indexed>".format(type(self).__name__,
+                                                   len(self._starts))
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import calendar
+import collections
+import re
+
+from ._compat import string_types
+
+# The field used to identify a system across ePO servers
+DEFAULT_KEY_FIELD = "EPOLeafNode.AgentGUID"
+
+# The field that holds the time of a system's last agent communication
+LAST_UPDATE_FIELD = "EPOLeafNode.LastUpdate"
+
+# An ISO 8601 timestamp, with optional fractional seconds and UTC offset
+_TIMESTAMP_PATTERN = re.compile(
+    r"^(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(\.\d+)?"
+    r"(Z|[+-]\d{2}:?\d{2})?$")
+
+
+def _field_getter(field):
+    """
+    Returns a function which extracts a value from a record, given either a
+    field name or a callable.
+    """
+    if isinstance(field, string_types):
+        return lambda record: record.get(field) \
+            if isinstance(record, dict) else None
+    return field
+
+
+def _parse_timestamp(value):
+    """
+    Parses an ISO 8601 timestamp (ePO returns, for example,
+    ``2018-01-02T10:00:00-08:00``) into seconds since the epoch, so that
+    timestamps with different UTC offsets can be compared. Timestamps without
+    an offset are treated as UTC.
+
+    :param value: The timestamp string
+    :return: The seconds since the epoch, or ``None`` if the value is not a
+        timestamp
+    """
+    match = _TIMESTAMP_PATTERN.match(value.strip())
+    if not match:
+        return None
+    seconds = calendar.timegm(
+        tuple(int(part) for part in match.groups()[:6]))
+    fraction, offset = match.group(7), match.group(8)
+    if fraction:
+        seconds += float(fraction)
+    if offset and offset != "Z":
+        digits = offset[1:].replace(":", "")
+        offset_seconds = int(digits[:2]) * 3600 + int(digits[2:]) * 60
+        seconds += offset_seconds if offset[0] == "-" else -offset_seconds
+    return seconds
+
+
+def _timestamp_getter(field):
+    """
+    Returns a function which extracts a field from a record, given its name,
+    parsing string values as timestamps (see :func:`_parse_timestamp`).
+    """
+    get_value = _field_getter(field)
+
+    def get_timestamp(record):
+        value = get_value(record)
+        if isinstance(value, string_types):
+            return _parse_timestamp(value)
+        return value
+    return get_timestamp
+
+
+class RecordMerger(object):
+    """
+    Merges the records from multiple result streams (for example, the
+    ``system.find`` results from several ePO servers), removing duplicate
+    records that share the same key.
+
+    Streams are consumed one record at a time. By default, the first record
+    seen for each key is kept and is yielded immediately, so only the set
+    of keys seen so far is held in memory. When ``most_recent`` is
+    specified, the record with the greatest ``most_recent`` value is kept
+    for each key instead; those records are yielded once every stream has
+    been consumed, so one record per unique key is held in memory.
+
+    Records without a key value are never treated as duplicates and are
+    yielded immediately.
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            merger = RecordMerger(most_recent=LAST_UPDATE_FIELD,
+                                  source_field="EPOServer")
+            systems = list(merger.merge(dict(
+                (epo_id, epo_client.iter_records("system.find",
+                                                 {"searchText": ""}))
+                for epo_id, epo_client in epo_clients.items())))
+            print(merger.metrics)
+    """
+
+    def __init__(self, key=DEFAULT_KEY_FIELD, most_recent=None,
+                 source_field=None):
+        """
+        Constructor parameters:
+
+        :param key: (optional) The name of the field that identifies a
+            record, or a callable which returns the key for a record
+        :param most_recent: (optional) The name of a field (or a callable
+            returning a value) used to choose between duplicate records. The
+            record with the greatest value is kept (ties are won by the
+            record seen first). String values of a named field are parsed as
+            ISO 8601 timestamps (such as :const:`LAST_UPDATE_FIELD`), taking
+            their UTC offsets into account; values which cannot be parsed
+            are ignored. If not specified, the first record seen is kept.
+        :param source_field: (optional) The name of a field to add to each
+            ``dict`` record, set to the identifier of the stream that the
+            record came from
+        """
+        self._key = _field_getter(key)
+        self._most_recent = _timestamp_getter(most_recent) \
+            if isinstance(most_recent, string_types) else most_recent
+        self._source_field = source_field
+        self._records = 0
+        self._unique = 0
+
+    @property
+    def metrics(self):
+        """
+        A ``dict`` containing the counts for the most recent merge:
+
+        * ``records``: The number of records read from the streams
+        * ``unique``: The number of records yielded
+        * ``duplicates``: The number of duplicate records dropped
+        """
+        return {
+            "records": self._records,
+            "unique": self._unique,
+            "duplicates": self._records - self._unique
+        }
+
+    def _iter_sources(self, streams):
+        """
+        Yields each record in the streams, tagged with its source if a
+        ``source_field`` was specified.
+        """
+        if isinstance(streams, dict):
+            items = streams.items()
+        else:
+            items = enumerate(streams)
+        for source, stream in items:
+            for record in stream:
+                self._records += 1
+                if self._source_field and isinstance(record, dict):
+                    record[self._source_field] = source
+                yield record
+
+    def _merge_first(self, records):
+        seen = set()
+        for record in records:
+            key = self._key(record)
+            if key is not None:
+                if key in seen:
+                    continue
+                seen.add(key)
+            self._unique += 1
+            yield record
+
+    def _merge_most_recent(self, records):
+        # Records are yielded in the order in which their keys were first
+        # seen
+        kept = collections.OrderedDict()
+        for record in records:
+            key = self._key(record)
+            if key is None:
+                self._unique += 1
+                yield record
+                continue
+            current = kept.get(key)
+            if current is None:
+                kept[key] = record
+                continue
+            value = self._most_recent(record)
+            if value is not None:
+                current_value = self._most_recent(current)
+                if current_value is None or value > current_value:
+                    kept[key] = record
+        self._unique += len(kept)
+        for record in kept.values():
+            yield record
+
+    def merge(self, streams):
+        """
+        Merges the streams.
+
+        :param streams: A ``dict`` of record iterables keyed by source (for
+            example, by ePO unique identifier) or a ``list`` of record
+            iterables (in which case the source is the index in the list).
+            Streams are consumed in order.
+        :return: A generator of the unique records
+        """
+        self._records = 0
+        self._unique = 0
+        records = self._iter_sources(streams)
+        if self._most_recent:
+            return self._merge_most_recent(records)
+        return self._merge_first(records)
+
+
+def merge_records(streams, key=DEFAULT_KEY_FIELD, most_recent=None,
+                  source_field=None):
+    """
+    Merges record streams, removing duplicate records (see
+    :class:`RecordMerger`).
+
+    :param streams: A ``dict`` or ``list`` of record iterables
+    :param key: (optional) The name of the field that identifies a record,
+        or a callable which returns the key for a record
+    :param most_recent: (optional) The name of a field (or a callable) used
+        to choose the most recent of the duplicate records
+    :param source_field: (optional) The name of a field to add to each
+        record, set to the source of the record
+    :return: A generator of the unique records
+    """
+    return RecordMerger(key, most_recent, source_field).merge(streams)
@@ -0,0 +1,468 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+"""
+Incremental parsers for the payloads of ePO remote command responses.
+
+Each parser accepts either a complete response payload (``bytes``) or an
+iterable of ``bytes`` chunks, and returns a generator which yields the
+records contained in the payload one at a time. Records have the same shape
+regardless of the `output format` that ePO used: a ``dict`` keyed by
+``Table.Column`` names for table rows, or a string for plain text entries
+(such as the lines returned by ``core.help``).
+"""
+
+from __future__ import absolute_import
+import codecs
+import collections
+import itertools
+import json
+import re
+from xml.etree import ElementTree
+
+# The default number of payload bytes that are decoded at a time
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+# Matches the characters which may continue a JSON number
+_NUMBER_TAIL_PATTERN = re.compile(r"[0-9.eE+-]*")
+
+# Matches a "Name: value" line in verbose/terse output
+_TEXT_FIELD_PATTERN = re.compile(r"^([A-Za-z_][\w.]*):(?: (.*))?$")
+
+# The first line of text output from ePO when a command succeeds
+_TEXT_STATUS_LINE = "OK:"
+
+
+class OutputFormat(object):
+    """
+    Constants that are used to indicate the `output format` for ePO to use when responding to a
+    remote command invocation.
+
+        +---------+-------------------------------------------------------+
+        | Type    | Description                                           |
+        +=========+=======================================================+
+        | JSON    | JSON format                                           |
+        +---------+-------------------------------------------------------+
+        | XML     | XML format                                            |
+        +---------+-------------------------------------------------------+
+        | VERBOSE | Text-based format (verbose)                           |
+        +---------+-------------------------------------------------------+
+        | TERSE   | Text-based format (terse)                             |
+        +---------+-------------------------------------------------------+
+    """
+    JSON = "json"
+    XML = "xml"
+    VERBOSE = "verbose"
+    TERSE = "terse"
+
+    @staticmethod
+    def validate(output_format):
+        """
+        Validates that the specified format is valid (json, xml, etc.). If the format is not valid
+        an exception is thrown.
+
+        :param output_format: The output format
+        """
+        if output_format not in [OutputFormat.JSON, OutputFormat.XML,
+                                 OutputFormat.VERBOSE, OutputFormat.TERSE]:
+            raise Exception("Invalid output format: {0}".format(output_format))
+
+
+def iter_payload_chunks(payload, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Splits a response payload into chunks without copying the whole payload.
+
+    :param payload: The payload (``bytes``) to split
+    :param chunk_size: (optional) The maximum size of each chunk
+    :return: A generator of ``bytes`` chunks
+    """
+    view = memoryview(payload)
+    for offset in range(0, len(view), chunk_size):
+        yield view[offset:offset + chunk_size].tobytes()
+
+
+def _iter_chunks(payload):
+    """
+    Returns an iterator of ``bytes`` chunks for a payload.
+
+    :param payload: A payload (``bytes``) or an iterable of ``bytes`` chunks
+    :return: An iterator of ``bytes`` chunks
+    """
+    if isinstance(payload, (bytes, bytearray)):
+        return iter_payload_chunks(payload)
+    return iter(payload)
+
+
+class _TextReader(object):
+    """
+    Incrementally decodes the text of a payload, keeping only the text that
+    has not been consumed yet.
+    """
+
+    def __init__(self, payload, enc):
+        self._chunks = _iter_chunks(payload)
+        self._decoder = codecs.getincrementaldecoder(enc)()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self):
+        """
+        Appends the next chunk of the payload to the text.
+
+        :return: ``False`` if the end of the payload had already been reached
+        """
+        if self.eof:
+            return False
+        try:
+            text = self._decoder.decode(next(self._chunks))
+        except StopIteration:
+            text = self._decoder.decode(b"", final=True)
+            self.eof = True
+        self.text = self.text[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """
+        Skips whitespace and returns the next character (``""`` at the end of
+        the payload).
+        """
+        while True:
+            while self.pos < len(self.text) and \
+                    self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.read_more():
+                return ""
+
+    def check_end(self):
+        """
+        Checks that only whitespace remains in the payload.
+        """
+        if self.peek():
+            raise ValueError("Extra data after JSON value")
+
+
+def _read_json_value(reader, decoder):
+    """
+    Decodes the JSON value at the current position of a reader, reading more
+    of the payload until the value is complete.
+    """
+    while True:
+        if not reader.peek():
+            raise ValueError("Unexpected end of JSON payload")
+        try:
+            value, end = decoder.raw_decode(reader.text, reader.pos)
+        except ValueError:
+            if reader.eof:
+                raise
+            reader.read_more()
+            continue
+        # A number which runs to the end of the text may continue in the
+        # next chunk (for example, "1000." followed by "25")
+        if not reader.eof and \
+                _NUMBER_TAIL_PATTERN.match(reader.text, end).end() == \
+                len(reader.text):
+            reader.read_more()
+            continue
+        reader.pos = end
+        return value
+
+
+def iter_json_records(payload, enc="utf-8", object_pairs_hook=None):
+    """
+    Incrementally parses a JSON payload, yielding one record at a time.
+
+    If the top-level JSON value is an array, each element of the array is
+    yielded as soon as it and the delimiter which follows it have been read.
+    Only the current element (and at most one chunk of look-ahead) is held in
+    memory. Any other top-level value is yielded as a single record.
+
+    Unless an ``object_pairs_hook`` is specified, the objects in the first
+    record are decoded into ``OrderedDict`` objects, so that the order of
+    its keys (which, for example, determines the columns of a CSV export)
+    is the order in the payload on every version of Python.
+
+    :param payload: The payload (``bytes``) or an iterable of ``bytes``
+        chunks containing the payload
+    :param enc: (optional) The encoding of the payload
+    :param object_pairs_hook: (optional) Hook passed to the JSON decoder
+    :return: A generator of decoded records
+    :raise ValueError: If the payload is not valid JSON
+    """
+    decoder = json.JSONDecoder(object_pairs_hook=object_pairs_hook)
+    first_decoder = decoder if object_pairs_hook else \
+        json.JSONDecoder(object_pairs_hook=collections.OrderedDict)
+    reader = _TextReader(payload, enc)
+    if reader.peek() != "[":
+        while reader.read_more():
+            pass
+        record = _read_json_value(reader, first_decoder)
+        reader.check_end()
+        yield record
+        return
+
+    reader.pos += 1
+    if reader.peek() == "]":
+        reader.pos += 1
+    else:
+        record_decoder = first_decoder
+        while True:
+            record = _read_json_value(reader, record_decoder)
+            record_decoder = decoder
+            delimiter = reader.peek()
+            if delimiter not in (",", "]"):
+                raise ValueError("Expecting ',' delimiter in JSON array")
+            reader.pos += 1
+            yield record
+            if delimiter == "]":
+                break
+    reader.check_end()
+
+
+def _to_value(value):
+    """
+    Converts the objects in a JSON value that was decoded with
+    ``object_pairs_hook=tuple`` into ``dict`` objects.
+    """
+    if isinstance(value, tuple):
+        return dict((key, _to_value(item)) for key, item in value)
+    if isinstance(value, list):
+        return [_to_value(item) for item in value]
+    return value
+
+
+def _project_json(value, fields):
+    """
+    Builds a record from a JSON value that was decoded with
+    ``object_pairs_hook=tuple``, keeping only the specified top-level keys.
+    Objects nested under the dropped keys are never converted into ``dict``
+    objects.
+    """
+    if isinstance(value, tuple):
+        return {key: _to_value(item) for key, item in value
+                if key in fields}
+    return _to_value(value)
+
+
+def iter_projected_json_records(payload, fields, enc="utf-8"):
+    """
+    Incrementally parses a JSON payload (see :func:`iter_json_records`),
+    keeping only the specified keys of each record.
+
+    The objects in the payload are decoded into tuples of ``(key, value)``
+    pairs (JSON arrays are decoded as lists, so the two cannot be
+    confused), and each record ``dict`` is built from the selected pairs
+    only, so the records that are held in memory contain just the selected
+    fields.
+
+    :param payload: The payload (``bytes``) or an iterable of ``bytes``
+        chunks containing the payload
+    :param fields: The keys to keep in each record
+    :param enc: (optional) The encoding of the payload
+    :return: A generator of decoded records
+    """
+    fields = frozenset(fields)
+    for record in iter_json_records(payload, enc, object_pairs_hook=tuple):
+        yield _project_json(record, fields)
+
+
+class _ChunkReader(object):
+    """
+    File-like object which reads from an iterator of ``bytes`` chunks.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buffer = b""
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _flatten_xml_element(element, prefix, record, fields=None):
+    """
+    Adds the values of the leaf elements beneath an element to a record,
+    keyed by their dot-separated paths.
+    """
+    for child in element:
+        name = prefix + child.tag
+        if len(child):
+            _flatten_xml_element(child, name + ".", record, fields)
+        elif fields is None or name in fields:
+            record[name] = child.text or ""
+    return record
+
+
+def _xml_record(element, fields=None):
+    """
+    Converts an XML element into a record. Elements without children are
+    converted to their text. Other elements are converted to a ``dict``
+    (``<row><Table><Column>value</Column></Table></row>`` becomes
+    ``{"Table.Column": "value"}``).
+    """
+    if not len(element):  # pylint: disable=len-as-condition
+        return element.text or ""
+    return _flatten_xml_element(element, "", {}, fields)
+
+
+def iter_xml_records(payload, fields=None):
+    """
+    Incrementally parses an XML (:const:`OutputFormat.XML`) payload, yielding
+    one record at a time.
+
+    Each child element of the ``<list>`` element in the response is yielded
+    as a record (and then discarded) as soon as it has been parsed. If the
+    response does not contain a list, the root element is yielded as a single
+    record. All values are strings.
+
+    :param payload: The payload (``bytes``) or an iterable of ``bytes``
+        chunks containing the payload
+    :param fields: (optional) The keys to keep in each record
+    :return: A generator of records
+    """
+    if fields is not None:
+        fields = frozenset(fields)
+    stack = []
+    list_depth = None
+    found_list = False
+    for event, element in ElementTree.iterparse(
+            _ChunkReader(_iter_chunks(payload)), events=("start", "end")):
+        if event == "start":
+            stack.append(element)
+            if element.tag == "list" and list_depth is None:
+                list_depth = len(stack)
+                found_list = True
+            continue
+
+        stack.pop()
+        if list_depth is not None and len(stack) == list_depth:
+            yield _xml_record(element, fields)
+            stack[-1].remove(element)
+        elif list_depth is not None and len(stack) == list_depth - 1:
+            list_depth = None
+        elif not stack and not found_list:
+            yield _xml_record(element, fields)
+
+
+def _iter_lines(chunks, enc):
+    """
+    Returns a generator of the lines (without line endings) in a payload.
+    """
+    text_decoder = codecs.getincrementaldecoder(enc)()
+    remainder = ""
+    for chunk in chunks:
+        lines = (remainder + text_decoder.decode(chunk)).split("\n")
+        remainder = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    remainder += text_decoder.decode(b"", final=True)
+    if remainder:
+        yield remainder.rstrip("\r")
+
+
+def iter_text_records(payload, enc="utf-8", fields=None):
+    """
+    Incrementally parses a text
+    (:const:`OutputFormat.VERBOSE` or
+    :const:`OutputFormat.TERSE`) payload, yielding one record at a time.
+
+    Consecutive ``Name: value`` lines are combined into a ``dict`` record,
+    with records separated by blank lines. Lines that continue a multi-line
+    value are appended to it. Any other line is yielded as a string record.
+    A leading ``OK:`` status line is skipped. All values are strings.
+
+    :param payload: The payload (``bytes``) or an iterable of ``bytes``
+        chunks containing the payload
+    :param enc: (optional) The encoding of the payload
+    :param fields: (optional) The keys to keep in each record
+    :return: A generator of records
+    """
+    if fields is not None:
+        fields = frozenset(fields)
+    record = None
+    last_name = None
+    lines = _iter_lines(_iter_chunks(payload), enc)
+    first_line = next(lines, None)
+    if first_line is not None and first_line.strip() != _TEXT_STATUS_LINE:
+        lines = itertools.chain([first_line], lines)
+    for line in lines:
+        if not line.strip():
+            if record is not None:
+                yield record
+            record = None
+            continue
+
+        match = _TEXT_FIELD_PATTERN.match(line)
+        if match:
+            if record is None:
+                record = {}
+            last_name = match.group(1)
+            if fields is None or last_name in fields:
+                record[last_name] = match.group(2) or ""
+        elif record is not None:
+            if last_name in record:
+                record[last_name] += "\n" + line
+        else:
+            yield line
+    if record is not None:
+        yield record
+
+
+# Matches the start of a payload whose top-level value is an array
+_JSON_ARRAY_START_PATTERN = re.compile(br"[ \t\n\r]*\[")
+
+
+def project_json_array(payload, fields):
+    """
+    Decodes a JSON payload whose top-level value is an array of records,
+    keeping only the specified keys of each record (see
+    :func:`iter_projected_json_records`).
+
+    :param payload: The payload (``bytes``)
+    :param fields: The keys to keep in each record
+    :return: A ``list`` of the records, or ``None`` if the top-level value
+        of the payload is not an array
+    """
+    if not _JSON_ARRAY_START_PATTERN.match(payload):
+        return None
+    return list(iter_projected_json_records(payload, fields))
+
+
+def iter_payload_records(payload, output_format=OutputFormat.JSON,
+                         fields=None):
+    """
+    Incrementally parses a response payload in the specified `output format`,
+    yielding one record at a time.
+
+    :param payload: The payload (``bytes``) or an iterable of ``bytes``
+        chunks containing the payload
+    :param output_format: (optional) The output format of the payload. The
+        list of `output formats` can be found in the :class:`OutputFormat`
+        constants class.
+    :param fields: (optional) The keys to keep in each record. If not
+        specified, all keys are kept.
+    :return: A generator of records
+    """
+    OutputFormat.validate(output_format)
+    if output_format == OutputFormat.JSON:
+        if fields is not None:
+            return iter_projected_json_records(payload, fields)
+        return iter_json_records(payload)
+    if output_format == OutputFormat.XML:
+        return iter_xml_records(payload, fields)
+    return iter_text_records(payload, fields=fields)
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import logging
+import threading
+
+from dxlclient.callbacks import ResponseCallback
+from dxlclient.exceptions import WaitTimeoutException
+
+from ._compat import monotonic
+from .deadline import _remove_async_request
+
+# Configure local logger
+logger = logging.getLogger(__name__)
+
+
+class _Connection(object):
+    """
+    The state of a single DXL client in a pool.
+    """
+
+    def __init__(self, dxl_client):
+        self.dxl_client = dxl_client
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.failed_until = 0.0
+
+
+class _TrackingResponseCallback(ResponseCallback):
+    """
+    Response callback which releases a pooled connection when the response
+    to an asynchronous request is received.
+    """
+
+    def __init__(self, pool, connection, response_callback):
+        super(_TrackingResponseCallback, self).__init__()
+        self._pool = pool
+        self.connection = connection
+        self._response_callback = response_callback
+
+    def on_response(self, response):
+        # The request is no longer tracked if it has been cancelled
+        tracked = self._pool._complete(  # pylint: disable=protected-access
+            response.request_message_id)
+        if tracked and self._response_callback:
+            self._response_callback.on_response(response)
+
+
+class DxlClientPool(object):
+    """
+    A pool of DXL clients that can be used in place of a single DXL client
+    when creating an :class:`dxlepoclient.client.EpoClient`.
+
+    Each request is sent through the connected client with the fewest
+    outstanding requests. The clients can be connected to different brokers.
+    Clients that are disconnected, or whose last request failed with a
+    connection error, are removed from rotation until they are connected
+    again and the ``failure_cooldown`` has elapsed.
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            pool = DxlClientPool([DxlClient(config1), DxlClient(config2)])
+            pool.connect()
+            epo_client = EpoClient(pool)
+    """
+
+    # The default amount of time (in seconds) that a client is kept out of
+    # rotation after a request fails with a connection error
+    DEFAULT_FAILURE_COOLDOWN = 5
+
+    def __init__(self, dxl_clients, failure_cooldown=DEFAULT_FAILURE_COOLDOWN):
+        """
+        Constructor parameters:
+
+        :param dxl_clients: The DXL clients (``list``) to pool
+        :param failure_cooldown: (optional) The amount of time (in seconds)
+            that a client is kept out of rotation after a request fails with
+            a connection error
+        """
+        if not dxl_clients:
+            raise Exception("At least one DXL client must be specified")
+        self._connections = [_Connection(dxl_client)
+                             for dxl_client in dxl_clients]
+        self._failure_cooldown = failure_cooldown
+        # The tracking callbacks of the asynchronous requests awaiting a
+        # response (keyed by message identifier)
+        self._async_requests = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disconnect()
+
+    @property
+    def dxl_clients(self):
+        """
+        The DXL clients in the pool (``tuple``)
+        """
+        return tuple(connection.dxl_client
+                     for connection in self._connections)
+
+    @property
+    def connected(self):
+        """
+        Whether at least one of the DXL clients in the pool is connected
+        """
+        return any(connection.dxl_client.connected
+                   for connection in self._connections)
+
+    def connect(self):
+        """
+        Connects each of the DXL clients in the pool that is not already
+        connected. Clients that fail to connect are kept out of rotation.
+
+        :raise Exception: If none of the clients could be connected
+        """
+        for connection in self._connections:
+            if not connection.dxl_client.connected:
+                try:
+                    connection.dxl_client.connect()
+                except Exception as ex:  # pylint: disable=broad-except
+                    logger.error("Unable to connect pooled DXL client: %s",
+                                 ex)
+                    self._mark_failed(connection)
+        if not self.connected:
+            raise Exception("Unable to connect any of the pooled DXL clients")
+
+    def disconnect(self):
+        """
+        Disconnects each of the DXL clients in the pool.
+        """
+        for connection in self._connections:
+            if connection.dxl_client.connected:
+                connection.dxl_client.disconnect()
+
+    @property
+    def stats(self):
+        """
+        A ``list`` containing a ``dict`` of load statistics for each DXL
+        client in the pool (in the order the clients were specified):
+
+        * ``connected``: Whether the client is connected
+        * ``in_rotation``: Whether the client is currently used for requests
+        * ``outstanding``: The number of requests awaiting a response
+        * ``requests``: The total number of requests sent through the client
+        * ``failures``: The number of connection failures
+        """
+        now = monotonic()
+        with self._lock:
+            return [{
+                "connected": connection.dxl_client.connected,
+                "in_rotation": self._in_rotation(connection, now),
+                "outstanding": connection.outstanding,
+                "requests": connection.requests,
+                "failures": connection.failures
+            } for connection in self._connections]
+
+    @staticmethod
+    def _in_rotation(connection, now):
+        return connection.dxl_client.connected and \
+            connection.failed_until <= now
+
+    def _acquire(self):
+        """
+        Selects the client in rotation with the fewest outstanding requests.
+
+        :return: The selected connection
+        :raise Exception: If no clients are in rotation
+        """
+        now = monotonic()
+        with self._lock:
+            selected = None
+            for connection in self._connections:
+                if self._in_rotation(connection, now) and \
+                        (selected is None or
+                         connection.outstanding < selected.outstanding):
+                    selected = connection
+            if selected is None:
+                raise Exception("No pooled DXL clients are connected")
+            selected.outstanding += 1
+            selected.requests += 1
+            return selected
+
+    def _release(self, connection):
+        with self._lock:
+            connection.outstanding -= 1
+
+    def _complete(self, message_id):
+        """
+        Stops tracking an asynchronous request and releases its connection.
+
+        :return: The response callback of the request, or ``None`` if the
+            request was not being tracked
+        """
+        with self._lock:
+            callback = self._async_requests.pop(message_id, None)
+            if callback:
+                callback.connection.outstanding -= 1
+            return callback
+
+    def _mark_failed(self, connection):
+        with self._lock:
+            connection.failures += 1
+            connection.failed_until = monotonic() + self._failure_cooldown
+
+    def sync_request(self, request, timeout):
+        """
+        Sends a request through the least-loaded DXL client in the pool and
+        waits for the response.
+
+        :param request: The DXL request to send
+        :param timeout: The maximum amount of time to wait for a response
+        :return: The DXL response
+        """
+        connection = self._acquire()
+        try:
+            return connection.dxl_client.sync_request(request, timeout=timeout)
+        except WaitTimeoutException:
+            raise
+        except Exception:
+            self._mark_failed(connection)
+            raise
+        finally:
+            self._release(connection)
+
+    def async_request(self, request, response_callback=None):
+        """
+        Sends a request through the least-loaded DXL client in the pool
+        without waiting for the response.
+
+        :param request: The DXL request to send
+        :param response_callback: (optional) The response callback to invoke
+            when the response is received
+        """
+        connection = self._acquire()
+        callback = _TrackingResponseCallback(self, connection,
+                                             response_callback)
+        # The request is tracked before it is sent, as the response can be
+        # received before the call returns
+        with self._lock:
+            self._async_requests[request.message_id] = callback
+        try:
+            connection.dxl_client.async_request(request, callback)
+        except Exception:
+            self._mark_failed(connection)
+            self._complete(request.message_id)
+            raise
+
+    def cancel_async_request(self, request):
+        """
+        Stops waiting for the response to a request that was sent with
+        :func:`async_request` (for example, once its deadline has passed).
+        The client that sent the request is released, and the response
+        callback is not invoked if the response is received later.
+
+        :param request: The DXL request
+        """
+        callback = self._complete(request.message_id)
+        if callback:
+            _remove_async_request(callback.connection.dxl_client, request)
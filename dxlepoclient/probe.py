@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import collections
+import logging
+import random
+import threading
+import time
+
+from ._compat import monotonic
+from .client import EpoClient
+
+# Configure local logger
+logger = logging.getLogger(__name__)
+
+
+class _ProbeStats(object):
+    """
+    The rolling probe statistics for a single ePO server.
+    """
+
+    def __init__(self, window_size):
+        # (succeeded, round-trip time) for the most recent probes
+        self.window = collections.deque(maxlen=window_size)
+        self.counts = {
+            "probes": 0,
+            "failures": 0,
+            "consecutive_failures": 0
+        }
+        self.ewma_rtt = None
+        self.last_probe_time = None
+        self.last_success_time = None
+        self.last_error = None
+
+    def record(self, rtt, error, smoothing):
+        self.counts["probes"] += 1
+        self.last_probe_time = time.time()
+        self.window.append((error is None, rtt))
+        if error is None:
+            self.counts["consecutive_failures"] = 0
+            self.last_success_time = self.last_probe_time
+            self.ewma_rtt = rtt if self.ewma_rtt is None else \
+                smoothing * rtt + (1 - smoothing) * self.ewma_rtt
+        else:
+            self.counts["failures"] += 1
+            self.counts["consecutive_failures"] += 1
+            self.last_error = error
+
+    def snapshot(self):
+        rtts = [rtt for succeeded, rtt in self.window if succeeded]
+        snapshot = {
+            "available": bool(self.window) and self.window[-1][0],
+            "availability": float(len(rtts)) / len(self.window)
+                            if self.window else None,
+            "rtt_ewma": self.ewma_rtt,
+            "rtt_mean": sum(rtts) / len(rtts) if rtts else None,
+            "rtt_min": min(rtts) if rtts else None,
+            "rtt_max": max(rtts) if rtts else None,
+            "last_probe_time": self.last_probe_time,
+            "last_success_time": self.last_success_time,
+            "last_error": self.last_error
+        }
+        snapshot.update(self.counts)
+        return snapshot
+
+
+# The settings and the per-server and thread state are all needed
+class ServerProber(object):  # pylint: disable=too-many-instance-attributes
+    """
+    Periodically sends a cheap remote command (``core.help`` for a single
+    command) to each known ePO server and keeps rolling round-trip time
+    (RTT) and availability statistics for each server.
+
+    This allows a slow or unavailable ePO server (or ePO DXL service) to be
+    detected without waiting for a real request to time out. Probes are sent
+    from a background thread at the configured ``interval``, randomized by
+    ``jitter`` so that multiple probers do not synchronize. A probe that does
+    not receive a response within ``response_timeout`` is counted as a
+    failure.
+
+    Probes are regular remote command invocations and count toward any rate
+    limit that is set for an ePO server (see
+    :func:`dxlepoclient.ratelimit.set_rate_limit`).
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            with ServerProber(dxl_client, interval=60) as prober:
+                ...
+                if prober.get_stats(epo_unique_id)["available"]:
+                    ...
+    """
+
+    # The command that is invoked to probe an ePO server
+    PROBE_COMMAND = "core.help"
+
+    # The parameters for the probe command (restricts the help to the probe
+    # command itself so that the response is small)
+    PROBE_PARAMS = {"prefix": PROBE_COMMAND}
+
+    def __init__(self, dxl_client, epo_unique_ids=None, interval=30,
+                 jitter=0.2, response_timeout=5, window_size=20,
+                 smoothing=0.2, service_monitor=None):
+        """
+        Constructor parameters:
+
+        :param dxl_client: The DXL client to use for communication with the
+            ePO DXL services
+        :param epo_unique_ids: (optional) The unique identifiers of the ePO
+            servers to probe. If not specified, all of the ePO servers that
+            are exposed to the DXL fabric are probed (discovered before each
+            round of probes).
+        :param interval: (optional) The average amount of time (in seconds)
+            between rounds of probes
+        :param jitter: (optional) The fraction (``0`` to less than ``1``) by
+            which each interval is randomly lengthened or shortened
+        :param response_timeout: (optional) The maximum amount of time (in
+            seconds) to wait for the response to a probe
+        :param window_size: (optional) The number of most recent probes over
+            which the availability and RTT statistics are computed
+        :param smoothing: (optional) The weight (``0`` to ``1``) given to the
+            most recent RTT in the exponentially weighted moving average
+        :param service_monitor: (optional) A started
+            :class:`dxlepoclient.discovery.ServiceRegistryMonitor` to use for
+            ePO server discovery and routing
+        """
+        if interval <= 0:
+            raise Exception("Interval must be greater than 0")
+        if not 0 <= jitter < 1:
+            raise Exception("Jitter must be between 0 and 1")
+        if response_timeout <= 0:
+            raise Exception("Response timeout must be greater than 0")
+        if window_size < 1:
+            raise Exception("Window size must be greater than 0")
+        if not 0 < smoothing <= 1:
+            raise Exception("Smoothing must be between 0 and 1")
+
+        self._dxl_client = dxl_client
+        self._epo_unique_ids = set(epo_unique_ids) if epo_unique_ids \
+            else None
+        self._interval = interval
+        self._jitter = jitter
+        self._response_timeout = response_timeout
+        self._window_size = window_size
+        self._smoothing = smoothing
+        self._service_monitor = service_monitor
+        self._epo_clients = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def interval(self):
+        """
+        The average amount of time (in seconds) between rounds of probes
+        """
+        return self._interval
+
+    @property
+    def stats(self):
+        """
+        A ``dict`` (keyed by ePO unique identifier) containing a snapshot of
+        the probe statistics for each ePO server that has been probed. The
+        statistics for each server are a ``dict``:
+
+        * ``available``: Whether the most recent probe succeeded
+        * ``availability``: The fraction of the probes in the window that
+          succeeded
+        * ``probes``: The total number of probes
+        * ``failures``: The total number of failed probes
+        * ``consecutive_failures``: The number of probes that have failed
+          since the last successful probe
+        * ``rtt_ewma``: The exponentially weighted moving average RTT (in
+          seconds) of the successful probes
+        * ``rtt_mean``, ``rtt_min``, ``rtt_max``: The mean, minimum and
+          maximum RTT (in seconds) of the successful probes in the window
+        * ``last_probe_time``: The time (seconds since the epoch) of the most
+          recent probe
+        * ``last_success_time``: The time (seconds since the epoch) of the
+          most recent successful probe
+        * ``last_error``: The error message from the most recent failed probe
+
+        Statistics that cannot be computed yet are ``None``.
+        """
+        with self._lock:
+            return dict((epo_id, stats.snapshot())
+                        for epo_id, stats in self._stats.items())
+
+    def get_stats(self, epo_unique_id):
+        """
+        Returns a snapshot of the probe statistics for an ePO server (see
+        :attr:`stats`).
+
+        :param epo_unique_id: The unique identifier of the ePO server
+        :return: The statistics (``dict``) or ``None`` if the ePO server has
+            not been probed
+        """
+        with self._lock:
+            stats = self._stats.get(epo_unique_id)
+            return stats.snapshot() if stats else None
+
+    def start(self):
+        """
+        Starts probing the ePO servers from a background thread.
+        """
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._run,
+                                        name="EpoServerProber")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops probing and waits for the background thread to exit.
+        """
+        if not self._thread:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self._stop_event.clear()
+
+    def _next_delay(self):
+        return self._interval * random.uniform(1 - self._jitter,
+                                               1 + self._jitter)
+
+    def _run(self):
+        # Spread the first round of probes across the jitter range
+        delay = random.uniform(0, self._interval * self._jitter)
+        while not self._stop_event.wait(delay):
+            try:
+                self.probe_once()
+            except Exception as ex:  # pylint: disable=broad-except
+                logger.error("Error probing ePO servers: %s", ex)
+            delay = self._next_delay()
+
+    def _discover(self):
+        """
+        Determines the ePO servers to probe.
+        """
+        if self._epo_unique_ids:
+            return self._epo_unique_ids
+        if self._service_monitor:
+            return self._service_monitor.epo_unique_ids
+        return EpoClient.lookup_epo_unique_identifiers(
+            self._dxl_client, self._response_timeout)
+
+    def _get_epo_client(self, epo_unique_id):
+        epo_client = self._epo_clients.get(epo_unique_id)
+        if not epo_client:
+            epo_client = EpoClient(self._dxl_client, epo_unique_id,
+                                   service_monitor=self._service_monitor)
+            # Probes use a shorter timeout than the minimum that is enforced
+            # for regular requests
+            epo_client._response_timeout = self._response_timeout  # pylint: disable=protected-access
+            self._epo_clients[epo_unique_id] = epo_client
+        return epo_client
+
+    def probe(self, epo_unique_id):
+        """
+        Probes an ePO server and records the result.
+
+        :param epo_unique_id: The unique identifier of the ePO server
+        :return: The round-trip time (in seconds) or ``None`` if the probe
+            failed
+        """
+        start = monotonic()
+        rtt = None
+        error = None
+        try:
+            self._get_epo_client(epo_unique_id).run_command(
+                self.PROBE_COMMAND, self.PROBE_PARAMS)
+            rtt = monotonic() - start
+        except Exception as ex:  # pylint: disable=broad-except
+            error = str(ex)
+            logger.debug("Probe of ePO '%s' failed: %s", epo_unique_id, error)
+
+        with self._lock:
+            stats = self._stats.get(epo_unique_id)
+            if not stats:
+                stats = _ProbeStats(self._window_size)
+                self._stats[epo_unique_id] = stats
+            stats.record(rtt, error, self._smoothing)
+        return rtt
+
+    def probe_once(self):
+        """
+        Performs a single round of probes (one probe per ePO server).
+        """
+        for epo_unique_id in sorted(self._discover()):
+            if self._stop_event.is_set():
+                break
+            self.probe(epo_unique_id)
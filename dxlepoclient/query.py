@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import itertools
+import json
+import re
+
+from ._compat import integer_types, string_types
+from .parsers import OutputFormat
+from .scheduler import Priority
+
+# The name of the ePO remote command used to run queries
+EXECUTE_QUERY_COMMAND = "core.executeQuery"
+
+# Valid target and field names (for example, "EPOLeafNode.NodeName")
+_NAME_PATTERN = re.compile(r"^[A-Za-z_][\w]*(\.[A-Za-z_][\w]*)*$")
+
+
+def _check_name(name):
+    if not isinstance(name, string_types) or not _NAME_PATTERN.match(name):
+        raise Exception("Invalid field name: {0}".format(name))
+    return name
+
+
+def _literal(value):
+    """
+    Returns the ePO query language literal for a value.
+    """
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, integer_types + (float,)):
+        return str(value)
+    if isinstance(value, string_types):
+        return json.dumps(value)
+    return json.dumps(str(value))
+
+
+class Condition(object):
+    """
+    A condition in the ``where`` clause of a query (see
+    :class:`QueryBuilder`). Conditions are created with the static methods of
+    this class and can be combined with :func:`and_`, :func:`or_` and
+    :func:`not_`.
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            Condition.or_(
+                Condition.eq("EPOComputerProperties.OSType", "Linux"),
+                Condition.starts_with("EPOLeafNode.NodeName", "srv"))
+    """
+
+    def __init__(self, expression):
+        self._expression = expression
+
+    def __str__(self):
+        return self._expression
+
+    def __repr__(self):
+        return "Condition({0!r})".format(self._expression)
+
+    def __eq__(self, other):
+        return isinstance(other, Condition) and \
+            self._expression == other._expression
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._expression)
+
+    @staticmethod
+    def _compare(operator, field, value):
+        return Condition("({0} {1} {2})".format(operator, _check_name(field),
+                                                _literal(value)))
+
+    @staticmethod
+    def eq(field, value):
+        """
+        The field is equal to the value
+        """
+        return Condition._compare("eq", field, value)
+
+    @staticmethod
+    def ne(field, value):
+        """
+        The field is not equal to the value
+        """
+        return Condition._compare("ne", field, value)
+
+    @staticmethod
+    def lt(field, value):
+        """
+        The field is less than the value
+        """
+        return Condition._compare("lt", field, value)
+
+    @staticmethod
+    def le(field, value):
+        """
+        The field is less than or equal to the value
+        """
+        return Condition._compare("le", field, value)
+
+    @staticmethod
+    def gt(field, value):
+        """
+        The field is greater than the value
+        """
+        return Condition._compare("gt", field, value)
+
+    @staticmethod
+    def ge(field, value):
+        """
+        The field is greater than or equal to the value
+        """
+        return Condition._compare("ge", field, value)
+
+    @staticmethod
+    def contains(field, value):
+        """
+        The field contains the value
+        """
+        return Condition._compare("contains", field, value)
+
+    @staticmethod
+    def starts_with(field, value):
+        """
+        The field starts with the value
+        """
+        return Condition._compare("startsWith", field, value)
+
+    @staticmethod
+    def ends_with(field, value):
+        """
+        The field ends with the value
+        """
+        return Condition._compare("endsWith", field, value)
+
+    @staticmethod
+    def is_blank(field):
+        """
+        The field is blank
+        """
+        return Condition("(isBlank {0})".format(_check_name(field)))
+
+    @staticmethod
+    def is_not_blank(field):
+        """
+        The field is not blank
+        """
+        return Condition("(isNotBlank {0})".format(_check_name(field)))
+
+    @staticmethod
+    def and_(*conditions):
+        """
+        All of the conditions are true
+        """
+        return Condition._combine("and", conditions)
+
+    @staticmethod
+    def or_(*conditions):
+        """
+        At least one of the conditions is true
+        """
+        return Condition._combine("or", conditions)
+
+    @staticmethod
+    def not_(condition):
+        """
+        The condition is false
+        """
+        return Condition("(not {0})".format(Condition._check(condition)))
+
+    @staticmethod
+    def _check(condition):
+        if not isinstance(condition, Condition):
+            raise Exception("Invalid condition: {0}".format(condition))
+        return condition
+
+    @staticmethod
+    def _combine(operator, conditions):
+        if not conditions:
+            raise Exception("At least one condition must be specified")
+        if len(conditions) == 1:
+            return Condition._check(conditions[0])
+        return Condition("({0} {1})".format(
+            operator, " ".join(str(Condition._check(condition))
+                               for condition in conditions)))
+
+
+class QueryBuilder(object):
+    """
+    Builds an ePO query and compiles it into the parameters of the
+    ``core.executeQuery`` remote command, so that filtering, projection and
+    ordering are performed by ePO and only the requested rows and columns
+    are transferred.
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            query = QueryBuilder("EPOLeafNode") \\
+                .select("EPOLeafNode.NodeName", "EPOLeafNode.AgentGUID") \\
+                .where(Condition.eq("EPOComputerProperties.OSType", "Linux")) \\
+                .order_by("EPOLeafNode.NodeName") \\
+                .limit(100)
+
+            for system in query.iter_records(epo_client):
+                print(system["EPOLeafNode.NodeName"])
+
+    ``core.executeQuery`` has no parameter for limiting the number of rows
+    returned. A :func:`limit` is applied as the response is parsed: records
+    after the limit are not decoded, but they are still transferred.
+    """
+
+    def __init__(self, target):
+        """
+        Constructor parameters:
+
+        :param target: The name of the table to query (for example,
+            ``EPOLeafNode``)
+        """
+        self._target = _check_name(target)
+        self._select = []
+        self._where = []
+        self._order = []
+        self._limit = None
+
+    def select(self, *fields):
+        """
+        Adds columns to return. If no columns are selected, ePO returns the
+        default columns for the target.
+
+        :param fields: The names of the columns (``Table.Column``)
+        :return: This builder
+        """
+        self._select.extend(_check_name(field) for field in fields)
+        return self
+
+    def where(self, *conditions):
+        """
+        Adds conditions (see :class:`Condition`) that returned rows must
+        match. Conditions from multiple calls are combined with ``and``.
+
+        :param conditions: The conditions
+        :return: This builder
+        """
+        self._where.extend(Condition._check(condition)  # pylint: disable=protected-access
+                           for condition in conditions)
+        return self
+
+    def order_by(self, field, descending=False):
+        """
+        Adds a column to order the rows by.
+
+        :param field: The name of the column
+        :param descending: (optional) Whether to order in descending order
+        :return: This builder
+        """
+        self._order.append("({0} {1})".format("desc" if descending else "asc",
+                                              _check_name(field)))
+        return self
+
+    def limit(self, count):
+        """
+        Sets the maximum number of rows to return.
+
+        :param count: The maximum number of rows
+        :return: This builder
+        """
+        if count < 0:
+            raise Exception("Limit must be greater than or equal to 0")
+        self._limit = count
+        return self
+
+    def to_params(self):
+        """
+        Compiles the query into the parameters of the ``core.executeQuery``
+        remote command.
+
+        :return: The parameters (``dict``)
+        """
+        params = {"target": self._target}
+        if self._select:
+            params["select"] = "(select {0})".format(" ".join(self._select))
+        if self._where:
+            params["where"] = "(where {0})".format(
+                Condition.and_(*self._where))
+        if self._order:
+            params["order"] = "(order {0})".format(" ".join(self._order))
+        return params
+
+    def iter_records(self, epo_client, priority=Priority.NORMAL,
+                     deadline=None):
+        """
+        Runs the query and returns a generator which yields the matching
+        rows one at a time (see
+        :func:`dxlepoclient.client.EpoClient.iter_records`).
+
+        :param epo_client: The :class:`dxlepoclient.client.EpoClient` to run
+            the query through
+        :param priority: (optional) The priority of the request
+        :param deadline: (optional) A :class:`dxlepoclient.deadline.Deadline`
+            for the request
+        :return: A generator which yields each row (``dict``)
+        """
+        records = epo_client.iter_records(
+            EXECUTE_QUERY_COMMAND, self.to_params(), OutputFormat.JSON,
+            priority, deadline)
+        if self._limit is not None:
+            records = itertools.islice(records, self._limit)
+        return records
+
+    def run(self, epo_client, priority=Priority.NORMAL, deadline=None):
+        """
+        Runs the query and returns the matching rows.
+
+        :param epo_client: The :class:`dxlepoclient.client.EpoClient` to run
+            the query through
+        :param priority: (optional) The priority of the request
+        :param deadline: (optional) A :class:`dxlepoclient.deadline.Deadline`
+            for the request
+        :return: A ``list`` of rows (``dict``)
+        """
+        return list(self.iter_records(epo_client, priority, deadline))
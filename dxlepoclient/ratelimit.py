@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import logging
+import threading
+import time
+
+from ._compat import monotonic
+
+# Configure local logger
+logger = logging.getLogger(__name__)
+
+
+class RateLimitPolicy(object):
+    """
+    Constants that are used to indicate what a :class:`RateLimiter` does when
+    a request is made while no tokens are available.
+
+        +-----------+-----------------------------------------------------+
+        | Type      | Description                                         |
+        +===========+=====================================================+
+        | BLOCK     | Wait until a token becomes available                |
+        +-----------+-----------------------------------------------------+
+        | FAIL_FAST | Raise an exception immediately                      |
+        +-----------+-----------------------------------------------------+
+    """
+    BLOCK = "block"
+    FAIL_FAST = "fail_fast"
+
+    @staticmethod
+    def validate(policy):
+        """
+        Validates that the specified policy is valid (block, fail_fast). If
+        the policy is not valid an exception is thrown.
+
+        :param policy: The rate limit policy
+        """
+        if policy not in [RateLimitPolicy.BLOCK, RateLimitPolicy.FAIL_FAST]:
+            raise Exception("Invalid rate limit policy: {0}".format(policy))
+
+
+class RateLimiter(object):  # pylint: disable=too-many-instance-attributes
+    """
+    Token bucket rate limiter.
+
+    Tokens are added to the bucket at ``rate`` tokens per second, up to a
+    maximum of ``burst`` tokens. Each request consumes one token (a request
+    which carries several commands consumes one token per command).
+    Instances are thread-safe.
+    """
+
+    def __init__(self, rate, burst=None, policy=RateLimitPolicy.BLOCK,
+                 max_wait=None):
+        """
+        Constructor parameters:
+
+        :param rate: The number of requests per second that are allowed
+        :param burst: (optional) The maximum number of requests that can be
+            made back-to-back (the size of the bucket). Defaults to ``rate``
+            (with a minimum of ``1``).
+        :param policy: (optional) What to do when no tokens are available.
+            The list of `policies` can be found in the
+            :class:`RateLimitPolicy` constants class.
+        :param max_wait: (optional) The maximum amount of time (in seconds)
+            to wait for a token when the policy is
+            :const:`RateLimitPolicy.BLOCK`. If a token would not be
+            available within this time, an exception is raised instead of
+            waiting.
+        """
+        if rate <= 0:
+            raise Exception("Rate must be greater than 0")
+        if burst is None:
+            burst = max(rate, 1)
+        if burst < 1:
+            raise Exception("Burst must be greater than or equal to 1")
+        RateLimitPolicy.validate(policy)
+
+        self._rate = float(rate)
+        self._burst = float(burst)
+        self._policy = policy
+        self._max_wait = max_wait
+        self._tokens = self._burst
+        self._last_refill = monotonic()
+        self._lock = threading.Lock()
+        # The settings, the bucket state and the lock account for the other
+        # attributes, so the counters are kept together
+        self._metrics = {
+            "acquired": 0,
+            "rejected": 0,
+            "waits": 0,
+            "total_wait_time": 0.0,
+            "max_wait_time": 0.0
+        }
+
+    @property
+    def rate(self):
+        """
+        The number of requests per second that are allowed
+        """
+        return self._rate
+
+    @property
+    def burst(self):
+        """
+        The maximum number of requests that can be made back-to-back
+        """
+        return self._burst
+
+    @property
+    def policy(self):
+        """
+        What to do when no tokens are available (see :class:`RateLimitPolicy`)
+        """
+        return self._policy
+
+    @property
+    def metrics(self):
+        """
+        A ``dict`` containing a snapshot of the limiter's metrics:
+
+        * ``acquired``: The number of requests that were allowed
+        * ``rejected``: The number of requests that were rejected
+        * ``waits``: The number of requests that had to wait for a token
+        * ``total_wait_time``: The total time (in seconds) spent waiting
+        * ``max_wait_time``: The longest time (in seconds) spent waiting
+        """
+        with self._lock:
+            return dict(self._metrics)
+
+    def _refill(self, now):
+        self._tokens = min(
+            self._burst,
+            self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+
+    def acquire(self, timeout=None, count=1):
+        """
+        Acquires tokens, waiting for them to become available if the policy
+        is :const:`RateLimitPolicy.BLOCK`.
+
+        :param timeout: (optional) The maximum amount of time (in seconds) to
+            wait for the tokens (for example, the remaining time of a
+            deadline). If both this and ``max_wait`` are set, the shorter of
+            the two applies.
+        :param count: (optional) The number of tokens to acquire
+        :raise Exception: If the tokens are not available and the policy is
+            :const:`RateLimitPolicy.FAIL_FAST` (or the wait would exceed
+            ``max_wait`` or ``timeout``).
+        :return: The amount of time (in seconds) spent waiting for the tokens
+        """
+        if count < 1:
+            raise Exception("Count must be greater than 0")
+        with self._lock:
+            self._refill(monotonic())
+            if self._tokens >= count:
+                self._tokens -= count
+                self._metrics["acquired"] += count
+                return 0.0
+
+            wait = (count - self._tokens) / self._rate
+            limits = [limit for limit in [self._max_wait, timeout]
+                      if limit is not None]
+            if self._policy == RateLimitPolicy.FAIL_FAST or \
+                    (limits and wait > min(limits)):
+                self._metrics["rejected"] += count
+                raise Exception(
+                    "Rate limit exceeded ({0:g} requests/second)".format(
+                        self._rate))
+
+            # Reserve the tokens now (the bucket goes into debt) so that
+            # concurrent waiters are served in order
+            self._tokens -= count
+            self._metrics["acquired"] += count
+            self._metrics["waits"] += 1
+            self._metrics["total_wait_time"] += wait
+            self._metrics["max_wait_time"] = max(
+                self._metrics["max_wait_time"], wait)
+
+        time.sleep(wait)
+        return wait
+
+
+# The rate limiters for each ePO (keyed by ePO unique identifier). These are
+# shared by all clients in the process.
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def set_rate_limit(epo_unique_id, rate, burst=None,
+                   policy=RateLimitPolicy.BLOCK, max_wait=None):
+    """
+    Sets the client-side rate limit for requests to the specified ePO server.
+
+    The limit is shared by every :class:`dxlepoclient.client.EpoClient`
+    instance (and thread) in the process that communicates with the ePO
+    server. Setting a new limit replaces the existing one.
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            # Allow 20 requests/second, with bursts of up to 50 requests
+            set_rate_limit("myEpo", 20, burst=50)
+
+    :param epo_unique_id: The unique identifier of the ePO server
+    :param rate: The number of requests per second that are allowed
+    :param burst: (optional) The maximum number of requests that can be made
+        back-to-back. Defaults to ``rate``.
+    :param policy: (optional) What to do when no tokens are available. The
+        list of `policies` can be found in the :class:`RateLimitPolicy`
+        constants class.
+    :param max_wait: (optional) The maximum amount of time (in seconds) to
+        wait for a token when the policy is :const:`RateLimitPolicy.BLOCK`
+    :return: The :class:`RateLimiter` for the ePO server
+    """
+    rate_limiter = RateLimiter(rate, burst, policy, max_wait)
+    with _rate_limiters_lock:
+        _rate_limiters[epo_unique_id] = rate_limiter
+    logger.debug("Rate limit for ePO '%s' set to %g requests/second "
+                 "(burst: %g, policy: %s)", epo_unique_id, rate_limiter.rate,
+                 rate_limiter.burst, policy)
+    return rate_limiter
+
+
+def get_rate_limiter(epo_unique_id):
+    """
+    Returns the rate limiter for the specified ePO server.
+
+    :param epo_unique_id: The unique identifier of the ePO server
+    :return: The :class:`RateLimiter` for the ePO server or ``None`` if no
+        rate limit has been set
+    """
+    return _rate_limiters.get(epo_unique_id)
+
+
+def _acquire_rate_limit(epo_unique_id, deadline=None, count=1):
+    """
+    Acquires tokens from the rate limiter for the specified ePO server (if a
+    rate limit has been set).
+
+    :param epo_unique_id: The unique identifier of the ePO server
+    :param deadline: (optional) A :class:`dxlepoclient.deadline.Deadline`
+        which bounds the wait for the tokens
+    :param count: (optional) The number of tokens to acquire
+    :raise Exception: If the tokens are rejected by the rate limiter
+        (including when they would not be available before the deadline)
+    """
+    rate_limiter = get_rate_limiter(epo_unique_id)
+    if rate_limiter:
+        rate_limiter.acquire(deadline.remaining if deadline else None, count)
+
+
+def remove_rate_limit(epo_unique_id):
+    """
+    Removes the rate limit for the specified ePO server.
+
+    :param epo_unique_id: The unique identifier of the ePO server
+    """
+    with _rate_limiters_lock:
+        _rate_limiters.pop(epo_unique_id, None)
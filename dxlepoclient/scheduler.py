@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import collections
+import contextlib
+import threading
+
+from ._compat import monotonic
+from .deadline import _wait, _wake_on_cancel
+
+
+class Priority(object):
+    """
+    Constants that are used to indicate the `priority` of a remote command
+    invocation when a :class:`RequestScheduler` is in use.
+
+        +-------------+---------------------------------------------------+
+        | Type        | Description                                       |
+        +=============+===================================================+
+        | INTERACTIVE | Requests made on behalf of a waiting user         |
+        +-------------+---------------------------------------------------+
+        | NORMAL      | Default priority                                  |
+        +-------------+---------------------------------------------------+
+        | BULK        | Background and batch requests                     |
+        +-------------+---------------------------------------------------+
+    """
+    INTERACTIVE = "interactive"
+    NORMAL = "normal"
+    BULK = "bulk"
+
+    @staticmethod
+    def validate(priority):
+        """
+        Validates that the specified priority is valid (interactive, normal,
+        bulk). If the priority is not valid an exception is thrown.
+
+        :param priority: The priority
+        """
+        if priority not in [Priority.INTERACTIVE, Priority.NORMAL,
+                            Priority.BULK]:
+            raise Exception("Invalid priority: {0}".format(priority))
+
+
+class _Lane(object):
+    """
+    The state of a single priority lane.
+    """
+
+    def __init__(self, concurrency, weight):
+        self.concurrency = concurrency
+        self.weight = float(weight)
+        self.queue = collections.deque()
+        self.in_flight = 0
+        self.virtual_time = 0.0
+        self.metrics = {
+            "dispatched": 0,
+            "total_wait_time": 0.0,
+            "max_wait_time": 0.0
+        }
+
+    def record_dispatch(self, wait_time):
+        """
+        Updates the metrics for a request that has been dispatched after
+        waiting in the queue for ``wait_time`` seconds.
+        """
+        self.in_flight += 1
+        self.metrics["dispatched"] += 1
+        self.metrics["total_wait_time"] += wait_time
+        self.metrics["max_wait_time"] = max(self.metrics["max_wait_time"],
+                                            wait_time)
+
+
+class _Ticket(object):
+    """
+    A request that is waiting to be dispatched.
+    """
+    __slots__ = ["enqueued", "granted"]
+
+    def __init__(self):
+        self.enqueued = monotonic()
+        self.granted = False
+
+
+class RequestScheduler(object):
+    """
+    Dispatches requests from priority lanes (see :class:`Priority`).
+
+    Each lane has its own concurrency budget (the maximum number of requests
+    from the lane that can be in flight at once) and a weight. The scheduler
+    also limits the total number of requests in flight. When capacity becomes
+    available, waiting requests are dispatched from the lanes in proportion
+    to their weights (weighted-fair queueing), so a backlog of bulk requests
+    cannot hold up interactive requests.
+
+    A scheduler can be shared by multiple
+    :class:`dxlepoclient.client.EpoClient` instances. Instances are
+    thread-safe.
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            scheduler = RequestScheduler(max_concurrency=8)
+            epo_client = EpoClient(dxl_client, scheduler=scheduler)
+
+            # Bypasses any queued bulk requests
+            epo_client.run_command("system.find", {"searchText": "mySystem"},
+                                   priority=Priority.INTERACTIVE)
+    """
+
+    # The default concurrency budget for each lane
+    DEFAULT_LANE_CONCURRENCY = {
+        Priority.INTERACTIVE: 4,
+        Priority.NORMAL: 4,
+        Priority.BULK: 2
+    }
+
+    # The default weight for each lane
+    DEFAULT_LANE_WEIGHTS = {
+        Priority.INTERACTIVE: 8,
+        Priority.NORMAL: 4,
+        Priority.BULK: 1
+    }
+
+    def __init__(self, max_concurrency=8, lane_concurrency=None,
+                 lane_weights=None):
+        """
+        Constructor parameters:
+
+        :param max_concurrency: (optional) The maximum total number of
+            requests that can be in flight at once
+        :param lane_concurrency: (optional) A ``dict`` containing the
+            concurrency budget for one or more lanes (keyed by
+            :class:`Priority`). Lanes that are not specified use the
+            :const:`DEFAULT_LANE_CONCURRENCY` values.
+        :param lane_weights: (optional) A ``dict`` containing the weight for
+            one or more lanes (keyed by :class:`Priority`). Lanes that are
+            not specified use the :const:`DEFAULT_LANE_WEIGHTS` values.
+        """
+        if max_concurrency < 1:
+            raise Exception("Maximum concurrency must be greater than 0")
+        concurrency = dict(self.DEFAULT_LANE_CONCURRENCY)
+        concurrency.update(lane_concurrency or {})
+        weights = dict(self.DEFAULT_LANE_WEIGHTS)
+        weights.update(lane_weights or {})
+
+        self._lanes = {}
+        for priority, lane_limit in concurrency.items():
+            Priority.validate(priority)
+            if lane_limit < 1 or weights[priority] <= 0:
+                raise Exception(
+                    "Invalid concurrency or weight for lane: " + priority)
+            self._lanes[priority] = _Lane(lane_limit, weights[priority])
+
+        self._max_concurrency = max_concurrency
+        self._in_flight = 0
+        self._virtual_time = 0.0
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+
+    @property
+    def max_concurrency(self):
+        """
+        The maximum total number of requests that can be in flight at once
+        """
+        return self._max_concurrency
+
+    @property
+    def metrics(self):
+        """
+        A ``dict`` (keyed by :class:`Priority`) containing a snapshot of the
+        metrics for each lane. The metrics for each lane are a ``dict``:
+
+        * ``queue_depth``: The number of requests waiting to be dispatched
+        * ``in_flight``: The number of requests currently in flight
+        * ``dispatched``: The number of requests that have been dispatched
+        * ``total_wait_time``: The total time (in seconds) that dispatched
+          requests spent waiting in the queue
+        * ``max_wait_time``: The longest time (in seconds) that a dispatched
+          request spent waiting in the queue
+        """
+        with self._lock:
+            return dict((priority, dict(lane.metrics,
+                                        queue_depth=len(lane.queue),
+                                        in_flight=lane.in_flight))
+                        for priority, lane in self._lanes.items())
+
+    def _dispatch(self):
+        """
+        Grants waiting requests while capacity is available. Must be called
+        with the lock held.
+        """
+        granted = False
+        while self._in_flight < self._max_concurrency:
+            lane = None
+            for candidate in self._lanes.values():
+                if candidate.queue and \
+                        candidate.in_flight < candidate.concurrency and \
+                        (lane is None or
+                         candidate.virtual_time < lane.virtual_time):
+                    lane = candidate
+            if lane is None:
+                break
+
+            ticket = lane.queue.popleft()
+            ticket.granted = True
+            lane.record_dispatch(monotonic() - ticket.enqueued)
+            self._in_flight += 1
+            self._virtual_time = lane.virtual_time
+            lane.virtual_time += 1 / lane.weight
+            granted = True
+        if granted:
+            self._condition.notify_all()
+
+    def acquire(self, priority=Priority.NORMAL, deadline=None):
+        """
+        Waits until a request with the specified priority can be dispatched.
+        Each call must be followed by a call to :func:`release`.
+
+        :param priority: (optional) The priority of the request
+        :param deadline: (optional) A :class:`dxlepoclient.deadline.Deadline`.
+            If it expires or is cancelled before the request is dispatched,
+            the request is removed from the queue and an exception is
+            raised.
+        :raise Exception: If the deadline expires or is cancelled before the
+            request is dispatched
+        """
+        Priority.validate(priority)
+        lane = self._lanes[priority]
+        ticket = _Ticket()
+        with _wake_on_cancel(deadline, self._condition), self._lock:
+            if not lane.queue and not lane.in_flight:
+                # A lane that was idle does not accumulate credit
+                lane.virtual_time = max(lane.virtual_time, self._virtual_time)
+            lane.queue.append(ticket)
+            self._dispatch()
+            while not ticket.granted:
+                if deadline and (deadline.cancelled or deadline.expired):
+                    lane.queue.remove(ticket)
+                    deadline.check()
+                _wait(self._condition, deadline)
+
+    def release(self, priority=Priority.NORMAL):
+        """
+        Indicates that a request that was dispatched via :func:`acquire` has
+        completed.
+
+        :param priority: (optional) The priority of the request
+        """
+        with self._lock:
+            self._lanes[priority].in_flight -= 1
+            self._in_flight -= 1
+            self._dispatch()
+
+    @contextlib.contextmanager
+    def slot(self, priority=Priority.NORMAL, deadline=None):
+        """
+        Context manager which acquires a slot for a request with the
+        specified priority and releases it on exit.
+
+        :param priority: (optional) The priority of the request
+        :param deadline: (optional) A :class:`dxlepoclient.deadline.Deadline`
+            (see :func:`acquire`)
+        """
+        self.acquire(priority, deadline)
+        try:
+            yield
+        finally:
+            self.release(priority)
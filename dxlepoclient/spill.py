@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import logging
+import mmap
+import tempfile
+
+from .parsers import DEFAULT_CHUNK_SIZE, OutputFormat, iter_payload_records
+
+# Configure local logger
+logger = logging.getLogger(__name__)
+
+
+class SpilledPayload(object):
+    """
+    A response payload that has been written to a temporary file and is read
+    back through a read-only memory map.
+
+    The pages of the memory map are backed by the file rather than by
+    process memory, so the operating system can reclaim them under memory
+    pressure, and parsing the payload (see :func:`iter_records`) only holds
+    one chunk and one record in memory at a time. The temporary file is
+    removed from the file system when it is created and its space is
+    released when the payload is closed.
+
+    Instances are iterable, yielding the payload in ``bytes`` chunks, and
+    can be passed to the functions in :mod:`dxlepoclient.parsers`.
+    """
+
+    def __init__(self, payload, directory=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Constructor parameters:
+
+        :param payload: The payload (``bytes``) to write to the file
+        :param directory: (optional) The directory to create the temporary
+            file in. Defaults to the system temporary directory.
+        :param chunk_size: (optional) The size of the chunks to read the
+            payload in
+        """
+        self._chunk_size = chunk_size
+        self._size = len(payload)
+        self._file = tempfile.TemporaryFile(dir=directory)
+        self._mmap = None
+        try:
+            self._file.write(payload)
+            self._file.flush()
+            # Empty files cannot be memory-mapped
+            if self._size:
+                self._mmap = mmap.mmap(self._file.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def closed(self):
+        """
+        Whether the payload has been closed
+        """
+        return self._file is None
+
+    def __iter__(self):
+        if self._file is None:
+            raise Exception("Spilled payload is closed")
+        if self._mmap is None:
+            return iter([])
+        return self._iter_chunks(self._mmap)
+
+    def _iter_chunks(self, view):
+        for offset in range(0, self._size, self._chunk_size):
+            yield view[offset:offset + self._chunk_size]
+
+    def iter_records(self, output_format=OutputFormat.JSON, fields=None,
+                     close=True):
+        """
+        Incrementally parses the payload, yielding one record at a time (see
+        :func:`dxlepoclient.parsers.iter_payload_records`).
+
+        :param output_format: (optional) The output format of the payload
+        :param fields: (optional) The keys to keep in each record
+        :param close: (optional) Whether to close the payload once the
+            generator is exhausted or closed
+        :return: A generator of records
+        """
+        try:
+            for record in iter_payload_records(self, output_format, fields):
+                yield record
+        finally:
+            if close:
+                self.close()
+
+    def close(self):
+        """
+        Closes the memory map and removes the temporary file.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def iter_response_records(response, output_format=OutputFormat.JSON,
+                          fields=None, threshold=None, directory=None):
+    """
+    Incrementally parses the payload of a DXL response, yielding one record
+    at a time (see :func:`dxlepoclient.parsers.iter_payload_records`).
+
+    If the payload is larger than ``threshold`` bytes, it is first written
+    to a :class:`SpilledPayload` and released from the response.
+
+    :param response: The DXL response
+    :param output_format: (optional) The output format of the payload
+    :param fields: (optional) The keys to keep in each record
+    :param threshold: (optional) The payload size (in bytes) above which the
+        payload is spilled. Payloads are never spilled if ``None``.
+    :param directory: (optional) The directory to spill the payload to
+    :return: A generator of records
+    """
+    if threshold is None or len(response.payload) <= threshold:
+        return iter_payload_records(response.payload, output_format, fields)
+    spilled = SpilledPayload(response.payload, directory)
+    logger.debug("Spilled %d byte response to a temporary file", len(spilled))
+    # Release the in-memory payload
+    response.payload = None
+    return spilled.iter_records(output_format, fields)
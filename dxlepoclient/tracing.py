@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import logging
+
+from ._version import __version__
+
+# Configure local logger
+logger = logging.getLogger(__name__)
+
+
+class SpanName(object):
+    """
+    Constants for the names of the spans that are created by the client.
+
+        +------------------+-------------------------------------------------+
+        | Name             | Description                                     |
+        +==================+=================================================+
+        | COMMAND          | An ePO remote command invocation                |
+        +------------------+-------------------------------------------------+
+        | DISCOVERY        | ePO service discovery when a client is created  |
+        +------------------+-------------------------------------------------+
+        | REGISTRY_QUERY   | A DXL service registry query (a child of the    |
+        |                  | discovery span)                                 |
+        +------------------+-------------------------------------------------+
+    """
+    COMMAND = "epo.command"
+    DISCOVERY = "epo.discovery"
+    REGISTRY_QUERY = "dxl.service_registry.query"
+
+
+class SpanAttribute(object):
+    """
+    Constants for the names of the attributes that are set on spans.
+
+        +------------------+-------------------------------------------------+
+        | Name             | Description                                     |
+        +==================+=================================================+
+        | EPO_UNIQUE_ID    | The unique identifier of the ePO server         |
+        +------------------+-------------------------------------------------+
+        | COMMAND          | The name of the remote command                  |
+        +------------------+-------------------------------------------------+
+        | OUTPUT_FORMAT    | The output format of the remote command         |
+        +------------------+-------------------------------------------------+
+        | ROUTE            | The ePO DXL service used (``commands`` or       |
+        |                  | ``remote``), or ``cache`` if the response was   |
+        |                  | returned from the cache                         |
+        +------------------+-------------------------------------------------+
+        | REQUEST_SIZE     | The size (in bytes) of the request payload      |
+        +------------------+-------------------------------------------------+
+        | RESPONSE_SIZE    | The size (in bytes) of the response payload     |
+        +------------------+-------------------------------------------------+
+        | MESSAGE_ID       | The DXL message identifier of the request       |
+        +------------------+-------------------------------------------------+
+        | ERROR_CODE       | The error code of a DXL error response          |
+        +------------------+-------------------------------------------------+
+        | SERVICE_TYPE     | The service type of a service registry query    |
+        +------------------+-------------------------------------------------+
+        | CACHE_HIT        | Whether a service registry response was returned|
+        |                  | from the cache                                  |
+        +------------------+-------------------------------------------------+
+    """
+    EPO_UNIQUE_ID = "epo.unique_id"
+    COMMAND = "epo.command"
+    OUTPUT_FORMAT = "epo.output_format"
+    ROUTE = "epo.route"
+    REQUEST_SIZE = "dxl.request.size"
+    RESPONSE_SIZE = "dxl.response.size"
+    MESSAGE_ID = "dxl.message_id"
+    ERROR_CODE = "dxl.error_code"
+    SERVICE_TYPE = "dxl.service_type"
+    CACHE_HIT = "cache.hit"
+
+
+class Span(object):
+    """
+    A timed operation in a trace. This base class does nothing; tracing
+    libraries are integrated by subclassing :class:`Tracer` and this class.
+
+    Spans are used as context managers. An exception raised within the
+    ``with`` block is recorded on the span before it ends.
+    """
+
+    def set_attribute(self, key, value):
+        """
+        Sets an attribute of the span.
+
+        :param key: The name of the attribute (see :class:`SpanAttribute`)
+        :param value: The value of the attribute
+        """
+
+    def record_error(self, error):
+        """
+        Records that the operation failed.
+
+        :param error: The exception
+        """
+
+    def end(self):
+        """
+        Ends the span.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_val is not None:
+            self.record_error(exc_val)
+        self.end()
+
+
+class Tracer(object):
+    """
+    Creates the spans for the operations performed by the client (see
+    :func:`set_tracer`). This base class creates spans which do nothing.
+
+    A subclass must make a span that is started while another span is open
+    in the same thread a child of that span, as
+    :class:`OpenTelemetryTracer` does.
+    """
+
+    # The span returned by this class
+    _NOOP_SPAN = Span()
+
+    def start_span(self, name, attributes=None):  # pylint: disable=unused-argument
+        """
+        Starts a span.
+
+        :param name: The name of the span (see :class:`SpanName`)
+        :param attributes: (optional) A ``dict`` of attributes to set on the
+            span
+        :return: The :class:`Span`
+        """
+        return self._NOOP_SPAN
+
+
+class _OpenTelemetrySpan(Span):
+    """
+    Wraps an OpenTelemetry span, which is the current span until it ends.
+    """
+
+    def __init__(self, trace, context, span):
+        self._trace = trace
+        self._context = context
+        self._span = span
+        self._token = context.attach(trace.set_span_in_context(span))
+
+    def set_attribute(self, key, value):
+        if value is not None:
+            self._span.set_attribute(key, value)
+
+    def record_error(self, error):
+        self._span.record_exception(error)
+        self._span.set_status(self._trace.Status(
+            self._trace.StatusCode.ERROR, str(error)))
+
+    def end(self):
+        self._context.detach(self._token)
+        self._span.end()
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Creates OpenTelemetry spans. The ``opentelemetry-api`` package must be
+    installed.
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            from dxlepoclient.tracing import OpenTelemetryTracer, set_tracer
+
+            set_tracer(OpenTelemetryTracer())
+    """
+
+    def __init__(self, tracer=None):
+        """
+        Constructor parameters:
+
+        :param tracer: (optional) The OpenTelemetry tracer to create spans
+            with. Defaults to the tracer for this library from the global
+            tracer provider.
+        :raise Exception: If OpenTelemetry is not installed
+        """
+        try:
+            from opentelemetry import context, trace
+        except ImportError:
+            raise Exception("OpenTelemetry is not installed (install the "
+                            "'opentelemetry-api' package)")
+        self._context = context
+        self._trace = trace
+        self._tracer = tracer or trace.get_tracer("dxlepoclient", __version__)
+
+    def start_span(self, name, attributes=None):
+        return _OpenTelemetrySpan(
+            self._trace, self._context,
+            self._tracer.start_span(name, attributes=dict(
+                (key, value) for key, value in (attributes or {}).items()
+                if value is not None)))
+
+
+# The tracer used by all clients in the process
+_tracer = Tracer()
+
+
+def set_tracer(tracer):
+    """
+    Sets the tracer used by every :class:`dxlepoclient.client.EpoClient`
+    in the process.
+
+    A :const:`SpanName.COMMAND` span is created for each remote command
+    invocation, and a :const:`SpanName.DISCOVERY` span (with a
+    :const:`SpanName.REGISTRY_QUERY` child span for each service registry
+    query) when a client is created. The attributes that are set are listed
+    in the :class:`SpanAttribute` constants class.
+
+    :param tracer: The :class:`Tracer`, or ``None`` to disable tracing
+    """
+    global _tracer  # pylint: disable=global-statement,invalid-name
+    _tracer = tracer or Tracer()
+    logger.debug("Tracer set to %s", type(_tracer).__name__)
+
+
+def get_tracer():
+    """
+    Returns the tracer used by every :class:`dxlepoclient.client.EpoClient`
+    in the process.
+
+    :return: The :class:`Tracer`
+    """
+    return _tracer
@@ -0,0 +1,411 @@
+# -*- coding: utf-8 -*-
+################################################################################
+# Copyright (c) 2017 McAfee Inc. - All Rights Reserved.
+################################################################################
+
+from __future__ import absolute_import
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import random
+import threading
+
+from ._compat import monotonic, queue
+from .batch import BatchCommand
+from .parsers import OutputFormat
+from .scheduler import Priority
+
+# Configure local logger
+logger = logging.getLogger(__name__)
+
+
+class _Registration(object):
+    """
+    A callback that is registered for a watched query.
+    """
+
+    def __init__(self, query, callback, interval):
+        self.query = query
+        self.callback = callback
+        self.interval = interval
+        # The hash of the last result that was passed to the callback
+        self.last_hash = None
+
+
+class _WatchedQuery(object):
+    """
+    A command invocation that is run periodically on behalf of one or more
+    registrations.
+    """
+
+    def __init__(self, key, command):
+        self.key = key
+        # The :class:`dxlepoclient.batch.BatchCommand` to run
+        self.command = command
+        self.registrations = []
+        self.interval = None
+        self.next_run = None
+        self.running = False
+        self.last_hash = None
+
+    def update_interval(self):
+        self.interval = min(registration.interval
+                            for registration in self.registrations)
+
+
+class _QuerySchedule(object):
+    """
+    The times at which the watched queries are next due to run.
+    """
+
+    def __init__(self, jitter):
+        self._jitter = jitter
+        # Heap of (next run, sequence, query) tuples
+        self._entries = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def _add(self, query, delay):
+        with self._condition:
+            query.next_run = monotonic() + delay
+            heapq.heappush(self._entries,
+                           (query.next_run, next(self._sequence), query))
+            self._condition.notify_all()
+
+    def add_first(self, query):
+        """
+        Schedules the first run of a query. First runs are spread across
+        the jitter range of the interval.
+        """
+        self._add(query, random.uniform(0, query.interval * self._jitter))
+
+    def add_next(self, query):
+        """
+        Schedules the next run of a query, one (randomly lengthened or
+        shortened) interval from now.
+        """
+        self._add(query, query.interval *
+                  random.uniform(1 - self._jitter, 1 + self._jitter))
+
+    def remove(self, query):
+        with self._condition:
+            query.next_run = None
+
+    def open(self):
+        with self._condition:
+            self._closed = False
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def next_due(self):
+        """
+        Waits until a query is due to run.
+
+        :return: The query, or ``None`` once the schedule has been closed
+        """
+        with self._condition:
+            while not self._closed:
+                if not self._entries:
+                    self._condition.wait()
+                    continue
+                next_run, _, query = self._entries[0]
+                # Entries for removed or rescheduled queries are discarded
+                if query.next_run != next_run:
+                    heapq.heappop(self._entries)
+                    continue
+                delay = next_run - monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._entries)
+                return query
+            return None
+
+
+class _WorkerPool(object):
+    """
+    The threads which run the watched queries, and the thread which
+    dispatches the queries to them.
+    """
+
+    def __init__(self, workers, work):
+        self._workers = workers
+        self._work = work
+        self._work_queue = queue.Queue()
+        self._threads = []
+
+    @property
+    def started(self):
+        return bool(self._threads)
+
+    def start(self, dispatch):
+        self._threads = [threading.Thread(target=self._run,
+                                          name="EpoQueryWatcherWorker")
+                         for _ in range(self._workers)]
+        self._threads.append(threading.Thread(target=dispatch,
+                                              name="EpoQueryWatcher"))
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def put(self, query):
+        self._work_queue.put(query)
+
+    def stop(self):
+        """
+        Waits for the threads to exit (the dispatching thread must already
+        be stopping).
+        """
+        for _ in range(self._workers):
+            self._work_queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _run(self):
+        while True:
+            query = self._work_queue.get()
+            if query is None:
+                return
+            self._work(query)
+
+
+class QueryWatcher(object):
+    """
+    Periodically runs remote commands on behalf of registered callbacks, and
+    calls each callback only when the result of its command has changed.
+
+    Registrations for the same command, parameters and output format are
+    coalesced into a single query, which is run at the shortest of their
+    intervals. Each interval is randomly lengthened or shortened by
+    ``jitter`` so that queries (and watchers in other processes) do not
+    synchronize. If the previous run of a query has not completed when the
+    query is next due, that run is skipped rather than sending overlapping
+    requests.
+
+    The result of each run is hashed, and a callback is only called (with
+    the result, as returned by
+    :func:`dxlepoclient.client.EpoClient.run_command`) when the hash
+    differs from that of the last result it was called with. The first
+    successful run after a callback is registered always calls it. Errors
+    are logged and do not call the callbacks.
+
+    Queries are run from a pool of ``workers`` background threads, and
+    callbacks are called from those threads.
+
+    **Example Usage**
+
+        .. code-block:: python
+
+            def on_change(result):
+                print(json.loads(result))
+
+            with QueryWatcher(epo_client) as watcher:
+                watcher.watch("system.find", {"searchText": "mySystem"},
+                              interval=300, callback=on_change)
+                ...
+    """
+
+    def __init__(self, epo_client, jitter=0.1, workers=4,
+                 priority=Priority.BULK):
+        """
+        Constructor parameters:
+
+        :param epo_client: The :class:`dxlepoclient.client.EpoClient` to run
+            the commands with
+        :param jitter: (optional) The fraction (``0`` to less than ``1``) by
+            which each interval is randomly lengthened or shortened
+        :param workers: (optional) The number of queries that can run at the
+            same time
+        :param priority: (optional) The priority of the requests (see
+            :func:`dxlepoclient.client.EpoClient.run_command`)
+        """
+        if not 0 <= jitter < 1:
+            raise Exception("Jitter must be between 0 and 1")
+        if workers < 1:
+            raise Exception("Workers must be greater than 0")
+        Priority.validate(priority)
+
+        self._epo_client = epo_client
+        self._priority = priority
+        self._queries = {}
+        self._schedule = _QuerySchedule(jitter)
+        self._counts = {"runs": 0, "changes": 0, "skipped": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._pool = _WorkerPool(workers, self._work)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def metrics(self):
+        """
+        A ``dict`` containing the state of the watcher:
+
+        * ``queries``: The number of distinct queries being watched
+        * ``registrations``: The number of registered callbacks
+        * ``runs``: The number of query runs that have completed
+        * ``changes``: The number of runs whose result differed from the
+          previous result of the query
+        * ``skipped``: The number of runs that were skipped because the
+          previous run of the query was still in progress
+        * ``errors``: The number of runs that failed
+        """
+        with self._lock:
+            return dict(self._counts,
+                        queries=len(self._queries),
+                        registrations=sum(len(query.registrations)
+                                          for query in self._queries.values()))
+
+    def watch(self, command_name, params=None, interval=60, callback=None,
+              output_format=OutputFormat.JSON):
+        """
+        Registers a callback for the result of a remote command, which is
+        run every ``interval`` seconds.
+
+        :param command_name: The name of the remote command to invoke
+        :param params: (optional) A dictionary (``dict``) containing the
+            parameters for the command
+        :param interval: (optional) The average amount of time (in seconds)
+            between runs of the command
+        :param callback: The function to call with the result when it changes
+        :param output_format: (optional) The output format for ePO to use when
+            returning the response (see
+            :func:`dxlepoclient.client.EpoClient.run_command`)
+        :return: A handle for the registration, to pass to :func:`unwatch`
+        """
+        if interval <= 0:
+            raise Exception("Interval must be greater than 0")
+        if callback is None:
+            raise Exception("A callback must be specified")
+        OutputFormat.validate(output_format)
+        params = params or {}
+        key = (command_name, output_format, json.dumps(params, sort_keys=True))
+
+        with self._lock:
+            query = self._queries.get(key)
+            if not query:
+                query = _WatchedQuery(
+                    key, BatchCommand(command_name, params, output_format))
+                self._queries[key] = query
+            registration = _Registration(query, callback, interval)
+            query.registrations.append(registration)
+            previous_interval = query.interval
+            query.update_interval()
+            if previous_interval is None or query.interval < previous_interval:
+                self._schedule.add_first(query)
+        logger.debug("Watching '%s' every %ss (%d registrations)",
+                     command_name, query.interval, len(query.registrations))
+        return registration
+
+    def unwatch(self, handle):
+        """
+        Removes a registration. The query is no longer run once all of its
+        registrations have been removed.
+
+        :param handle: The handle returned by :func:`watch`
+        """
+        with self._lock:
+            query = handle.query
+            if handle not in query.registrations:
+                return
+            query.registrations.remove(handle)
+            if query.registrations:
+                query.update_interval()
+            else:
+                del self._queries[query.key]
+                self._schedule.remove(query)
+
+    def start(self):
+        """
+        Starts running the watched queries from background threads.
+        """
+        if self._pool.started:
+            return
+        self._schedule.open()
+        self._pool.start(self._dispatch)
+
+    def stop(self):
+        """
+        Stops running the watched queries and waits for the background
+        threads to exit (including any queries that are in progress).
+        """
+        if not self._pool.started:
+            return
+        self._schedule.close()
+        self._pool.stop()
+
+    def _dispatch(self):
+        """
+        Dispatches the queries that are due to the worker threads.
+        """
+        while True:
+            query = self._schedule.next_due()
+            if query is None:
+                return
+            with self._lock:
+                # The query may have been removed while it was due
+                if self._queries.get(query.key) is not query:
+                    continue
+                if query.running:
+                    self._counts["skipped"] += 1
+                    logger.debug("Skipping run of '%s' (previous run still "
+                                 "in progress)", query.command.command_name)
+                else:
+                    query.running = True
+                    self._pool.put(query)
+                self._schedule.add_next(query)
+
+    def _work(self, query):
+        try:
+            self._run_query(query)
+        finally:
+            with self._lock:
+                query.running = False
+
+    def _run_query(self, query):
+        """
+        Runs a query and calls the callbacks whose last result differs.
+        """
+        command = query.command
+        try:
+            result = self._epo_client.run_command(
+                command.command_name, command.params, command.output_format,
+                self._priority)
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.error("Error running watched command '%s': %s",
+                         command.command_name, ex)
+            with self._lock:
+                self._counts["runs"] += 1
+                self._counts["errors"] += 1
+            return
+
+        digest = hashlib.sha256(
+            result if isinstance(result, bytes) else result.encode("utf-8")
+        ).hexdigest()
+        with self._lock:
+            self._counts["runs"] += 1
+            if query.last_hash != digest:
+                query.last_hash = digest
+                self._counts["changes"] += 1
+            changed = [registration for registration in query.registrations
+                       if registration.last_hash != digest]
+            for registration in changed:
+                registration.last_hash = digest
+
+        for registration in changed:
+            try:
+                registration.callback(result)
+            except Exception as ex:  # pylint: disable=broad-except
+                logger.error("Error in callback for watched command '%s': %s",
+                             command.command_name, ex)
@@ -6,6 +6,7 @@ import os
 import distutils.command.sdist
 import distutils.log
 import subprocess
+import sys
 from setuptools import Command, setup
 import setuptools.command.sdist
 
@@ -32,9 +33,11 @@ class LintCommand(Command):
         self.announce("Running pylint for library source files and tests",
                       level=distutils.log.INFO)
         subprocess.check_call(["pylint", "dxlepoclient", "tests"] + glob.glob("*.py"))
-        self.announce("Running pylint for samples", level=distutils.log.INFO)
+        self.announce("Running pylint for samples and benchmarks",
+                      level=distutils.log.INFO)
         subprocess.check_call(["pylint"] + glob.glob("sample/*.py") +
                               glob.glob("sample/**/*.py") +
+                              glob.glob("benchmark/*.py") +
                               ["--rcfile", ".pylintrc.samples"])
 
 
@@ -52,6 +55,11 @@ class CiCommand(Command):
     def run(self):
         self.run_command("lint")
         self.run_command("test")
+        self.announce("Running the cold start benchmark",
+                      level=distutils.log.INFO)
+        subprocess.check_call([sys.executable,
+                               os.path.join("benchmark",
+                                            "cold_start_benchmark.py")])
 
 TEST_REQUIREMENTS = ["nose", "mock", "astroid<2.3.0", "pylint<=2.3.1"]
 
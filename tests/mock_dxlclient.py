@@ -0,0 +1,164 @@
+"""
+In-process stand-in for a DXL client connected to a broker. Requests are
+delivered directly to the request callbacks of services registered through
+the client, which allows the ePO client to be exercised (and benchmarked)
+without a running broker.
+"""
+import json
+import threading
+import time
+
+from dxlclient.exceptions import WaitTimeoutException
+from dxlclient.message import ErrorResponse, Event, Message, Response
+
+SERVICE_REGISTRY_QUERY_TOPIC = "/mcafee/service/dxl/svcregistry/query"
+SERVICE_REGISTER_EVENT_TOPIC = "/mcafee/event/dxl/svcregistry/register"
+SERVICE_UNREGISTER_EVENT_TOPIC = "/mcafee/event/dxl/svcregistry/unregister"
+
+# Error code sent by the broker when no service is registered for a topic
+SERVICE_UNAVAILABLE_ERROR_CODE = 0x80000001
+
+
+def _copy_message(message):
+    """
+    Serializes and deserializes a message (as a broker would), which converts
+    string payloads to bytes.
+    """
+    copy = Message._from_bytes(message._to_bytes())  # pylint: disable=protected-access
+    copy.destination_topic = message.destination_topic
+    return copy
+
+
+class MockDxlClient(object):
+    def __init__(self):
+        self.connected = False
+        self._services = {}
+        self._event_callbacks = {}
+        self._responses = {}
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disconnect()
+
+    def connect(self):
+        self.connected = True
+
+    def disconnect(self):
+        self.connected = False
+
+    def destroy(self):
+        self.disconnect()
+
+    # The signatures match DxlClient so that callers can pass any argument
+    # by keyword, even those the fake does not need
+    # pylint: disable=unused-argument
+    def register_service_sync(self, service_reg_info, timeout):
+        self._services[service_reg_info.service_id] = service_reg_info
+        self._fire_event(SERVICE_REGISTER_EVENT_TOPIC, {
+            "serviceType": service_reg_info.service_type,
+            "serviceGuid": service_reg_info.service_id,
+            "metaData": service_reg_info.metadata,
+            "requestChannels": list(service_reg_info.topics)
+        })
+
+    def unregister_service_sync(self, service_reg_info, timeout):
+        self._services.pop(service_reg_info.service_id, None)
+        self._fire_event(SERVICE_UNREGISTER_EVENT_TOPIC,
+                         {"serviceGuid": service_reg_info.service_id})
+
+    def add_event_callback(self, topic, event_callback,
+                           subscribe_to_topic=True):
+        self._event_callbacks.setdefault(topic, []).append(event_callback)
+
+    def remove_event_callback(self, topic, event_callback,
+                              unsubscribe_from_topic=True):
+        self._event_callbacks.get(topic, []).remove(event_callback)
+    # pylint: enable=unused-argument
+
+    def _fire_event(self, topic, payload_dict):
+        for event_callback in list(self._event_callbacks.get(topic, [])):
+            event = Event(topic)
+            event.payload = json.dumps(payload_dict)
+            event_callback.on_event(_copy_message(event))
+
+    def send_response(self, response):
+        response = _copy_message(response)
+        with self._condition:
+            self._responses[response.request_message_id] = response
+            self._condition.notify_all()
+
+    @staticmethod
+    def _topic_matches(pattern, topic):
+        if pattern.endswith("#"):
+            return topic.startswith(pattern[:-1])
+        return pattern == topic
+
+    def _query_service_registry(self, request):
+        service_type = json.loads(
+            request.payload.decode("utf-8"))["serviceType"]
+        services = {}
+        for service_id, service_reg_info in list(self._services.items()):
+            if service_reg_info.service_type == service_type:
+                services[service_id] = {
+                    "serviceType": service_type,
+                    "serviceGuid": service_id,
+                    "metaData": service_reg_info.metadata,
+                    "requestChannels": list(service_reg_info.topics)
+                }
+        response = Response(request)
+        response.payload = json.dumps({"services": services})
+        self.send_response(response)
+
+    def _deliver(self, request):
+        request = _copy_message(request)
+        topic = request.destination_topic
+        if topic == SERVICE_REGISTRY_QUERY_TOPIC:
+            self._query_service_registry(request)
+            return
+        for service_reg_info in list(self._services.values()):
+            # pylint: disable=protected-access
+            for pattern, callbacks in \
+                    service_reg_info._callbacks_by_topic.items():
+                if self._topic_matches(pattern, topic):
+                    for callback in callbacks:
+                        callback.on_request(request)
+                    return
+        self.send_response(ErrorResponse(
+            request, SERVICE_UNAVAILABLE_ERROR_CODE,
+            "unable to locate service for request"))
+
+    def _wait_for_response(self, request, timeout):
+        end = time.time() + timeout
+        with self._condition:
+            while request.message_id not in self._responses:
+                remaining = end - time.time()
+                if remaining <= 0:
+                    raise WaitTimeoutException(
+                        "Timeout waiting for response to message: " +
+                        request.message_id)
+                self._condition.wait(remaining)
+            return self._responses.pop(request.message_id)
+
+    def sync_request(self, request, timeout=3600):
+        if not self.connected:
+            raise Exception("Client is not connected")
+        self._deliver(request)
+        return self._wait_for_response(request, timeout)
+
+    def async_request(self, request, response_callback=None):
+        if not self.connected:
+            raise Exception("Client is not connected")
+
+        def deliver():
+            self._deliver(request)
+            response = self._wait_for_response(request, 3600)
+            if response_callback:
+                response_callback.on_response(response)
+
+        thread = threading.Thread(target=deliver)
+        thread.daemon = True
+        thread.start()
@@ -7,11 +7,35 @@ class MockEpoServer(object):
                  client,
                  id_number=0,
                  use_commands_service=True,
-                 user_authorized=True):
+                 user_authorized=True,
+                 system_count=0,
+                 seed=0,
+                 record_size=None,
+                 latency=0,
+                 error_rate=0,
+                 supports_batch=False):
+        """
+        :param system_count: The number of synthetic systems in the System
+            Tree. If ``0``, ``system.find`` returns the fixed test payload.
+        :param seed: The seed used to generate the synthetic systems and to
+            select the requests that fail
+        :param record_size: The approximate size (in bytes) of each synthetic
+            system record
+        :param latency: The delay (in seconds) before each response is sent
+        :param error_rate: The fraction of requests which receive an error
+            response
+        :param supports_batch: Whether the "remote" service accepts batch
+            envelopes (requests containing a list of commands)
+        """
         self._client = client
         self.id_number = id_number
         self.use_commands_service = use_commands_service
         self.user_authorized = user_authorized
+        self._callback = FakeEpoServerCallback(
+            client, id_number, use_commands_service, user_authorized,
+            SyntheticInventory(system_count, seed, record_size)
+            if system_count else None,
+            FaultInjector(latency, error_rate, seed), supports_batch)
 
         # Create DXL Service Registration object
         self._service_registration_info = ServiceRegistrationInfo(
@@ -26,14 +50,9 @@ class MockEpoServer(object):
                 {"epoGuid": LOCAL_TEST_SERVER_NAME + str(id_number)}
 
     def __enter__(self):
-        mock_callback = FakeEpoServerCallback(self._client,
-                                              self.id_number,
-                                              self.use_commands_service,
-                                              self.user_authorized)
-
         self._service_registration_info.add_topic(
-            mock_callback.epo_request_topic,
-            mock_callback
+            self._callback.epo_request_topic,
+            self._callback
         )
 
         self._client.register_service_sync(self._service_registration_info, 10)
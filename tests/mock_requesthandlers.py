@@ -1,4 +1,9 @@
 import json
+import operator
+import random
+import re
+import time
+import uuid
 
 from dxlbootstrap.util import MessageUtils
 from dxlclient.callbacks import RequestCallback
@@ -6,6 +11,205 @@ from dxlclient.message import Response, ErrorResponse
 from tests.test_value_constants import *
 
 
+class SyntheticInventory(object):
+    """
+    Seeded generator for a System Tree of synthetic systems, used to exercise
+    the client with realistic result sizes.
+    """
+
+    OS_TYPES = [
+        ("Windows 10", "Workstation", "10.0"),
+        ("Windows Server 2016", "Server", "10.0"),
+        ("Windows Server 2012 R2", "Server", "6.3"),
+        (SYSTEM_FIND_OSTYPE_LINUX, "Server", "4.9"),
+        ("Mac OS X", "Workstation", "10.13")
+    ]
+
+    TAGS = ["Workstation", "Server", "DXLBROKER", "Laptop", "Finance",
+            "Engineering"]
+
+    def __init__(self, count, seed=0, record_size=None):
+        """
+        :param count: The number of systems
+        :param seed: The seed for the generator (the same seed always
+            produces the same systems)
+        :param record_size: The approximate size (in bytes) of each encoded
+            system record. Records are padded with a description to reach
+            the size.
+        """
+        rng = random.Random(seed)
+        self.systems = [self._create_system(rng, index, record_size)
+                        for index in range(count)]
+
+    def _create_system(self, rng, index, record_size):
+        os_type, os_platform, os_version = rng.choice(self.OS_TYPES)
+        name = "{0}-{1:06d}".format(
+            "srv" if os_platform == "Server" else "wks", index)
+        system = {
+            "EPOBranchNode.AutoID": rng.randint(2, 40),
+            "EPOComputerProperties.ComputerName": name,
+            "EPOComputerProperties.DomainName": rng.choice(
+                ["CORP", "LAB", "WORKGROUP"]),
+            "EPOComputerProperties.IPAddress": "10.{0}.{1}.{2}".format(
+                rng.randint(0, 255), rng.randint(0, 255),
+                rng.randint(1, 254)),
+            "EPOComputerProperties.OSType": os_type,
+            "EPOComputerProperties.OSPlatform": os_platform,
+            "EPOComputerProperties.OSVersion": os_version,
+            "EPOComputerProperties.NumOfCPU": rng.choice([2, 4, 8, 16]),
+            "EPOComputerProperties.TotalPhysicalMemory":
+                rng.choice([4, 8, 16, 32, 64]) * 1024 ** 3,
+            "EPOComputerProperties.FreeDiskSpace": rng.randint(1, 500) * 1024,
+            "EPOComputerProperties.UserName": "user{0}".format(
+                rng.randint(1, 5000)),
+            "EPOComputerProperties.Vdi": int(rng.random() < 0.1),
+            "EPOLeafNode.AgentGUID": str(uuid.UUID(int=rng.getrandbits(128))),
+            "EPOLeafNode.AgentVersion": "5.{0}.{1}.{2}".format(
+                rng.randint(0, 6), rng.randint(0, 3), rng.randint(100, 999)),
+            "EPOLeafNode.LastUpdate": "2018-{0:02d}-{1:02d}T{2:02d}:{3:02d}:"
+                                      "00-00:00".format(
+                                          rng.randint(1, 12),
+                                          rng.randint(1, 28),
+                                          rng.randint(0, 23),
+                                          rng.randint(0, 59)),
+            "EPOLeafNode.ManagedState": int(rng.random() < 0.95),
+            "EPOLeafNode.Tags": ", ".join(sorted(rng.sample(self.TAGS, 2)))
+        }
+        if record_size:
+            padding = record_size - len(json.dumps(system))
+            if padding > 0:
+                system["EPOComputerProperties.Description"] = "x" * padding
+        return system
+
+    def search(self, search_text="", search_name_only=False):
+        """
+        Returns the systems matching the search text, as ``system.find``
+        does (a case-insensitive substring match on the system name, or on
+        any of the string properties unless ``search_name_only`` is set).
+        """
+        search_text = (search_text or "").lower()
+        if not search_text:
+            return self.systems
+        if search_name_only:
+            return [system for system in self.systems if search_text in
+                    system["EPOComputerProperties.ComputerName"].lower()]
+        return [system for system in self.systems
+                if any(search_text in value.lower()
+                       for value in system.values()
+                       if isinstance(value, str))]
+
+
+class QueryEvaluator(object):
+    """
+    Evaluates the subset of the ePO query language (``core.executeQuery``
+    ``select``, ``where`` and ``order`` clauses) that is produced by the
+    client's query builder.
+    """
+
+    TOKEN_PATTERN = re.compile(r'\s*(\(|\)|"(?:[^"\\]|\\.)*"|[^\s()]+)')
+
+    class Literal(object):
+        def __init__(self, value):
+            self.value = value
+
+    @staticmethod
+    def parse(text):
+        tokens = QueryEvaluator.TOKEN_PATTERN.findall(text)
+        stack = [[]]
+        for token in tokens:
+            if token == "(":
+                stack.append([])
+            elif token == ")":
+                expression = stack.pop()
+                stack[-1].append(expression)
+            elif token.startswith('"'):
+                stack[-1].append(QueryEvaluator.Literal(json.loads(token)))
+            elif token in ["true", "false"]:
+                stack[-1].append(QueryEvaluator.Literal(token == "true"))
+            elif re.match(r"^-?\d+(\.\d+)?$", token):
+                stack[-1].append(QueryEvaluator.Literal(json.loads(token)))
+            else:
+                stack[-1].append(token)
+        return stack[0][0]
+
+    # The operators which compare a field value with a literal. Only "eq"
+    # and "ne" match a missing value.
+    COMPARISONS = {
+        "eq": operator.eq,
+        "ne": operator.ne,
+        "lt": operator.lt,
+        "le": operator.le,
+        "gt": operator.gt,
+        "ge": operator.ge,
+        "contains": lambda value, literal: str(literal) in str(value),
+        "startsWith": lambda value, literal:
+                      str(value).startswith(str(literal)),
+        "endsWith": lambda value, literal: str(value).endswith(str(literal))
+    }
+
+    @staticmethod
+    def matches(expression, record):
+        name = expression[0]
+        if name in ["and", "or"]:
+            combine = all if name == "and" else any
+            return combine(QueryEvaluator.matches(child, record)
+                           for child in expression[1:])
+        if name == "not":
+            return not QueryEvaluator.matches(expression[1], record)
+        value = record.get(expression[1])
+        if name in ["isBlank", "isNotBlank"]:
+            return (value in [None, ""]) == (name == "isBlank")
+        if name not in QueryEvaluator.COMPARISONS:
+            raise Exception("Unsupported query operator: " + name)
+        if value is None and name not in ["eq", "ne"]:
+            return False
+        return QueryEvaluator.COMPARISONS[name](value, expression[2].value)
+
+    @staticmethod
+    def execute(records, params):
+        if "where" in params:
+            condition = QueryEvaluator.parse(params["where"])[1]
+            records = [record for record in records
+                       if QueryEvaluator.matches(condition, record)]
+        if "order" in params:
+            records = list(records)
+            for direction, field in reversed(
+                    QueryEvaluator.parse(params["order"])[1:]):
+                records.sort(key=lambda record, field=field:
+                             (record.get(field) is None, record.get(field)),
+                             reverse=direction == "desc")
+        if "select" in params:
+            fields = QueryEvaluator.parse(params["select"])[1:]
+            records = [dict((field, record.get(field)) for field in fields)
+                       for record in records]
+        return records
+
+
+class FaultInjector(object):
+    """
+    Delays the requests received by the mock ePO server and selects a
+    seeded fraction of them to fail.
+    """
+
+    def __init__(self, latency=0, error_rate=0, seed=0):
+        """
+        :param latency: The delay (in seconds) before each response is sent
+        :param error_rate: The fraction of requests which fail
+        :param seed: The seed used to select the requests that fail
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+
+    def delay(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def fails(self):
+        return bool(self.error_rate) and \
+            self._random.random() < self.error_rate
+
+
 class FakeEpoServerCallback(RequestCallback):
     # The format for request topics that are associated with the ePO DXL
     # "remote" service. "remote" services are registered by the standalone ePO
@@ -36,6 +240,12 @@ class FakeEpoServerCallback(RequestCallback):
     # The default output format
     DEFAULT_OUTPUT = "json"
 
+    # The key in a batch envelope request that contains the list of commands
+    # (each with the keys above)
+    BATCH_COMMANDS_KEY = "commands"
+    # The key in a batch envelope response that contains the list of results
+    BATCH_RESULTS_KEY = "results"
+
     KNOWN_COMMANDS = [
         {
             "name": "core.help",
@@ -61,23 +271,41 @@ class FakeEpoServerCallback(RequestCallback):
             if self.use_commands_service else self.EPO_REMOTE_REQUEST_TOPIC
         return request_topic.format(self.id_number)
 
+    # The error message sent for requests that are selected to fail by the
+    # configured error rate
+    SYNTHETIC_ERROR_MESSAGE = "Synthetic error"
+
     def __init__(self, client, id_number, use_commands_service,
-                 user_authorized):
+                 user_authorized, inventory=None, faults=None,
+                 supports_batch=False):
         super(FakeEpoServerCallback, self).__init__()
 
         self._client = client
         self.id_number = str(id_number)
         self.use_commands_service = use_commands_service
         self.user_authorized = user_authorized
+        self.inventory = inventory
+        self.faults = faults or FaultInjector()
+        self.supports_batch = supports_batch
 
     def on_request(self, request):
         try:
             if not self.user_authorized:
                 return
 
+            self.faults.delay()
+            if self.faults.fails():
+                raise Exception(self.SYNTHETIC_ERROR_MESSAGE)
+
             # Build dictionary from the request payload
             req_dict = json.loads(request.payload.decode(encoding=self.UTF_8))
 
+            # Batch envelope received
+            if not self.use_commands_service and self.supports_batch and \
+                    self.BATCH_COMMANDS_KEY in req_dict:
+                self.batch_command(request, req_dict[self.BATCH_COMMANDS_KEY])
+                return
+
             if self.use_commands_service:
                 # Determine the ePO command
                 command = request.destination_topic[
@@ -96,17 +324,9 @@ class FakeEpoServerCallback(RequestCallback):
                 # Determine the command parameters
                 params = req_dict[self.PARAMS_KEY]
 
-            # Help command received
-            if command == CORE_HELP_CMD_NAME:
-                self.help_command(request)
-
-            # System Find command
-            elif command == SYSTEM_FIND_CMD_NAME:
-                self.system_find_command(request, params)
-
-            # Unknown Command
-            else:
-                self.unknown_command(request, command)
+            response = Response(request)
+            response.payload = self.command_payload(command, params)
+            self._client.send_response(response)
 
         except Exception as ex:
             # Send error response
@@ -115,10 +335,36 @@ class FakeEpoServerCallback(RequestCallback):
                               error_message=str(ex).encode(
                                   encoding=self.UTF_8)))
 
-    def help_command(self, request):
+    def command_payload(self, command, params):
+        handlers = {
+            CORE_HELP_CMD_NAME: lambda _: self.help_payload(),
+            SYSTEM_FIND_CMD_NAME: self.system_find_payload,
+            EXECUTE_QUERY_CMD_NAME: self.execute_query_payload
+        }
+        if command not in handlers:
+            # Unknown Command
+            return ERROR_RESPONSE_PAYLOAD_PREFIX + command
+        return handlers[command](params)
+
+    def batch_command(self, request, commands):
+        results = []
+        for entry in commands:
+            try:
+                results.append({
+                    "ok": True,
+                    "result": self.command_payload(
+                        entry[self.CMD_NAME_KEY],
+                        entry.get(self.PARAMS_KEY) or {})})
+            except Exception as ex:
+                results.append({"ok": False, "error": str(ex)})
+
         # Create the response
         response = Response(request)
+        response.payload = MessageUtils.dict_to_json(
+            {self.BATCH_RESULTS_KEY: results})
+        self._client.send_response(response)
 
+    def help_payload(self):
         cmd_array = []
         for cmd in self.KNOWN_COMMANDS:
 
@@ -131,25 +377,19 @@ class FakeEpoServerCallback(RequestCallback):
 
             cmd_array.append(cmd_string)
 
-        response.payload = MessageUtils.dict_to_json(cmd_array)
-
-        self._client.send_response(response)
-
-    def system_find_command(self, request, params):
-        # Create the response
-        response = Response(request)
-
-        response.payload = MessageUtils.dict_to_json(
-            SYSTEM_FIND_PAYLOAD
-            if params == {"searchText": SYSTEM_FIND_OSTYPE_LINUX}
-            else [])
-
-        self._client.send_response(response)
-
-    def unknown_command(self, request, command):
-        # Create the response
-        response = Response(request)
-
-        response.payload = ERROR_RESPONSE_PAYLOAD_PREFIX + command
-
-        self._client.send_response(response)
+        return MessageUtils.dict_to_json(cmd_array)
+
+    def system_find_payload(self, params):
+        if self.inventory:
+            systems = self.inventory.search(
+                params.get("searchText"),
+                str(params.get("searchNameOnly")).lower() in ["1", "true"])
+        else:
+            systems = SYSTEM_FIND_PAYLOAD \
+                if params == {"searchText": SYSTEM_FIND_OSTYPE_LINUX} else []
+        return MessageUtils.dict_to_json(systems)
+
+    def execute_query_payload(self, params):
+        return MessageUtils.dict_to_json(QueryEvaluator.execute(
+            self.inventory.systems if self.inventory else SYSTEM_FIND_PAYLOAD,
+            params))
@@ -5,11 +5,13 @@ import json
 import os
 import re
 import sys
+import time
 
 from tempfile import NamedTemporaryFile
 from unittest import TestCase
 from mock import patch
 from dxlclient import DxlClientConfig, DxlClient
+from tests.mock_eposerver import MockEpoServer
 
 if sys.version_info[0] > 2:
     import builtins  # pylint: disable=import-error, unused-import
@@ -54,6 +56,34 @@ class BaseClientTest(TestCase):
 
         return DxlClient(config)
 
+    @classmethod
+    def iter_epo_servers(cls, **kwargs):
+        """
+        Yields a connected DXL client and whether the mock ePO server uses the
+        commands service, once for each kind of mock ePO server
+
+        :param kwargs: Additional arguments for the mock ePO server
+        """
+        with cls.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            for use_commands_service in [True, False]:
+                with MockEpoServer(dxl_client,
+                                   use_commands_service=use_commands_service,
+                                   **kwargs):
+                    yield dxl_client, use_commands_service
+
+    @staticmethod
+    def wait_for(condition, timeout=5):
+        """
+        Polls a condition until it is true or the timeout (in seconds)
+        expires, and returns its final value
+        """
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            time.sleep(0.01)
+        return condition()
+
 
     #pylint: disable=invalid-name, no-member, deprecated-method, arguments-differ
     def assertRaisesRegex(self, expected_exception, expected_regex, *args, **kwargs):
@@ -0,0 +1,131 @@
+import io
+import json
+import threading
+import time
+
+from mock import Mock
+
+from dxlepoclient import BatchCommand, BatchExecutor, EpoClient
+from dxlepoclient.__main__ import format_summary, read_commands, run_batch
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+from tests.mock_eposerver import MockEpoServer
+
+
+class TestBatch(BaseClientTest):
+
+    @staticmethod
+    def _commands(count):
+        return [BatchCommand(SYSTEM_FIND_CMD_NAME,
+                             {"searchText": SYSTEM_FIND_OSTYPE_LINUX},
+                             command_id=index)
+                for index in range(count)]
+
+    def test_run_ordered(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client):
+                epo_client = EpoClient(dxl_client)
+                executor = BatchExecutor(epo_client, max_in_flight=4)
+                results = list(executor.run(self._commands(20)))
+                self.assertEqual(list(range(20)),
+                                 [result.index for result in results])
+                for result in results:
+                    self.assertTrue(result.succeeded)
+                    self.assertEqual(SYSTEM_FIND_PAYLOAD, result.result)
+                    self.assertEqual(result.index, result.command.command_id)
+
+                summary = executor.summary
+                self.assertEqual(20, summary["commands"])
+                self.assertEqual(20, summary["succeeded"])
+                self.assertEqual(0, summary["failed"])
+                self.assertGreater(summary["commands_per_second"], 0)
+                self.assertLessEqual(summary["latency_p50"],
+                                     summary["latency_max"])
+
+    def test_run_unordered_with_failures(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client):
+                epo_client = EpoClient(dxl_client)
+                executor = BatchExecutor(epo_client, max_in_flight=3,
+                                         ordered=False)
+                results = list(executor.run(
+                    [(SYSTEM_FIND_CMD_NAME, None), ("unknown.command", None),
+                     (CORE_HELP_CMD_NAME, None)]))
+                self.assertEqual([0, 1, 2], sorted(
+                    result.index for result in results))
+                failed = [result for result in results
+                          if not result.succeeded]
+                self.assertEqual(1, len(failed))
+                self.assertEqual("unknown.command",
+                                 failed[0].command.command_name)
+                self.assertEqual(1, executor.summary["failed"])
+
+    def test_run_ordered_window(self):
+        head_released = threading.Event()
+        read = []
+        received = []
+
+        def run_command(_command_name, params, *_):
+            if params["index"] == 0:
+                head_released.wait(5)
+            return "[]"
+
+        def commands():
+            for index in range(100):
+                read.append(index)
+                yield BatchCommand(SYSTEM_FIND_CMD_NAME, {"index": index})
+
+        epo_client = Mock()
+        epo_client.run_command.side_effect = run_command
+        executor = BatchExecutor(epo_client, max_in_flight=2)
+        results = executor.run(commands())
+        thread = threading.Thread(target=lambda: received.extend(results))
+        thread.start()
+        time.sleep(0.2)
+        # Reading stops once the window is full while the head is blocked
+        window = BatchExecutor.RESULT_WINDOW_FACTOR * 2
+        self.assertLessEqual(len(read), window + 1)
+        head_released.set()
+        thread.join(5)
+        self.assertEqual(list(range(100)),
+                         [result.index for result in received])
+
+    def test_invalid_command(self):
+        self.assertRaisesRegex(Exception, "A command name must be specified",
+                               BatchCommand.from_dict, {"params": {}})
+        self.assertRaisesRegex(Exception, "Invalid output format",
+                               BatchCommand, CORE_HELP_CMD_NAME, None, "x")
+        self.assertRaisesRegex(Exception, "Invalid command on line 2",
+                               list, read_commands(
+                                   ['{"command": "core.help"}', "{"]))
+
+    def test_run_batch_file(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client):
+                epo_client = EpoClient(dxl_client)
+                input_file = io.StringIO(
+                    u'{"id": "a", "command": "system.find", '
+                    u'"params": {"searchText": "Linux"}}\n'
+                    u'\n'
+                    u'{"id": "b", "command": "system.find"}\n')
+                output_file = io.StringIO()
+                summary = run_batch(epo_client, input_file, output_file,
+                                    max_in_flight=2, rate=100)
+                results = [json.loads(line) for line in
+                           output_file.getvalue().splitlines()]
+                self.assertEqual(
+                    [{"index": 0, "id": "a", "command": "system.find",
+                      "ok": True, "result": SYSTEM_FIND_PAYLOAD},
+                     {"index": 1, "id": "b", "command": "system.find",
+                      "ok": True, "result": []}],
+                    [dict((key, value) for key, value in result.items()
+                          if key != "elapsed") for result in results])
+                self.assertEqual(2, summary["commands"])
+                self.assertIn("2 commands (2 succeeded, 0 failed)",
+                              format_summary(summary))
@@ -0,0 +1,98 @@
+from mock import patch
+from dxlepoclient import BatchCommand, EpoClient, OutputFormat
+from dxlepoclient.ratelimit import remove_rate_limit, set_rate_limit
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+from tests.mock_eposerver import MockEpoServer
+
+
+class TestBatchEnvelope(BaseClientTest):
+
+    COMMANDS = [
+        (SYSTEM_FIND_CMD_NAME, {"searchText": SYSTEM_FIND_OSTYPE_LINUX}),
+        ("unknown.command", None),
+        BatchCommand(CORE_HELP_CMD_NAME, output_format=OutputFormat.VERBOSE),
+        (SYSTEM_FIND_CMD_NAME, {"searchText": "none"})
+    ]
+
+    def _check_results(self, results):
+        self.assertEqual([0, 1, 2, 3], [result.index for result in results])
+        self.assertEqual(SYSTEM_FIND_PAYLOAD, results[0].result)
+        # ePO returns an error message that is not JSON for unknown commands
+        self.assertFalse(results[1].succeeded)
+        self.assertIn(CORE_HELP_CMD_NAME, results[2].result)
+        self.assertEqual([], results[3].result)
+
+    def test_envelope(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client, use_commands_service=False,
+                               supports_batch=True):
+                epo_client = EpoClient(dxl_client)
+                with patch.object(epo_client, "_invoke_epo_service",
+                                  wraps=epo_client._invoke_epo_service) \
+                        as invoke:
+                    self._check_results(epo_client.run_batch(
+                        self.COMMANDS, batch_size=3))
+                    # One request per envelope
+                    self.assertEqual(2, invoke.call_count)
+                self.assertTrue(epo_client._batch_envelopes.supported)
+
+    def test_envelope_rate_limit(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client, use_commands_service=False,
+                               supports_batch=True):
+                epo_client = EpoClient(dxl_client)
+                epo_unique_id = epo_client._epo_unique_id
+                rate_limiter = set_rate_limit(epo_unique_id, 1000, burst=100)
+                try:
+                    epo_client.run_batch(self.COMMANDS, batch_size=3)
+                finally:
+                    remove_rate_limit(epo_unique_id)
+                # One token per command rather than per envelope
+                self.assertEqual(len(self.COMMANDS),
+                                 rate_limiter.metrics["acquired"])
+
+    def test_fallback(self):
+        for dxl_client, use_commands_service in self.iter_epo_servers():
+            epo_client = EpoClient(dxl_client)
+            commands = self.COMMANDS if not use_commands_service \
+                else self.COMMANDS[:2] + self.COMMANDS[3:]
+            results = epo_client.run_batch(commands)
+            supported = epo_client._batch_envelopes.supported
+            if use_commands_service:
+                self.assertIsNone(supported)
+                self.assertEqual(3, len(results))
+            else:
+                self.assertFalse(supported)
+                self._check_results(results)
+
+    def test_envelope_request_failure(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client, use_commands_service=False,
+                               supports_batch=True):
+                epo_client = EpoClient(dxl_client)
+                epo_client._batch_envelopes.supported = True
+                with patch.object(epo_client, "_invoke_epo_service",
+                                  side_effect=Exception("Request failed")):
+                    results = epo_client.run_batch(self.COMMANDS)
+                self.assertEqual(["Request failed"] * 4,
+                                 [result.error for result in results])
+
+    def test_envelope_error_response(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client, use_commands_service=False,
+                               supports_batch=True, error_rate=1):
+                epo_client = EpoClient(dxl_client)
+                results = epo_client.run_batch(self.COMMANDS)
+                self.assertTrue(all("Synthetic error" in result.error
+                                    for result in results))
+                # The error does not show that envelopes are unsupported
+                self.assertIsNone(epo_client._batch_envelopes.supported)
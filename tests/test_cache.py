@@ -0,0 +1,189 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from mock import patch
+from dxlepoclient import EpoClient, SharedMemoryCache, SqliteCache
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+from tests.mock_eposerver import MockEpoServer
+
+
+class TestSharedMemoryCache(BaseClientTest):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_get_set_delete_clear(self):
+        with SharedMemoryCache(self.path, slots=16, slot_size=128) as cache:
+            self.assertIsNone(cache.get("a"))
+            self.assertTrue(cache.set("a", b"value a"))
+            self.assertTrue(cache.set("b", "value b"))
+            self.assertEqual(b"value a", cache.get("a"))
+            self.assertEqual(b"value b", cache.get("b"))
+            self.assertTrue(cache.set("a", b"new"))
+            self.assertEqual(b"new", cache.get("a"))
+            cache.delete("a")
+            self.assertIsNone(cache.get("a"))
+            cache.clear()
+            self.assertIsNone(cache.get("b"))
+            # Values which do not fit in a slot are not cached
+            self.assertFalse(cache.set("c", b"x" * 128))
+            self.assertIsNone(cache.get("c"))
+
+    def test_ttl(self):
+        with SharedMemoryCache(self.path, default_ttl=0.05) as cache:
+            cache.set("a", b"a")
+            cache.set("b", b"b", ttl=60)
+            self.assertEqual(b"a", cache.get("a"))
+            time.sleep(0.1)
+            self.assertIsNone(cache.get("a"))
+            self.assertEqual(b"b", cache.get("b"))
+
+    def test_eviction(self):
+        with SharedMemoryCache(self.path, slots=4, slot_size=64) as cache:
+            for index in range(8):
+                self.assertTrue(cache.set(str(index), str(index), ttl=index + 1))
+            # The values which expire soonest are evicted first
+            self.assertEqual([None] * 4 + [b"4", b"5", b"6", b"7"],
+                             [cache.get(str(index)) for index in range(8)])
+
+    def test_shared_between_instances(self):
+        with SharedMemoryCache(self.path) as cache1, \
+                SharedMemoryCache(self.path) as cache2:
+            cache1.set("a", b"a")
+            self.assertEqual(b"a", cache2.get("a"))
+        with self.assertRaisesRegex(Exception, "different layout"):
+            SharedMemoryCache(self.path, slots=8)
+
+    def test_shared_with_forked_process(self):
+        if not hasattr(os, "fork"):
+            self.skipTest("fork is not supported")
+        with SharedMemoryCache(self.path) as cache:
+            cache.set("parent", b"parent")
+            pid = os.fork()
+            if pid == 0:
+                ok = False
+                try:
+                    ok = cache.get("parent") == b"parent" and \
+                         cache.set("child", b"child")
+                finally:
+                    os._exit(0 if ok else 1)
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(0, status)
+            self.assertEqual(b"child", cache.get("child"))
+
+    def test_client_cache(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+            with MockEpoServer(dxl_client), \
+                    SharedMemoryCache(self.path) as cache:
+                epo_client = EpoClient(dxl_client, cache=cache)
+                # A second client finds the ePO server through the cached
+                # service registry responses
+                with patch.object(EpoClient, "_sync_request",
+                                  side_effect=Exception("Not cached")):
+                    self.assertEqual(epo_client._epo_unique_id,
+                                     EpoClient(dxl_client, cache=cache)
+                                     ._epo_unique_id)
+
+                params = {"searchText": SYSTEM_FIND_OSTYPE_LINUX}
+                res = epo_client.run_command(SYSTEM_FIND_CMD_NAME, params,
+                                             cache_ttl=60)
+                self.assertEqual(SYSTEM_FIND_PAYLOAD, json.loads(res))
+                with patch.object(epo_client, "_invoke_command",
+                                  side_effect=Exception("Not cached")):
+                    self.assertEqual(res, epo_client.run_command(
+                        SYSTEM_FIND_CMD_NAME, params, cache_ttl=60))
+                    self.assertEqual(SYSTEM_FIND_PAYLOAD, list(
+                        epo_client.iter_records(SYSTEM_FIND_CMD_NAME, params,
+                                                cache_ttl=60)))
+                    # Responses are only returned from the cache when a
+                    # cache TTL is specified
+                    with self.assertRaisesRegex(Exception, "Not cached"):
+                        epo_client.run_command(SYSTEM_FIND_CMD_NAME, params)
+
+
+class TestSqliteCache(BaseClientTest):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.directory = os.path.join(self.tmp_dir, "cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_get_set_delete_clear(self):
+        with SqliteCache(self.directory) as cache:
+            self.assertIsNone(cache.get("a"))
+            self.assertTrue(cache.set("a", b"value a"))
+            self.assertTrue(cache.set("b", "value b"))
+            self.assertEqual(b"value a", cache.get("a"))
+            self.assertEqual(b"value b", cache.get("b"))
+            cache.delete("a")
+            self.assertIsNone(cache.get("a"))
+            cache.clear()
+            self.assertIsNone(cache.get("b"))
+
+    def test_ttl(self):
+        with SqliteCache(self.directory, default_ttl=0.05) as cache:
+            cache.set("a", b"a")
+            cache.set("b", b"b", ttl=60)
+            time.sleep(0.1)
+            self.assertIsNone(cache.get("a"))
+            self.assertEqual(b"b", cache.get("b"))
+
+    def test_lru_eviction(self):
+        with SqliteCache(self.directory, max_size=30,
+                         access_resolution=0) as cache:
+            self.assertFalse(cache.set("big", b"x" * 31))
+            for key in ["a", "b", "c"]:
+                cache.set(key, key * 10)
+                time.sleep(0.01)
+            # "a" is used more recently than "b", so "b" is evicted
+            cache.get("a")
+            time.sleep(0.01)
+            cache.set("d", b"d" * 10)
+            self.assertEqual([b"a" * 10, None, b"c" * 10, b"d" * 10],
+                             [cache.get(key) for key in ["a", "b", "c", "d"]])
+
+    def test_get_does_not_take_write_lock(self):
+        with SqliteCache(self.directory) as cache:
+            cache.set("a", b"a")
+            # Another process holds the write lock
+            writer = sqlite3.connect(cache.path, timeout=0,
+                                     isolation_level=None)
+            try:
+                writer.execute("BEGIN IMMEDIATE")
+                self.assertEqual(b"a", cache.get("a"))
+            finally:
+                writer.close()
+
+    def test_persistent(self):
+        with SqliteCache(self.directory) as cache:
+            cache.set("a", b"a")
+        with SqliteCache(self.directory) as cache:
+            self.assertEqual(b"a", cache.get("a"))
+
+    def test_client_help_cache(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+            with MockEpoServer(dxl_client):
+                with SqliteCache(self.directory) as cache:
+                    self.assertEqual(
+                        HELP_CMD_RESPONSE_PAYLOAD,
+                        EpoClient(dxl_client, cache=cache).help(cache_ttl=60))
+                # A client created after a restart uses the cached response
+                with SqliteCache(self.directory) as cache:
+                    epo_client = EpoClient(dxl_client, cache=cache)
+                    with patch.object(epo_client, "_invoke_command",
+                                      side_effect=Exception("Not cached")):
+                        self.assertEqual(HELP_CMD_RESPONSE_PAYLOAD,
+                                         epo_client.help(cache_ttl=60))
@@ -1,5 +1,12 @@
+import json
+import os
+import shutil
+import tempfile
+
 from dxlbootstrap.util import MessageUtils
-from dxlepoclient import EpoClient, OutputFormat
+from dxlepoclient import DxlClientPool, EpoClient, ExportFormat, \
+    OutputFormat, Priority, RateLimitPolicy, RequestScheduler
+from dxlepoclient.ratelimit import remove_rate_limit, set_rate_limit
 from tests.test_base import BaseClientTest
 from tests.test_value_constants import *
 from tests.mock_eposerver import MockEpoServer
@@ -182,3 +189,192 @@ class TestClient(BaseClientTest):
                         res_list = MessageUtils.json_to_dict(res)
 
                         self.assertEqual(res_list, SYSTEM_FIND_PAYLOAD)
+
+    def test_iter_records(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            for use_commands_service in [True, False]:
+                with MockEpoServer(dxl_client,
+                                   use_commands_service=use_commands_service):
+                    epo_client = EpoClient(
+                        dxl_client,
+                        epo_unique_id=LOCAL_TEST_SERVER_NAME + str(
+                            DEFAULT_EPO_SERVER_ID)
+                    )
+
+                    records = epo_client.iter_records(
+                        "system.find",
+                        {"searchText": SYSTEM_FIND_OSTYPE_LINUX})
+
+                    self.assertEqual(list(records), SYSTEM_FIND_PAYLOAD)
+
+    def test_export(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client):
+                epo_client = EpoClient(
+                    dxl_client,
+                    epo_unique_id=LOCAL_TEST_SERVER_NAME + str(
+                        DEFAULT_EPO_SERVER_ID)
+                )
+
+                export_dir = tempfile.mkdtemp()
+                try:
+                    path = os.path.join(export_dir, "systems.ndjson")
+                    result = epo_client.export(
+                        "system.find",
+                        {"searchText": SYSTEM_FIND_OSTYPE_LINUX},
+                        path)
+                    self.assertEqual(result.rows_written,
+                                     len(SYSTEM_FIND_PAYLOAD))
+                    with open(path) as export_file:
+                        self.assertEqual(
+                            [json.loads(line) for line in export_file],
+                            SYSTEM_FIND_PAYLOAD)
+
+                    path = os.path.join(export_dir, "systems.csv")
+                    result = epo_client.export(
+                        "system.find",
+                        {"searchText": SYSTEM_FIND_OSTYPE_LINUX},
+                        path,
+                        fmt=ExportFormat.CSV,
+                        fields=["EPOLeafNode.AgentGUID"])
+                    self.assertEqual(result.rows_written,
+                                     len(SYSTEM_FIND_PAYLOAD))
+                    with open(path) as export_file:
+                        self.assertEqual(
+                            export_file.read().splitlines(),
+                            ["EPOLeafNode.AgentGUID"] +
+                            [system["EPOLeafNode.AgentGUID"]
+                             for system in SYSTEM_FIND_PAYLOAD])
+                finally:
+                    shutil.rmtree(export_dir)
+
+    def test_run_command_synthetic_inventory(self):
+        for dxl_client, _ in self.iter_epo_servers(system_count=500, seed=1,
+                                                   record_size=1024):
+            epo_client = EpoClient(dxl_client)
+
+            systems = list(epo_client.iter_records(
+                SYSTEM_FIND_CMD_NAME, {"searchText": ""}))
+            self.assertEqual(500, len(systems))
+            self.assertEqual(
+                500, len(set(system["EPOLeafNode.AgentGUID"]
+                             for system in systems)))
+            for system in systems:
+                self.assertGreaterEqual(len(json.dumps(system)), 1000)
+
+            linux_systems = MessageUtils.json_to_dict(
+                epo_client.run_command(
+                    SYSTEM_FIND_CMD_NAME,
+                    {"searchText": SYSTEM_FIND_OSTYPE_LINUX}))
+            self.assertTrue(linux_systems)
+            self.assertLess(len(linux_systems), 500)
+            for system in linux_systems:
+                self.assertEqual(
+                    SYSTEM_FIND_OSTYPE_LINUX,
+                    system["EPOComputerProperties.OSType"])
+
+            named_systems = MessageUtils.json_to_dict(
+                epo_client.run_command(
+                    SYSTEM_FIND_CMD_NAME,
+                    {"searchText": "000042",
+                     "searchNameOnly": "true"}))
+            self.assertEqual(1, len(named_systems))
+
+    def test_run_command_with_fields(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            fields = ["EPOComputerProperties.ComputerName",
+                      "EPOLeafNode.AgentGUID"]
+            with MockEpoServer(dxl_client, system_count=50):
+                epo_client = EpoClient(dxl_client)
+                systems = epo_client.run_command(SYSTEM_FIND_CMD_NAME,
+                                                 fields=fields)
+                self.assertIsInstance(systems, list)
+                self.assertEqual(50, len(systems))
+                for system in systems:
+                    self.assertEqual(set(fields), set(system))
+                self.assertEqual(systems, list(epo_client.iter_records(
+                    SYSTEM_FIND_CMD_NAME, fields=fields)))
+                self.assertRaisesRegex(
+                    Exception, "Fields can only be specified",
+                    epo_client.run_command, SYSTEM_FIND_CMD_NAME,
+                    output_format=OutputFormat.XML, fields=fields)
+
+    def test_run_command_synthetic_errors(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client, error_rate=1):
+                epo_client = EpoClient(dxl_client)
+                self.assertRaisesRegex(Exception, "Synthetic error",
+                                       epo_client.run_command,
+                                       SYSTEM_FIND_CMD_NAME)
+
+    def test_run_command_rate_limited(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client):
+                epo_id = LOCAL_TEST_SERVER_NAME + str(DEFAULT_EPO_SERVER_ID)
+                epo_client = EpoClient(dxl_client, epo_unique_id=epo_id)
+
+                set_rate_limit(epo_id, 0.001, burst=1,
+                               policy=RateLimitPolicy.FAIL_FAST)
+                try:
+                    epo_client.run_command("system.find")
+                    self.assertRaisesRegex(Exception,
+                                           "Rate limit exceeded",
+                                           epo_client.run_command,
+                                           "system.find")
+                finally:
+                    remove_rate_limit(epo_id)
+
+    def test_run_command_with_scheduler(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client):
+                scheduler = RequestScheduler()
+                epo_client = EpoClient(
+                    dxl_client,
+                    epo_unique_id=LOCAL_TEST_SERVER_NAME + str(
+                        DEFAULT_EPO_SERVER_ID),
+                    scheduler=scheduler
+                )
+
+                res = epo_client.run_command(
+                    "system.find",
+                    {"searchText": SYSTEM_FIND_OSTYPE_LINUX},
+                    priority=Priority.INTERACTIVE)
+
+                self.assertEqual(MessageUtils.json_to_dict(res),
+                                 SYSTEM_FIND_PAYLOAD)
+                metrics = scheduler.metrics[Priority.INTERACTIVE]
+                self.assertEqual(metrics["dispatched"], 1)
+                self.assertEqual(metrics["in_flight"], 0)
+
+    def test_run_command_with_client_pool(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client):
+                pool = DxlClientPool([dxl_client])
+                epo_client = EpoClient(
+                    pool,
+                    epo_unique_id=LOCAL_TEST_SERVER_NAME + str(
+                        DEFAULT_EPO_SERVER_ID)
+                )
+
+                res = epo_client.run_command(
+                    "system.find",
+                    {"searchText": SYSTEM_FIND_OSTYPE_LINUX})
+
+                self.assertEqual(MessageUtils.json_to_dict(res),
+                                 SYSTEM_FIND_PAYLOAD)
+                self.assertEqual(pool.stats[0]["outstanding"], 0)
+                self.assertGreater(pool.stats[0]["requests"], 0)
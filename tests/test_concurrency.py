@@ -0,0 +1,102 @@
+import threading
+import time
+
+from mock import Mock
+from dxlepoclient import AdaptiveConcurrency, BatchExecutor, Deadline, \
+    EpoClient
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+from tests.mock_eposerver import MockEpoServer
+
+
+class TestAdaptiveConcurrency(BaseClientTest):
+
+    def test_additive_increase(self):
+        concurrency = AdaptiveConcurrency(initial=2, maximum=4)
+        # About one increase for each limit's worth of fast requests
+        for _ in range(3):
+            concurrency.release(concurrency.acquire())
+        self.assertEqual(3, concurrency.limit)
+        for _ in range(20):
+            concurrency.release(concurrency.acquire())
+        metrics = concurrency.metrics
+        self.assertEqual(4, metrics["limit"])
+        self.assertEqual(0, metrics["in_flight"])
+        self.assertEqual(2, metrics["increases"])
+        self.assertEqual([2, 3, 4],
+                         [limit for _, limit in metrics["history"]])
+
+    def test_slow_requests_hold_limit(self):
+        concurrency = AdaptiveConcurrency(initial=2, target_latency=0.01)
+        token = concurrency.acquire()
+        time.sleep(0.02)
+        concurrency.release(token)
+        self.assertEqual(2, concurrency.limit)
+
+    def test_multiplicative_decrease(self):
+        concurrency = AdaptiveConcurrency(initial=8, maximum=8)
+        tokens = [concurrency.acquire() for _ in range(8)]
+        # Failures of requests that were in flight when the limit was cut
+        # result in a single decrease
+        for token in tokens:
+            concurrency.release(token, failed=True)
+        self.assertEqual(4, concurrency.limit)
+        concurrency.release(concurrency.acquire(), failed=True)
+        self.assertEqual(2, concurrency.limit)
+        for _ in range(3):
+            concurrency.release(concurrency.acquire(), failed=True)
+        self.assertEqual(1, concurrency.limit)
+        self.assertEqual(5, concurrency.metrics["decreases"])
+
+    def test_acquire_waits_for_limit(self):
+        concurrency = AdaptiveConcurrency(initial=1)
+        token = concurrency.acquire()
+        with self.assertRaisesRegex(Exception, "Deadline exceeded"):
+            concurrency.acquire(Deadline(0.05))
+        acquired = []
+        thread = threading.Thread(
+            target=lambda: acquired.append(concurrency.acquire()))
+        thread.start()
+        time.sleep(0.05)
+        self.assertEqual([], acquired)
+        concurrency.release(token)
+        thread.join(5)
+        self.assertEqual(1, len(acquired))
+
+    def test_invalid_settings(self):
+        self.assertRaisesRegex(Exception, "Initial limit",
+                               AdaptiveConcurrency, initial=10, maximum=5)
+        self.assertRaisesRegex(Exception, "Decrease must be between 0 and 1",
+                               AdaptiveConcurrency, decrease=1)
+
+    def test_batch_executor(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client, error_rate=0.2):
+                epo_client = EpoClient(dxl_client)
+                concurrency = AdaptiveConcurrency(initial=1, maximum=4)
+                executor = BatchExecutor(epo_client, concurrency=concurrency)
+                results = list(executor.run(
+                    [(SYSTEM_FIND_CMD_NAME, None)] * 50))
+                self.assertIn("Synthetic error", " ".join(
+                    result.error for result in results
+                    if not result.succeeded))
+                metrics = concurrency.metrics
+                self.assertEqual(0, metrics["in_flight"])
+                self.assertGreater(metrics["increases"], 0)
+                self.assertGreater(metrics["decreases"], 0)
+                self.assertEqual(concurrency.limit,
+                                 executor.summary["concurrency_limit"])
+
+    def test_rate_limit_rejection_is_not_a_failure(self):
+        epo_client = Mock()
+        epo_client.run_command.return_value = "[]"
+        concurrency = AdaptiveConcurrency(initial=2, maximum=4)
+        executor = BatchExecutor(epo_client, rate=1, concurrency=concurrency)
+        results = list(executor.run([(SYSTEM_FIND_CMD_NAME, None)] * 3,
+                                    deadline=Deadline(0.5)))
+        self.assertIn("Rate limit exceeded", " ".join(
+            result.error for result in results if not result.succeeded))
+        self.assertEqual(0, concurrency.metrics["decreases"])
+        self.assertEqual(0, concurrency.metrics["in_flight"])
@@ -0,0 +1,122 @@
+import threading
+import time
+
+from mock import Mock
+from dxlclient import Request
+from dxlclient._request_manager import RequestManager
+from dxlepoclient import BatchExecutor, Deadline, EpoClient, Priority, \
+    RequestScheduler
+from dxlepoclient.deadline import deadline_request
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+from tests.mock_eposerver import MockEpoServer
+
+
+class TestDeadline(BaseClientTest):
+
+    def test_remaining_and_expiry(self):
+        deadline = Deadline(60)
+        self.assertGreater(deadline.remaining, 59)
+        self.assertFalse(deadline.expired)
+        self.assertEqual(5, deadline.cap(5))
+        self.assertLessEqual(deadline.cap(120), 60)
+
+        deadline = Deadline(0)
+        self.assertTrue(deadline.expired)
+        self.assertEqual(0, deadline.remaining)
+        self.assertRaisesRegex(Exception, "Deadline exceeded", deadline.check)
+
+        deadline = Deadline()
+        self.assertIsNone(deadline.remaining)
+        self.assertEqual(120, deadline.cap(120))
+
+        self.assertRaisesRegex(Exception, "Timeout must be greater", Deadline,
+                               -1)
+
+    def test_cancel(self):
+        deadline = Deadline(60)
+        calls = []
+        deadline._add_listener(lambda: calls.append(1))
+        deadline.cancel()
+        deadline.cancel()
+        self.assertTrue(deadline.cancelled)
+        self.assertEqual([1], calls)
+        self.assertRaisesRegex(Exception, "Deadline cancelled", deadline.check)
+        deadline._add_listener(lambda: calls.append(2))
+        self.assertEqual([1, 2], calls)
+
+    def test_scheduler_drops_expired_request(self):
+        scheduler = RequestScheduler(max_concurrency=1)
+        scheduler.acquire(Priority.NORMAL)
+        self.assertRaisesRegex(Exception, "Deadline exceeded",
+                               scheduler.acquire, Priority.NORMAL,
+                               Deadline(0.1))
+        self.assertEqual(0, scheduler.metrics[Priority.NORMAL]["queue_depth"])
+
+        deadline = Deadline()
+        timer = threading.Timer(0.1, deadline.cancel)
+        timer.start()
+        self.assertRaisesRegex(Exception, "Deadline cancelled",
+                               scheduler.acquire, Priority.BULK, deadline)
+        scheduler.release(Priority.NORMAL)
+        scheduler.acquire(Priority.BULK)
+        scheduler.release(Priority.BULK)
+
+    def test_run_command(self):
+        for dxl_client, _ in self.iter_epo_servers():
+            epo_client = EpoClient(dxl_client)
+            self.assertIn("core.help", epo_client.run_command(
+                CORE_HELP_CMD_NAME, deadline=Deadline(10)))
+            self.assertRaisesRegex(Exception, "Deadline exceeded",
+                                   epo_client.run_command,
+                                   CORE_HELP_CMD_NAME,
+                                   deadline=Deadline(0))
+
+    def test_run_command_timeout_and_cancel(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client, latency=1):
+                epo_client = EpoClient(dxl_client)
+
+                start = time.time()
+                self.assertRaisesRegex(Exception, "Deadline exceeded",
+                                       epo_client.run_command,
+                                       CORE_HELP_CMD_NAME,
+                                       deadline=Deadline(0.2))
+                self.assertLess(time.time() - start, 0.9)
+
+                deadline = Deadline(10)
+                threading.Timer(0.1, deadline.cancel).start()
+                start = time.time()
+                self.assertRaisesRegex(Exception, "Deadline cancelled",
+                                       epo_client.run_command,
+                                       CORE_HELP_CMD_NAME,
+                                       deadline=deadline)
+                self.assertLess(time.time() - start, 0.9)
+
+    def test_expired_request_removed_from_client(self):
+        request_manager = RequestManager(Mock())
+        dxl_client = Mock(spec=["async_request"])
+        dxl_client._request_manager = request_manager
+        dxl_client.async_request.side_effect = request_manager.async_request
+
+        self.assertRaisesRegex(Exception, "Deadline exceeded",
+                               deadline_request, dxl_client,
+                               Request("/test"), 10, Deadline(0.1))
+        self.assertEqual({}, request_manager.callback_map)
+        self.assertEqual(set(), request_manager.current_request_message_ids)
+
+    def test_batch_drops_queued_commands(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client, latency=0.3):
+                epo_client = EpoClient(dxl_client)
+                executor = BatchExecutor(epo_client, max_in_flight=1)
+                results = list(executor.run(
+                    [(CORE_HELP_CMD_NAME, None)] * 10, Deadline(0.5)))
+                self.assertTrue(results[0].succeeded)
+                self.assertLess(len(results), 10)
+                for result in results[2:]:
+                    self.assertEqual("Deadline exceeded", result.error)
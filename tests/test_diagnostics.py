@@ -0,0 +1,76 @@
+from dxlepoclient import CallRecorder, EpoClient, OutputFormat
+from dxlepoclient.tracing import Span
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+from tests.mock_eposerver import MockEpoServer
+
+
+class TestDiagnostics(BaseClientTest):
+
+    @staticmethod
+    def _record(recorder, command_name, duration, params=None):
+        span = recorder._wrap_span(Span(), "epo", command_name, params,
+                                   OutputFormat.JSON)
+        span._start -= duration
+        span.end()
+
+    def test_recent_and_slowest(self):
+        recorder = CallRecorder(capacity=3, slowest=2, max_params_length=10)
+        for index, duration in enumerate([5, 1, 7, 2, 3]):
+            self._record(recorder, "cmd{0}".format(index), duration,
+                         {"searchText": "x" * 20})
+        self.assertEqual(["cmd4", "cmd3", "cmd2"],
+                         [call["command"] for call in recorder.recent])
+        self.assertEqual(["cmd2", "cmd0"],
+                         [call["command"] for call in recorder.slowest])
+        self.assertEqual('{"searchTe...', recorder.recent[0]["params"])
+        recorder.clear()
+        self.assertEqual({"recent": [], "slowest": []}, recorder.snapshot())
+
+    def test_params_encoding_stops_at_max_length(self):
+        recorder = CallRecorder(max_params_length=10)
+        # The value which cannot be encoded is never reached
+        self._record(recorder, "cmd", 1,
+                     {"queryText": "x" * 20, "z": object()})
+        self.assertEqual('{"queryTex...', recorder.recent[0]["params"])
+        self._record(recorder, "cmd", 1, {"z": object()})
+        self.assertTrue(recorder.recent[0]["params"].startswith("{'z'"))
+
+    def test_client_calls(self):
+        for dxl_client, use_commands_service in self.iter_epo_servers():
+            recorder = CallRecorder()
+            epo_client = EpoClient(dxl_client, diagnostics=recorder)
+            res = epo_client.run_command(
+                SYSTEM_FIND_CMD_NAME,
+                {"searchText": SYSTEM_FIND_OSTYPE_LINUX})
+            epo_client.run_command("unknown.command")
+
+            unknown_call, find_call = recorder.recent
+            self.assertEqual(SYSTEM_FIND_CMD_NAME, find_call["command"])
+            self.assertEqual(
+                '{"searchText": "' + SYSTEM_FIND_OSTYPE_LINUX + '"}',
+                find_call["params"])
+            self.assertEqual(
+                "commands" if use_commands_service else "remote",
+                find_call["route"])
+            self.assertEqual(len(res.encode("utf-8")),
+                             find_call["response_size"])
+            self.assertGreater(find_call["request_size"], 0)
+            self.assertGreaterEqual(find_call["duration"], 0)
+            self.assertEqual("success", find_call["outcome"])
+            self.assertEqual("unknown.command", unknown_call["command"])
+            self.assertEqual(2, len(recorder.slowest))
+
+    def test_client_error_calls(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client, error_rate=1):
+                recorder = CallRecorder()
+                epo_client = EpoClient(dxl_client, diagnostics=recorder)
+                with self.assertRaisesRegex(Exception, "Synthetic error"):
+                    epo_client.run_command(SYSTEM_FIND_CMD_NAME)
+                call = recorder.recent[0]
+                self.assertEqual("error", call["outcome"])
+                self.assertIn("Synthetic error", call["error"])
+                self.assertIsNotNone(call["error_code"])
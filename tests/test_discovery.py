@@ -0,0 +1,75 @@
+from dxlepoclient import EpoClient, Route, ServiceRegistryMonitor
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+from tests.mock_eposerver import MockEpoServer
+
+
+class TestDiscovery(BaseClientTest):
+
+    def test_monitor_initial_routes(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client, use_commands_service=True,
+                               id_number=0), \
+                    MockEpoServer(dxl_client, use_commands_service=False,
+                                  id_number=1):
+                with ServiceRegistryMonitor(dxl_client) as monitor:
+                    self.assertEqual(
+                        {LOCAL_TEST_SERVER_NAME + "0": Route.COMMANDS,
+                         LOCAL_TEST_SERVER_NAME + "1": Route.REMOTE},
+                        monitor.routes)
+                    self.assertIsNone(monitor.get_route("unknown"))
+
+    def test_monitor_tracks_registrations(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+            epo_id = LOCAL_TEST_SERVER_NAME + str(DEFAULT_EPO_SERVER_ID)
+            changes = []
+
+            with ServiceRegistryMonitor(dxl_client) as monitor:
+                monitor.add_listener(
+                    lambda epo_unique_id, route:
+                    changes.append((epo_unique_id, route)))
+                self.assertEqual(set(), monitor.epo_unique_ids)
+
+                with MockEpoServer(dxl_client, use_commands_service=True):
+                    self.assertTrue(self.wait_for(
+                        lambda: monitor.get_route(epo_id) == Route.COMMANDS))
+                self.assertTrue(self.wait_for(
+                    lambda: monitor.get_route(epo_id) is None))
+                self.assertEqual([(epo_id, Route.COMMANDS), (epo_id, None)],
+                                 changes)
+
+    def test_client_switches_route(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+            epo_id = LOCAL_TEST_SERVER_NAME + str(DEFAULT_EPO_SERVER_ID)
+
+            with MockEpoServer(dxl_client, use_commands_service=True), \
+                    ServiceRegistryMonitor(dxl_client) as monitor:
+                epo_client = EpoClient(dxl_client, service_monitor=monitor)
+                self.assertEqual(epo_id, epo_client._epo_unique_id)
+                self.assertTrue(epo_client._use_epo_commands_service)
+                self.assertIn("core.help", epo_client.help())
+
+                with MockEpoServer(dxl_client, use_commands_service=False):
+                    self.assertTrue(self.wait_for(
+                        lambda: not epo_client._use_epo_commands_service))
+                    self.assertIn("core.help", epo_client.help())
+
+                self.assertTrue(self.wait_for(
+                    lambda: epo_client._use_epo_commands_service))
+                self.assertIn("core.help", epo_client.help())
+
+    def test_client_invalid_unique_id(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client, use_commands_service=True), \
+                    ServiceRegistryMonitor(dxl_client) as monitor:
+                epo_id = LOCAL_TEST_SERVER_NAME + "1"
+                self.assertRaisesRegex(
+                    Exception, "No ePO DXL services .* for id: " + epo_id,
+                    EpoClient, dxl_client, epo_unique_id=epo_id,
+                    service_monitor=monitor)
@@ -0,0 +1,48 @@
+from dxlbootstrap.util import MessageUtils
+from dxlepoclient import ProcessCommandExecutor, ResultMode
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+from tests.mock_dxlclient import MockDxlClient
+from tests.mock_eposerver import MockEpoServer
+
+
+def create_dxl_client():
+    dxl_client = MockDxlClient()
+    dxl_client.connect()
+    MockEpoServer(dxl_client).__enter__()
+    return dxl_client
+
+
+class TestExecutor(BaseClientTest):
+
+    def test_map_commands(self):
+        with ProcessCommandExecutor(dxl_client_factory=create_dxl_client,
+                                    processes=2) as executor:
+            results = list(executor.map_commands(
+                [("system.find", {"searchText": SYSTEM_FIND_OSTYPE_LINUX}),
+                 ("system.find", {"searchText": "none"})] * 3))
+
+        self.assertEqual(results, [SYSTEM_FIND_PAYLOAD, []] * 3)
+
+    def test_run_command_raw(self):
+        with ProcessCommandExecutor(dxl_client_factory=create_dxl_client,
+                                    processes=1,
+                                    result_mode=ResultMode.RAW) as executor:
+            result = executor.run_command(
+                "system.find", {"searchText": SYSTEM_FIND_OSTYPE_LINUX})
+
+        self.assertIsInstance(result, bytes)
+        self.assertEqual(MessageUtils.json_to_dict(result.decode("utf-8")),
+                         SYSTEM_FIND_PAYLOAD)
+
+    def test_error_response(self):
+        with ProcessCommandExecutor(dxl_client_factory=create_dxl_client,
+                                    processes=1) as executor:
+            self.assertRaisesRegex(Exception, "unable to locate service",
+                                   executor.run_command,
+                                   "system.find", output_format="xml")
+
+    def test_missing_client_configuration(self):
+        self.assertRaisesRegex(Exception,
+                               "configuration file or DXL client factory",
+                               ProcessCommandExecutor)
@@ -0,0 +1,62 @@
+import json
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+from mock import patch
+from dxlepoclient import ExportFormat
+from dxlepoclient.export import export_records
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+
+
+class TestExport(BaseClientTest):
+
+    def setUp(self):
+        self.export_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.export_dir)
+
+    def test_export_records_ndjson(self):
+        path = os.path.join(self.export_dir, "out.ndjson")
+        result = export_records(iter(SYSTEM_FIND_PAYLOAD), path,
+                                fields=["EPOLeafNode.AgentGUID"])
+
+        self.assertEqual(result.rows_written, len(SYSTEM_FIND_PAYLOAD))
+        self.assertEqual(result.bytes_written, os.path.getsize(path))
+        with open(path) as export_file:
+            self.assertEqual(
+                [json.loads(line) for line in export_file],
+                [{"EPOLeafNode.AgentGUID": system["EPOLeafNode.AgentGUID"]}
+                 for system in SYSTEM_FIND_PAYLOAD])
+
+    def test_export_records_csv(self):
+        path = os.path.join(self.export_dir, "out.csv")
+        result = export_records(
+            iter([{"a": 1, "b": "x,y"}, {"a": 2, "b": None, "c": 3}]),
+            path, export_format=ExportFormat.CSV)
+
+        self.assertEqual(result.rows_written, 2)
+        with open(path) as export_file:
+            self.assertEqual(export_file.read().splitlines(),
+                             ["a,b", '1,"x,y"', "2,"])
+
+    def test_export_records_csv_extra_fields(self):
+        path = os.path.join(self.export_dir, "out.csv")
+        with patch("dxlepoclient.export.logger") as logger:
+            export_records(
+                iter([OrderedDict([("b", 1), ("a", 2)]),
+                      {"a": 3, "c": 4}, {"c": 5, "d": 6}]),
+                path, export_format=ExportFormat.CSV)
+        with open(path) as export_file:
+            self.assertEqual(export_file.read().splitlines(),
+                             ["b,a", "1,2", ",3", ","])
+        self.assertEqual(["c", "d"], [call[0][1] for call in
+                                      logger.warning.call_args_list])
+
+    def test_export_records_invalid_format(self):
+        self.assertRaisesRegex(
+            Exception, "Invalid export format: xml",
+            export_records, [], os.path.join(self.export_dir, "out"), "xml")
@@ -0,0 +1,71 @@
+import json
+
+from mock import patch
+from dxlepoclient import EpoClient, LazyResult, OutputFormat
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+from tests.mock_eposerver import MockEpoServer
+
+
+class TestLazyResult(BaseClientTest):
+
+    RECORDS = [{"a": "x,]\"[{", "b": [1, {"c": 2}]}, None, 3, "text", []]
+
+    def test_indexing_and_slicing(self):
+        result = LazyResult(json.dumps(self.RECORDS, indent=2))
+        self.assertEqual(self.RECORDS[0], result[0])
+        self.assertIs(result[0], result[0])
+        self.assertEqual(self.RECORDS[-1], result[-1])
+        self.assertEqual(len(self.RECORDS), len(result))
+        self.assertEqual(self.RECORDS, list(result))
+        for index in [slice(1, 3), slice(None, 10), slice(3, None),
+                      slice(-2, None), slice(None, None, -2), slice(7, 9)]:
+            self.assertEqual(self.RECORDS[index], result[index])
+        self.assertIn(3, result)
+        self.assertRaises(IndexError, result.__getitem__, len(self.RECORDS))
+
+    def test_records_decoded_on_access(self):
+        records = [{"a": index, "b": "x"} for index in range(10)]
+        result = LazyResult(json.dumps(records).encode("utf-8"))
+        with patch.object(result._decoder, "raw_decode",
+                          wraps=result._decoder.raw_decode) as raw_decode:
+            self.assertEqual(records[:2], result[:2])
+            self.assertEqual(2, raw_decode.call_count)
+            # Only the records up to the end of the slice are indexed
+            self.assertEqual(2, len(result._starts))
+            len(result)
+            self.assertEqual(2, raw_decode.call_count)
+
+    def test_other_payloads(self):
+        self.assertEqual(0, len(LazyResult(" [ ] ")))
+        self.assertEqual([{"a": 1}], list(LazyResult('{"a": 1}')))
+        self.assertEqual([{"a": 1}], list(LazyResult('[{"a": 1, "b": 2}]',
+                                                     fields=["a"])))
+        with self.assertRaises(ValueError):
+            len(LazyResult('[{"a": 1}, '))
+        with self.assertRaises(ValueError):
+            len(LazyResult('[[1] {"a": 1}]'))
+
+    def test_client_lazy_result(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client):
+                epo_client = EpoClient(dxl_client)
+                params = {"searchText": SYSTEM_FIND_OSTYPE_LINUX}
+                result = epo_client.run_command(SYSTEM_FIND_CMD_NAME, params,
+                                                lazy=True)
+                self.assertIsInstance(result, LazyResult)
+                self.assertEqual(SYSTEM_FIND_PAYLOAD, list(result))
+
+                result = epo_client.run_command(
+                    SYSTEM_FIND_CMD_NAME, params, lazy=True,
+                    fields=["EPOComputerProperties.OSType"])
+                self.assertEqual(
+                    [{"EPOComputerProperties.OSType": SYSTEM_FIND_OSTYPE_LINUX}],
+                    result[:1])
+
+                with self.assertRaisesRegex(Exception, "Lazy results"):
+                    epo_client.run_command(SYSTEM_FIND_CMD_NAME, params,
+                                           output_format=OutputFormat.XML,
+                                           lazy=True)
@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+from tests.test_base import BaseClientTest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestLazyImport(BaseClientTest):
+
+    @staticmethod
+    def run_script(script):
+        return subprocess.check_output(
+            [sys.executable, "-c", script], cwd=ROOT_DIR).decode(
+                "utf-8").strip()
+
+    def test_import_does_not_load_dxl_stack(self):
+        self.assertEqual(
+            self.run_script(
+                "import sys, dxlepoclient; "
+                "dxlepoclient.get_version(); "
+                "dxlepoclient.OutputFormat.JSON; "
+                "print(sorted(name for name in sys.modules "
+                "if name.split('.')[0] in ('dxlclient', 'dxlbootstrap')))"),
+            "[]")
+
+    def test_import_does_not_load_submodules(self):
+        self.assertEqual(
+            self.run_script(
+                "import sys, dxlepoclient; "
+                "print(sorted(name for name in sys.modules "
+                "if name.startswith('dxlepoclient.')))"),
+            "['dxlepoclient._version']")
+
+    def test_lazy_attributes(self):
+        self.assertEqual(
+            self.run_script(
+                "from dxlepoclient import EpoClient, OutputFormat; "
+                "from dxlepoclient.client import OutputFormat as Format; "
+                "print(EpoClient.__name__, OutputFormat is Format)"),
+            "EpoClient True")
+
+    def test_dir(self):
+        self.assertEqual(
+            self.run_script(
+                "import dxlepoclient; "
+                "print('QueryWatcher' in dir(dxlepoclient), "
+                "hasattr(dxlepoclient, 'Unknown'))"),
+            "True False")
@@ -0,0 +1,94 @@
+from dxlepoclient import RecordMerger, merge_records
+from dxlepoclient.merge import LAST_UPDATE_FIELD
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+from tests.mock_requesthandlers import SyntheticInventory
+
+GUID_FIELD = "EPOLeafNode.AgentGUID"
+NAME_FIELD = "EPOComputerProperties.ComputerName"
+
+
+def system(guid, name, last_update=None):
+    ret = {GUID_FIELD: guid, NAME_FIELD: name}
+    if last_update:
+        ret[LAST_UPDATE_FIELD] = last_update
+    return ret
+
+
+class TestMerge(BaseClientTest):
+
+    def test_first_wins(self):
+        server1 = [system("A", "a1"), system("B", "b1")]
+        server2 = [system("B", "b2"), system("C", "c2"), system("A", "a2")]
+        merger = RecordMerger()
+        self.assertEqual(["a1", "b1", "c2"],
+                         [record[NAME_FIELD]
+                          for record in merger.merge([server1, server2])])
+        self.assertEqual({"records": 5, "unique": 3, "duplicates": 2},
+                         merger.metrics)
+
+    def test_first_wins_is_streamed(self):
+        def stream():
+            yield system("A", "a")
+            raise Exception("Stream read too far")
+
+        records = merge_records([stream()])
+        self.assertEqual("a", next(records)[NAME_FIELD])
+        with self.assertRaisesRegex(Exception, "Stream read too far"):
+            next(records)
+
+    def test_most_recent_wins(self):
+        server1 = [system("A", "a1", "2018-01-02T00:00:00"),
+                   system("B", "b1", "2018-01-05T00:00:00"),
+                   system("C", "c1")]
+        server2 = [system("B", "b2", "2018-01-03T00:00:00"),
+                   system("A", "a2", "2018-01-04T00:00:00"),
+                   system("C", "c2", "2018-01-01T00:00:00"),
+                   system("A", "a3", "2018-01-04T00:00:00")]
+        merger = RecordMerger(most_recent=LAST_UPDATE_FIELD,
+                              source_field="EPOServer")
+        records = list(merger.merge({"epo1": server1, "epo2": server2}))
+        self.assertEqual([("a2", "epo2"), ("b1", "epo1"), ("c2", "epo2")],
+                         [(record[NAME_FIELD], record["EPOServer"])
+                          for record in records])
+        self.assertEqual({"records": 7, "unique": 3, "duplicates": 4},
+                         merger.metrics)
+
+    def test_most_recent_timestamp_offsets(self):
+        server1 = [system("A", "a1", "2018-01-02T10:00:00-08:00"),
+                   system("B", "b1", "2018-01-02T10:00:00.5Z")]
+        server2 = [system("A", "a2", "2018-01-02T12:00:00+00:00"),
+                   system("B", "b2", "2018-01-02T11:00:00+01:00"),
+                   system("A", "a3", "not a timestamp")]
+        records = merge_records([server1, server2],
+                                most_recent=LAST_UPDATE_FIELD)
+        self.assertEqual(["a1", "b1"],
+                         [record[NAME_FIELD] for record in records])
+
+    def test_most_recent_streams_missing_keys(self):
+        def stream():
+            yield system(None, "a")
+            raise Exception("Stream read too far")
+
+        records = merge_records([stream()], most_recent=LAST_UPDATE_FIELD)
+        self.assertEqual("a", next(records)[NAME_FIELD])
+        with self.assertRaisesRegex(Exception, "Stream read too far"):
+            next(records)
+
+    def test_key_callable_and_missing_keys(self):
+        records = list(merge_records(
+            [[system("a", "1"), system(None, "2")],
+             [system("A", "3"), system(None, "4")]],
+            key=lambda record: record[GUID_FIELD].upper()
+            if record[GUID_FIELD] else None))
+        self.assertEqual(["1", "2", "4"],
+                         [record[NAME_FIELD] for record in records])
+
+    def test_overlapping_inventories(self):
+        inventory = SyntheticInventory(200, seed=1).systems
+        merger = RecordMerger(most_recent=LAST_UPDATE_FIELD)
+        records = list(merger.merge([inventory[:150], inventory[50:]]))
+        self.assertEqual(200, len(records))
+        self.assertEqual(200, len(set(record[GUID_FIELD]
+                                      for record in records)))
+        self.assertEqual(100, merger.metrics["duplicates"])
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+import json
+
+from dxlepoclient.parsers import OutputFormat, iter_json_records, \
+    iter_payload_chunks, iter_payload_records, iter_projected_json_records, \
+    iter_text_records, iter_xml_records, project_json_array
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+
+SYSTEM_FIND_XML_PAYLOAD = b"""<?xml version="1.0" encoding="UTF-8"?>
+<result>
+  <list id="1">
+    <row>
+      <EPOComputerProperties>
+        <ComputerName>sys1</ComputerName>
+        <OSType>Linux</OSType>
+      </EPOComputerProperties>
+      <EPOLeafNode>
+        <AgentGUID>11111111-2222-3333-4444-555555555555</AgentGUID>
+        <Tags></Tags>
+      </EPOLeafNode>
+    </row>
+    <row>
+      <EPOComputerProperties>
+        <ComputerName>sys2</ComputerName>
+        <OSType>Linux</OSType>
+      </EPOComputerProperties>
+      <EPOLeafNode>
+        <AgentGUID>66666666-7777-8888-9999-000000000000</AgentGUID>
+        <Tags>Server</Tags>
+      </EPOLeafNode>
+    </row>
+  </list>
+</result>
+"""
+
+SYSTEM_FIND_TEXT_PAYLOAD = b"""OK:\r
+EPOComputerProperties.ComputerName: sys1\r
+EPOComputerProperties.OSType: Linux\r
+EPOLeafNode.AgentGUID: 11111111-2222-3333-4444-555555555555\r
+EPOLeafNode.Tags:\r
+\r
+EPOComputerProperties.ComputerName: sys2\r
+EPOComputerProperties.OSType: Linux\r
+EPOLeafNode.AgentGUID: 66666666-7777-8888-9999-000000000000\r
+EPOLeafNode.Tags: Server\r
+"""
+
+SYSTEM_FIND_RECORDS = [
+    {
+        "EPOComputerProperties.ComputerName": "sys1",
+        "EPOComputerProperties.OSType": "Linux",
+        "EPOLeafNode.AgentGUID": "11111111-2222-3333-4444-555555555555",
+        "EPOLeafNode.Tags": ""
+    },
+    {
+        "EPOComputerProperties.ComputerName": "sys2",
+        "EPOComputerProperties.OSType": "Linux",
+        "EPOLeafNode.AgentGUID": "66666666-7777-8888-9999-000000000000",
+        "EPOLeafNode.Tags": "Server"
+    }
+]
+
+
+class TestParsers(BaseClientTest):
+
+    def test_iter_json_records_across_chunk_boundaries(self):
+        records = SYSTEM_FIND_PAYLOAD + [12345, u"café", None, [1, [2]]]
+        payload = json.dumps(records, ensure_ascii=False).encode("utf-8")
+
+        for chunk_size in [1, 2, 7, len(payload)]:
+            self.assertEqual(
+                list(iter_json_records(
+                    iter_payload_chunks(payload, chunk_size))),
+                records)
+
+    def test_iter_json_records_first_record_key_order(self):
+        records = list(iter_json_records(
+            b'[{"b": 1, "a": {"d": 2, "c": 3}}, {"e": 4}]'))
+        self.assertEqual(["b", "a"], list(records[0].keys()))
+        self.assertEqual(["d", "c"], list(records[0]["a"].keys()))
+        self.assertEqual([{"b": 1, "a": {"d": 2, "c": 3}}, {"e": 4}], records)
+
+    def test_iter_json_records_non_array(self):
+        self.assertEqual(list(iter_json_records(b'{"a": 1}')), [{"a": 1}])
+        self.assertEqual(list(iter_json_records([b" [ ", b"] "])), [])
+
+    def test_iter_json_records_numbers_across_chunk_boundaries(self):
+        records = [1000.25, -2.5e+30, 7, 1e-7, 0]
+        payload = json.dumps(records).encode("utf-8")
+
+        # Split the payload at every offset, including just after the "."
+        # and "e" of the numbers
+        for chunk_size in range(1, len(payload) + 1):
+            self.assertEqual(
+                list(iter_json_records(
+                    iter_payload_chunks(payload, chunk_size))),
+                records)
+
+    def test_iter_json_records_truncated(self):
+        self.assertRaises(ValueError, list,
+                          iter_json_records(b'[{"a": 1}, {"b"'))
+
+    def test_iter_json_records_invalid(self):
+        for payload in [b"[1 2]", b"[1]trailing", b"[1,]", b"[,1]", b"[1,,2]",
+                        b"[1", b"", b'{"a": 1} {}']:
+            for chunk_size in [1, 3, len(payload) or 1]:
+                self.assertRaises(ValueError, list, iter_json_records(
+                    iter_payload_chunks(payload, chunk_size)))
+
+    def test_iter_xml_records(self):
+        for chunk_size in [1, 5, len(SYSTEM_FIND_XML_PAYLOAD)]:
+            self.assertEqual(
+                list(iter_xml_records(iter_payload_chunks(
+                    SYSTEM_FIND_XML_PAYLOAD, chunk_size))),
+                SYSTEM_FIND_RECORDS)
+
+    def test_iter_xml_records_without_list(self):
+        self.assertEqual(list(iter_xml_records(b"<result>true</result>")),
+                         ["true"])
+
+    def test_iter_text_records(self):
+        for chunk_size in [1, 5, len(SYSTEM_FIND_TEXT_PAYLOAD)]:
+            self.assertEqual(
+                list(iter_text_records(iter_payload_chunks(
+                    SYSTEM_FIND_TEXT_PAYLOAD, chunk_size))),
+                SYSTEM_FIND_RECORDS)
+
+    def test_iter_text_records_lines_and_multiline_values(self):
+        payload = b"core.help [command] - Displays help\r\n" \
+                  b"system.find [searchText] - Finds systems\r\n" \
+                  b"\r\n" \
+                  b"Name: first\r\n" \
+                  b"second\r\n"
+        self.assertEqual(
+            list(iter_text_records(payload)),
+            ["core.help [command] - Displays help",
+             "system.find [searchText] - Finds systems",
+             {"Name": "first\nsecond"}])
+
+    def test_projected_records(self):
+        fields = ["EPOComputerProperties.ComputerName", "EPOLeafNode.Tags"]
+        expected = [dict((field, record[field]) for field in fields)
+                    for record in SYSTEM_FIND_RECORDS]
+        for output_format, payload in [
+                (OutputFormat.JSON,
+                 json.dumps(SYSTEM_FIND_RECORDS).encode("utf-8")),
+                (OutputFormat.XML, SYSTEM_FIND_XML_PAYLOAD),
+                (OutputFormat.VERBOSE, SYSTEM_FIND_TEXT_PAYLOAD)]:
+            self.assertEqual(
+                list(iter_payload_records(
+                    iter_payload_chunks(payload, 7), output_format, fields)),
+                expected)
+
+    def test_projected_json_records_nested_values(self):
+        payload = json.dumps([
+            {"a": {"b": [{"c": 1}]}, "d": {"e": 2}},
+            [{"a": 1}],
+            "text"
+        ]).encode("utf-8")
+        self.assertEqual(list(iter_projected_json_records(payload, ["a"])),
+                         [{"a": {"b": [{"c": 1}]}}, [{"a": 1}], "text"])
+        self.assertEqual(list(iter_projected_json_records(payload, [])),
+                         [{}, [{"a": 1}], "text"])
+
+    def test_project_json_array(self):
+        self.assertEqual(
+            [{"a": 1}, {}],
+            project_json_array(b' \n[{"a": 1, "b": 2}, {"b": 3}]', ["a"]))
+        self.assertEqual([], project_json_array(b"[]", ["a"]))
+        self.assertIsNone(project_json_array(b' {"a": 1, "b": 2}', ["a"]))
+        self.assertIsNone(project_json_array(b'"text"', ["a"]))
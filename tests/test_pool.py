@@ -0,0 +1,107 @@
+import threading
+
+from mock import MagicMock, Mock
+from dxlclient.exceptions import DxlException, WaitTimeoutException
+from dxlepoclient import DxlClientPool
+from tests.test_base import BaseClientTest
+
+
+class TestPool(BaseClientTest):
+
+    @staticmethod
+    def create_mock_client(connected=True):
+        dxl_client = MagicMock()
+        dxl_client.connected = connected
+        return dxl_client
+
+    def test_least_outstanding_requests(self):
+        dxl_clients = [self.create_mock_client() for _ in range(2)]
+        pool = DxlClientPool(dxl_clients)
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_request(*_, **__):
+            started.set()
+            release.wait()
+        dxl_clients[0].sync_request.side_effect = slow_request
+
+        thread = threading.Thread(target=pool.sync_request,
+                                  args=("request", 5))
+        thread.start()
+        started.wait()
+
+        # The first client is busy, so the second one should be used
+        for _ in range(3):
+            pool.sync_request("request", 5)
+        self.assertEqual(dxl_clients[1].sync_request.call_count, 3)
+        self.assertEqual(pool.stats[0]["outstanding"], 1)
+
+        release.set()
+        thread.join()
+        self.assertEqual([stats["outstanding"] for stats in pool.stats],
+                         [0, 0])
+        self.assertEqual([stats["requests"] for stats in pool.stats], [1, 3])
+
+    def test_failed_client_removed_from_rotation(self):
+        dxl_clients = [self.create_mock_client() for _ in range(2)]
+        dxl_clients[0].sync_request.side_effect = DxlException("lost")
+        pool = DxlClientPool(dxl_clients)
+
+        self.assertRaises(DxlException, pool.sync_request, "request", 5)
+        for _ in range(3):
+            pool.sync_request("request", 5)
+
+        self.assertEqual(dxl_clients[0].sync_request.call_count, 1)
+        self.assertEqual(dxl_clients[1].sync_request.call_count, 3)
+        self.assertFalse(pool.stats[0]["in_rotation"])
+        self.assertEqual(pool.stats[0]["failures"], 1)
+
+    def test_timeout_does_not_remove_client(self):
+        dxl_client = self.create_mock_client()
+        dxl_client.sync_request.side_effect = WaitTimeoutException("timeout")
+        pool = DxlClientPool([dxl_client])
+
+        self.assertRaises(WaitTimeoutException, pool.sync_request,
+                          "request", 5)
+        self.assertTrue(pool.stats[0]["in_rotation"])
+
+    def test_disconnected_clients_skipped(self):
+        dxl_clients = [self.create_mock_client(connected=False),
+                       self.create_mock_client()]
+        pool = DxlClientPool(dxl_clients)
+
+        pool.sync_request("request", 5)
+        self.assertFalse(dxl_clients[0].sync_request.called)
+
+        dxl_clients[1].connected = False
+        self.assertFalse(pool.connected)
+        self.assertRaisesRegex(Exception, "No pooled DXL clients",
+                               pool.sync_request, "request", 5)
+
+    def test_cancel_async_request(self):
+        dxl_client = self.create_mock_client()
+        request_manager = dxl_client._request_manager = Mock()
+        pool = DxlClientPool([dxl_client])
+        request = Mock(message_id="request")
+        response_callback = Mock()
+
+        pool.async_request(request, response_callback)
+        self.assertEqual(pool.stats[0]["outstanding"], 1)
+        pool.cancel_async_request(request)
+        pool.cancel_async_request(request)
+        self.assertEqual(pool.stats[0]["outstanding"], 0)
+        request_manager.unregister_async_callback.assert_called_once_with(
+            "request")
+
+        # A late response is discarded
+        tracking_callback = dxl_client.async_request.call_args[0][1]
+        tracking_callback.on_response(Mock(request_message_id="request"))
+        self.assertFalse(response_callback.on_response.called)
+        self.assertEqual(pool.stats[0]["outstanding"], 0)
+
+        pool.async_request(request, response_callback)
+        tracking_callback = dxl_client.async_request.call_args[0][1]
+        tracking_callback.on_response(Mock(request_message_id="request"))
+        self.assertEqual(response_callback.on_response.call_count, 1)
+        self.assertEqual(pool.stats[0]["outstanding"], 0)
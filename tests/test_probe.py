@@ -0,0 +1,68 @@
+import time
+
+from dxlepoclient import ServerProber
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+from tests.mock_eposerver import MockEpoServer
+
+
+class TestProbe(BaseClientTest):
+
+    def test_probe_once(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+            epo_id = LOCAL_TEST_SERVER_NAME + str(DEFAULT_EPO_SERVER_ID)
+
+            for use_commands_service in [True, False]:
+                with MockEpoServer(dxl_client,
+                                   use_commands_service=use_commands_service):
+                    prober = ServerProber(dxl_client)
+                    prober.probe_once()
+                    prober.probe_once()
+                    stats = prober.stats
+                    self.assertEqual([epo_id], list(stats))
+                    self.assertTrue(stats[epo_id]["available"])
+                    self.assertEqual(1.0, stats[epo_id]["availability"])
+                    self.assertEqual(2, stats[epo_id]["probes"])
+                    self.assertEqual(0, stats[epo_id]["failures"])
+                    self.assertGreaterEqual(stats[epo_id]["rtt_max"],
+                                            stats[epo_id]["rtt_min"])
+                    self.assertIsNotNone(stats[epo_id]["rtt_ewma"])
+
+    def test_probe_unavailable_server(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+            epo_id = LOCAL_TEST_SERVER_NAME + "1"
+
+            with MockEpoServer(dxl_client):
+                prober = ServerProber(dxl_client, epo_unique_ids=[epo_id])
+                prober.probe_once()
+                stats = prober.get_stats(epo_id)
+                self.assertFalse(stats["available"])
+                self.assertEqual(0.0, stats["availability"])
+                self.assertEqual(1, stats["consecutive_failures"])
+                self.assertIsNone(stats["rtt_mean"])
+                self.assertIn("No ePO DXL services", stats["last_error"])
+                self.assertIsNone(prober.get_stats("unknown"))
+
+    def test_background_probing(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+            epo_id = LOCAL_TEST_SERVER_NAME + str(DEFAULT_EPO_SERVER_ID)
+
+            with MockEpoServer(dxl_client):
+                with ServerProber(dxl_client, interval=0.05) as prober:
+                    end = time.time() + 5
+                    while time.time() < end and \
+                            (prober.get_stats(epo_id) or {}).get(
+                                "probes", 0) < 3:
+                        time.sleep(0.05)
+                self.assertGreaterEqual(prober.get_stats(epo_id)["probes"], 3)
+
+    def test_invalid_settings(self):
+        for kwargs, message in [({"interval": 0}, "Interval"),
+                                ({"jitter": 1}, "Jitter"),
+                                ({"window_size": 0}, "Window size"),
+                                ({"smoothing": 0}, "Smoothing")]:
+            self.assertRaisesRegex(Exception, message, ServerProber, None,
+                                   **kwargs)
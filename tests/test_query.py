@@ -0,0 +1,80 @@
+import json
+
+from dxlepoclient import Condition, EpoClient, QueryBuilder
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+
+NAME_FIELD = "EPOComputerProperties.ComputerName"
+OS_TYPE_FIELD = "EPOComputerProperties.OSType"
+GUID_FIELD = "EPOLeafNode.AgentGUID"
+CPU_FIELD = "EPOComputerProperties.NumOfCPU"
+
+
+class TestQuery(BaseClientTest):
+
+    def test_to_params(self):
+        query = QueryBuilder("EPOLeafNode") \
+            .select(NAME_FIELD, GUID_FIELD) \
+            .where(Condition.eq(OS_TYPE_FIELD, "Linux")) \
+            .where(Condition.or_(Condition.ge(CPU_FIELD, 8),
+                                 Condition.not_(
+                                     Condition.starts_with(NAME_FIELD,
+                                                           'a "b"')))) \
+            .order_by(NAME_FIELD, descending=True) \
+            .order_by(GUID_FIELD)
+        self.assertEqual({
+            "target": "EPOLeafNode",
+            "select": "(select EPOComputerProperties.ComputerName "
+                      "EPOLeafNode.AgentGUID)",
+            "where": "(where (and (eq EPOComputerProperties.OSType \"Linux\") "
+                     "(or (ge EPOComputerProperties.NumOfCPU 8) "
+                     "(not (startsWith EPOComputerProperties.ComputerName "
+                     "\"a \\\"b\\\"\")))))",
+            "order": "(order (desc EPOComputerProperties.ComputerName) "
+                     "(asc EPOLeafNode.AgentGUID))"
+        }, query.to_params())
+        self.assertEqual({"target": "EPOLeafNode"},
+                         QueryBuilder("EPOLeafNode").to_params())
+        self.assertEqual("(isBlank EPOLeafNode.Tags)",
+                         str(Condition.is_blank("EPOLeafNode.Tags")))
+        self.assertEqual("(eq EPOLeafNode.ManagedState true)",
+                         str(Condition.eq("EPOLeafNode.ManagedState", True)))
+
+    def test_invalid_names(self):
+        self.assertRaisesRegex(Exception, "Invalid field name",
+                               QueryBuilder, "EPOLeafNode)")
+        self.assertRaisesRegex(Exception, "Invalid field name",
+                               Condition.eq, "EPOLeafNode.Node Name", "x")
+        self.assertRaisesRegex(Exception, "Invalid condition",
+                               QueryBuilder("EPOLeafNode").where,
+                               "(eq EPOLeafNode.NodeName \"x\")")
+        self.assertRaisesRegex(Exception, "Limit must be",
+                               QueryBuilder("EPOLeafNode").limit, -1)
+
+    def test_run(self):
+        for dxl_client, _ in self.iter_epo_servers(system_count=300, seed=2):
+            epo_client = EpoClient(dxl_client)
+            query = QueryBuilder("EPOLeafNode") \
+                .select(NAME_FIELD, GUID_FIELD, CPU_FIELD) \
+                .where(Condition.eq(OS_TYPE_FIELD,
+                                    SYSTEM_FIND_OSTYPE_LINUX),
+                       Condition.ge(CPU_FIELD, 8)) \
+                .order_by(NAME_FIELD, descending=True)
+            systems = query.run(epo_client)
+            self.assertTrue(systems)
+            for system in systems:
+                self.assertEqual(
+                    set([NAME_FIELD, GUID_FIELD, CPU_FIELD]),
+                    set(system))
+                self.assertGreaterEqual(system[CPU_FIELD], 8)
+            names = [system[NAME_FIELD] for system in systems]
+            self.assertEqual(sorted(names, reverse=True), names)
+
+            # The projected result is a fraction of the full result
+            all_systems = epo_client.run_command(
+                SYSTEM_FIND_CMD_NAME, {"searchText": ""})
+            self.assertLess(
+                len(json.dumps(systems)) * 10, len(all_systems))
+
+            self.assertEqual(systems[:3],
+                             query.limit(3).run(epo_client))
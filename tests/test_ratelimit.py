@@ -0,0 +1,75 @@
+import threading
+
+from dxlepoclient import RateLimiter, RateLimitPolicy
+from dxlepoclient.ratelimit import get_rate_limiter, remove_rate_limit, \
+    set_rate_limit
+from tests.test_base import BaseClientTest
+
+
+class TestRateLimit(BaseClientTest):
+
+    def test_burst_then_fail_fast(self):
+        rate_limiter = RateLimiter(1, burst=3,
+                                   policy=RateLimitPolicy.FAIL_FAST)
+        for _ in range(3):
+            self.assertEqual(rate_limiter.acquire(), 0.0)
+        self.assertRaisesRegex(Exception, "Rate limit exceeded",
+                               rate_limiter.acquire)
+        self.assertEqual(rate_limiter.metrics["acquired"], 3)
+        self.assertEqual(rate_limiter.metrics["rejected"], 1)
+
+    def test_acquire_count(self):
+        rate_limiter = RateLimiter(1, burst=3,
+                                   policy=RateLimitPolicy.FAIL_FAST)
+        self.assertEqual(rate_limiter.acquire(count=3), 0.0)
+        self.assertRaisesRegex(Exception, "Rate limit exceeded",
+                               rate_limiter.acquire, None, 2)
+        self.assertEqual(rate_limiter.metrics["acquired"], 3)
+        self.assertEqual(rate_limiter.metrics["rejected"], 2)
+        self.assertRaisesRegex(Exception, "Count must be greater than 0",
+                               rate_limiter.acquire, None, 0)
+
+    def test_block_waits_for_token(self):
+        rate_limiter = RateLimiter(50, burst=1)
+        rate_limiter.acquire()
+
+        threads = [threading.Thread(target=rate_limiter.acquire)
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        metrics = rate_limiter.metrics
+        self.assertEqual(metrics["acquired"], 5)
+        self.assertEqual(metrics["waits"], 4)
+        # Waiters are queued behind each other (1/50 second apart)
+        self.assertGreaterEqual(metrics["max_wait_time"], 0.07)
+
+    def test_block_max_wait(self):
+        rate_limiter = RateLimiter(1, burst=1, max_wait=0.1)
+        rate_limiter.acquire()
+        self.assertRaisesRegex(Exception, "Rate limit exceeded",
+                               rate_limiter.acquire)
+
+    def test_block_timeout(self):
+        rate_limiter = RateLimiter(10, burst=1)
+        rate_limiter.acquire()
+        self.assertRaisesRegex(Exception, "Rate limit exceeded",
+                               rate_limiter.acquire, 0.05)
+        self.assertGreater(rate_limiter.acquire(1), 0)
+        self.assertEqual(rate_limiter.metrics["rejected"], 1)
+
+    def test_invalid_parameters(self):
+        self.assertRaisesRegex(Exception, "Rate must be greater than 0",
+                               RateLimiter, 0)
+        self.assertRaisesRegex(Exception, "Invalid rate limit policy: drop",
+                               RateLimiter, 1, policy="drop")
+
+    def test_registry(self):
+        rate_limiter = set_rate_limit("registry_test", 10)
+        try:
+            self.assertIs(get_rate_limiter("registry_test"), rate_limiter)
+        finally:
+            remove_rate_limit("registry_test")
+        self.assertIsNone(get_rate_limiter("registry_test"))
@@ -0,0 +1,76 @@
+import threading
+import time
+
+from dxlepoclient import Priority, RequestScheduler
+from tests.test_base import BaseClientTest
+
+
+class TestScheduler(BaseClientTest):
+
+    @staticmethod
+    def start_request(scheduler, priority, order, release_event):
+        def run():
+            with scheduler.slot(priority):
+                order.append(priority)
+                release_event.wait()
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def test_interactive_bypasses_bulk_backlog(self):
+        scheduler = RequestScheduler(
+            max_concurrency=1,
+            lane_concurrency={Priority.BULK: 1})
+        order = []
+        release = threading.Event()
+
+        # Occupy the only slot and queue a backlog of bulk requests
+        threads = [self.start_request(scheduler, Priority.BULK, order,
+                                      release)]
+        self.wait_for(lambda: order)
+        threads += [self.start_request(scheduler, Priority.BULK, order,
+                                       release) for _ in range(5)]
+        self.wait_for(
+            lambda: scheduler.metrics[Priority.BULK]["queue_depth"] == 5)
+        threads.append(self.start_request(scheduler, Priority.INTERACTIVE,
+                                          order, release))
+        self.wait_for(
+            lambda: scheduler.metrics[Priority.INTERACTIVE]["queue_depth"])
+
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(order[1], Priority.INTERACTIVE)
+        metrics = scheduler.metrics
+        self.assertEqual(metrics[Priority.BULK]["dispatched"], 6)
+        self.assertEqual(metrics[Priority.INTERACTIVE]["dispatched"], 1)
+        self.assertEqual(metrics[Priority.BULK]["in_flight"], 0)
+
+    def test_lane_concurrency_budget(self):
+        scheduler = RequestScheduler(max_concurrency=8,
+                                     lane_concurrency={Priority.BULK: 2})
+        order = []
+        release = threading.Event()
+
+        threads = [self.start_request(scheduler, Priority.BULK, order,
+                                      release) for _ in range(4)]
+        self.wait_for(lambda: len(order) == 2)
+        time.sleep(0.05)
+
+        metrics = scheduler.metrics[Priority.BULK]
+        self.assertEqual(metrics["in_flight"], 2)
+        self.assertEqual(metrics["queue_depth"], 2)
+
+        # Other lanes are unaffected by the bulk budget
+        with scheduler.slot(Priority.NORMAL):
+            self.assertEqual(scheduler.metrics[Priority.NORMAL]["in_flight"],
+                             1)
+
+        release.set()
+        for thread in threads:
+            thread.join()
+
+    def test_invalid_priority(self):
+        self.assertRaisesRegex(Exception, "Invalid priority: urgent",
+                               RequestScheduler().acquire, "urgent")
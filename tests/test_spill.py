@@ -0,0 +1,57 @@
+import json
+import shutil
+import tempfile
+
+from mock import patch
+from dxlepoclient import EpoClient, OutputFormat, SpilledPayload
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+from tests.test_parsers import SYSTEM_FIND_RECORDS, SYSTEM_FIND_XML_PAYLOAD
+from tests.mock_eposerver import MockEpoServer
+
+
+class TestSpill(BaseClientTest):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_spilled_payload(self):
+        payload = json.dumps(SYSTEM_FIND_PAYLOAD).encode("utf-8")
+        spilled = SpilledPayload(payload, self.tmp_dir, chunk_size=7)
+        self.assertEqual(len(payload), len(spilled))
+        self.assertEqual(payload, b"".join(spilled))
+        self.assertEqual(SYSTEM_FIND_PAYLOAD, list(spilled.iter_records()))
+        # The payload is closed once its records have been read
+        self.assertTrue(spilled.closed)
+        self.assertRaisesRegex(Exception, "Spilled payload is closed",
+                               iter, spilled)
+
+        with SpilledPayload(SYSTEM_FIND_XML_PAYLOAD, chunk_size=5) as spilled:
+            self.assertEqual(SYSTEM_FIND_RECORDS, list(
+                spilled.iter_records(OutputFormat.XML, close=False)))
+            self.assertFalse(spilled.closed)
+        self.assertTrue(spilled.closed)
+
+        with SpilledPayload(b"") as spilled:
+            self.assertEqual(b"", b"".join(spilled))
+
+    def test_client_spills_large_responses(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client, system_count=50):
+                epo_client = EpoClient(dxl_client, spill_threshold=1000,
+                                       spill_dir=self.tmp_dir)
+                expected = json.loads(epo_client.run_command(
+                    SYSTEM_FIND_CMD_NAME, {"searchText": ""}))
+                with patch("dxlepoclient.spill.SpilledPayload",
+                           wraps=SpilledPayload) as spilled_payload:
+                    self.assertEqual(expected, list(epo_client.iter_records(
+                        SYSTEM_FIND_CMD_NAME, {"searchText": ""})))
+                    self.assertEqual(1, spilled_payload.call_count)
+                    # Responses under the threshold are parsed in memory
+                    list(epo_client.iter_records(CORE_HELP_CMD_NAME))
+                    self.assertEqual(1, spilled_payload.call_count)
@@ -0,0 +1,120 @@
+import importlib
+
+from dxlepoclient import EpoClient, OutputFormat, Span, Tracer
+from dxlepoclient.tracing import OpenTelemetryTracer, SpanAttribute, \
+    SpanName, get_tracer, set_tracer
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+from tests.mock_eposerver import MockEpoServer
+
+
+class RecordingSpan(Span):
+
+    def __init__(self, tracer, name, attributes):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.parent = tracer.stack[-1] if tracer.stack else None
+        self.error = None
+        self.ended = False
+        self._tracer = tracer
+        tracer.stack.append(self)
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        self.error = error
+
+    def end(self):
+        self.ended = True
+        self._tracer.stack.remove(self)
+
+
+class RecordingTracer(Tracer):
+
+    def __init__(self):
+        self.spans = []
+        self.stack = []
+
+    def start_span(self, name, attributes=None):
+        span = RecordingSpan(self, name, attributes)
+        self.spans.append(span)
+        return span
+
+
+class TestTracing(BaseClientTest):
+
+    def setUp(self):
+        self.tracer = RecordingTracer()
+        set_tracer(self.tracer)
+
+    def tearDown(self):
+        set_tracer(None)
+
+    def test_default_tracer(self):
+        set_tracer(None)
+        self.assertIs(Tracer, type(get_tracer()))
+        with get_tracer().start_span(SpanName.COMMAND) as span:
+            span.set_attribute(SpanAttribute.COMMAND, CORE_HELP_CMD_NAME)
+
+    def test_command_spans(self):
+        for dxl_client, use_commands_service in self.iter_epo_servers():
+            del self.tracer.spans[:]
+            epo_client = EpoClient(dxl_client)
+            discovery = [span for span in self.tracer.spans
+                         if span.name == SpanName.DISCOVERY]
+            self.assertEqual(1, len(discovery))
+            queries = [span for span in self.tracer.spans
+                       if span.name == SpanName.REGISTRY_QUERY]
+            self.assertEqual(2, len(queries))
+            for query in queries:
+                self.assertIs(discovery[0], query.parent)
+                self.assertFalse(query.attributes[SpanAttribute.CACHE_HIT])
+
+            del self.tracer.spans[:]
+            res = epo_client.run_command(SYSTEM_FIND_CMD_NAME)
+            span = self.tracer.spans[0]
+            self.assertEqual(SpanName.COMMAND, span.name)
+            self.assertTrue(span.ended)
+            self.assertIsNone(span.error)
+            attributes = span.attributes
+            self.assertEqual(epo_client._epo_unique_id,
+                             attributes[SpanAttribute.EPO_UNIQUE_ID])
+            self.assertEqual(SYSTEM_FIND_CMD_NAME,
+                             attributes[SpanAttribute.COMMAND])
+            self.assertEqual(OutputFormat.JSON,
+                             attributes[SpanAttribute.OUTPUT_FORMAT])
+            self.assertEqual(
+                "commands" if use_commands_service else "remote",
+                attributes[SpanAttribute.ROUTE])
+            self.assertEqual(len(res.encode("utf-8")),
+                             attributes[SpanAttribute.RESPONSE_SIZE])
+            self.assertGreater(attributes[SpanAttribute.REQUEST_SIZE], 0)
+            self.assertTrue(attributes[SpanAttribute.MESSAGE_ID])
+            self.assertNotIn(SpanAttribute.ERROR_CODE, attributes)
+
+    def test_error_response_span(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client, error_rate=1):
+                epo_client = EpoClient(dxl_client)
+                del self.tracer.spans[:]
+                with self.assertRaisesRegex(Exception, "Synthetic error"):
+                    epo_client.run_command(SYSTEM_FIND_CMD_NAME)
+                span = self.tracer.spans[0]
+                self.assertIn(SpanAttribute.ERROR_CODE, span.attributes)
+                self.assertIn("Synthetic error", str(span.error))
+
+    def test_open_telemetry_tracer(self):
+        try:
+            importlib.import_module("opentelemetry")
+        except ImportError:
+            self.assertRaisesRegex(Exception, "OpenTelemetry is not installed",
+                                   OpenTelemetryTracer)
+            return
+        tracer = OpenTelemetryTracer()
+        with tracer.start_span(SpanName.COMMAND,
+                               {SpanAttribute.COMMAND: CORE_HELP_CMD_NAME,
+                                SpanAttribute.EPO_UNIQUE_ID: None}) as span:
+            span.set_attribute(SpanAttribute.ROUTE, "commands")
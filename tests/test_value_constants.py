@@ -14,6 +14,8 @@ HELP_CMD_RESPONSE_PAYLOAD = os.linesep.join([
 
 SYSTEM_FIND_CMD_NAME = "system.find"
 
+EXECUTE_QUERY_CMD_NAME = "core.executeQuery"
+
 SYSTEM_FIND_OSTYPE_LINUX = "Linux"
 
 SYSTEM_FIND_PAYLOAD = [
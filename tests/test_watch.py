@@ -0,0 +1,110 @@
+import json
+import threading
+import time
+
+from mock import Mock
+from dxlepoclient import EpoClient, QueryWatcher
+from tests.test_base import BaseClientTest
+from tests.test_value_constants import *
+from tests.mock_eposerver import MockEpoServer
+
+
+class TestQueryWatcher(BaseClientTest):
+
+    def test_callbacks_on_change(self):
+        results = iter(["a", "a", "b", "b", "b"])
+        epo_client = Mock()
+        epo_client.run_command.side_effect = lambda *args: next(results, "b")
+        received = []
+        with QueryWatcher(epo_client, jitter=0) as watcher:
+            watcher.watch("system.find", {"searchText": ""}, interval=0.01,
+                          callback=received.append)
+            self.assertTrue(self.wait_for(
+                lambda: watcher.metrics["runs"] >= 5))
+        self.assertEqual(["a", "b"], received)
+        self.assertEqual(2, watcher.metrics["changes"])
+
+    def test_coalesced_registrations(self):
+        epo_client = Mock()
+        epo_client.run_command.return_value = "[]"
+        first, second, other = [], [], []
+        with QueryWatcher(epo_client, jitter=0) as watcher:
+            handle = watcher.watch("system.find", {"searchText": "a"},
+                                   interval=0.02, callback=first.append)
+            watcher.watch("system.find", {"searchText": "a"}, interval=60,
+                          callback=second.append)
+            watcher.watch("system.find", {"searchText": "b"}, interval=60,
+                          callback=other.append)
+            self.assertTrue(self.wait_for(
+                lambda: watcher.metrics["runs"] >= 4))
+            metrics = watcher.metrics
+            self.assertEqual(2, metrics["queries"])
+            self.assertEqual(3, metrics["registrations"])
+            # The coalesced query runs at the shortest interval
+            self.assertEqual(["[]"], first)
+            self.assertEqual(["[]"], second)
+            self.assertEqual(["[]"], other)
+
+            watcher.unwatch(handle)
+            watcher.unwatch(handle)
+            self.assertEqual(2, watcher.metrics["registrations"])
+
+    def test_skip_while_running(self):
+        in_flight = []
+        overlapped = []
+
+        def run_command(*_):
+            in_flight.append(1)
+            if len(in_flight) > 1:
+                overlapped.append(1)
+            time.sleep(0.1)
+            in_flight.pop()
+            return "[]"
+
+        epo_client = Mock()
+        epo_client.run_command.side_effect = run_command
+        with QueryWatcher(epo_client, jitter=0) as watcher:
+            watcher.watch("system.find", interval=0.01, callback=Mock())
+            self.assertTrue(self.wait_for(
+                lambda: watcher.metrics["skipped"] >= 3))
+        self.assertEqual([], overlapped)
+
+    def test_errors(self):
+        epo_client = Mock()
+        epo_client.run_command.side_effect = Exception("Failed")
+        callback = Mock()
+        with QueryWatcher(epo_client) as watcher:
+            watcher.watch("system.find", interval=0.01, callback=callback)
+            self.assertTrue(self.wait_for(
+                lambda: watcher.metrics["errors"] >= 2))
+        self.assertFalse(callback.called)
+
+    def test_watch_epo_server(self):
+        with self.create_client(max_retries=0) as dxl_client:
+            dxl_client.connect()
+
+            with MockEpoServer(dxl_client):
+                changed = threading.Event()
+                results = []
+
+                def on_change(result):
+                    results.append(json.loads(result))
+                    changed.set()
+
+                with QueryWatcher(EpoClient(dxl_client)) as watcher:
+                    watcher.watch(SYSTEM_FIND_CMD_NAME,
+                                  {"searchText": SYSTEM_FIND_OSTYPE_LINUX},
+                                  interval=0.05, callback=on_change)
+                    self.assertTrue(changed.wait(5))
+                self.assertEqual([SYSTEM_FIND_PAYLOAD], results)
+
+    def test_invalid_settings(self):
+        self.assertRaisesRegex(Exception, "Jitter", QueryWatcher, None,
+                               jitter=1)
+        self.assertRaisesRegex(Exception, "Workers", QueryWatcher, None,
+                               workers=0)
+        watcher = QueryWatcher(None)
+        self.assertRaisesRegex(Exception, "Interval", watcher.watch,
+                               "system.find", interval=0, callback=Mock())
+        self.assertRaisesRegex(Exception, "callback", watcher.watch,
+                               "system.find")